@@ -0,0 +1,87 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import boto3
+from botocore.client import BaseClient
+from botocore.config import Config
+
+from lib.aws.requester import Requester
+
+
+class ClientFactory:
+    """
+    프로세스 공용 AWS client 저장소
+    - (service, region) 별 client 를 처음 쓸 때 한 번만 만들고 재사용한다(client 는 thread 간 공유 가능).
+    - connection pool 크기는 AWS_MAX_POOL_CONNECTIONS(기본: S3 upload/download/erase worker 수 중 최대, 최소 10)
+    - SQS queue url 은 queue 이름 별로 한 번만 조회한다.
+    - 재시도는 client 가 아니라 공용 Requester(속도 조절, backoff, metrics)가 맡는다.
+    """
+
+    logger = logging.getLogger(__name__)
+    # 동시에 client 를 쓰는 worker 수 환경 변수와 기본값
+    WORKERS = {"S3_UPLOAD_WORKERS": 8, "S3_DOWNLOAD_WORKERS": 8, "S3_ERASE_WORKERS": 4}
+    __lock = threading.Lock()
+    __session: Optional[boto3.session.Session] = None
+    __clients: Dict[Tuple[str, Optional[str]], BaseClient] = {}
+    __queue_urls: Dict[Tuple[str, Optional[str]], str] = {}
+    __requester: Optional[Requester] = None
+
+    @classmethod
+    def get_instance(cls, service: str, region: str = None) -> BaseClient:
+        """
+        :param region: 없으면 AWS_REGION/AWS_DEFAULT_REGION(boto3 기본 설정)
+        """
+        key = (service, region or os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION"))
+        client = cls.__clients.get(key)
+        if client is None:
+            # boto3 session 은 thread safe 하지 않으므로 lock 안에서 만든다.
+            with cls.__lock:
+                if key not in cls.__clients:
+                    if cls.__session is None:
+                        cls.__session = boto3.session.Session()
+                    pool = cls.max_pool_connections()
+                    cls.logger.info(f"Create {service} client(region: {key[1]}, max_pool_connections: {pool})")
+                    cls.__clients[key] = cls.__session.client(
+                        service,
+                        region_name=key[1],
+                        config=Config(max_pool_connections=pool, retries={"mode": "standard", "total_max_attempts": 1}),
+                    )
+                client = cls.__clients[key]
+        return client
+
+    @classmethod
+    def get_queue_url(cls, queue_name: str, region: str = None) -> str:
+        key = (queue_name, region or os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION"))
+        if key not in cls.__queue_urls:
+            client = cls.get_instance("sqs", region=region)
+            queue_url = cls.get_requester().call(client, "get_queue_url", QueueName=queue_name)["QueueUrl"]
+            with cls.__lock:
+                cls.__queue_urls[key] = queue_url
+        return cls.__queue_urls[key]
+
+    @classmethod
+    def get_requester(cls) -> Requester:
+        if cls.__requester is None:
+            with cls.__lock:
+                if cls.__requester is None:
+                    cls.__requester = Requester()
+        return cls.__requester
+
+    @classmethod
+    def max_pool_connections(cls) -> int:
+        if os.getenv("AWS_MAX_POOL_CONNECTIONS"):
+            return int(os.getenv("AWS_MAX_POOL_CONNECTIONS"))
+        return max(10, *(int(os.getenv(name, default)) for name, default in cls.WORKERS.items()))
+
+    @classmethod
+    def clear(cls):
+        """
+        만든 client, queue url 과 Requester(metrics)를 모두 버린다(credential/endpoint 가 바뀌었을 때).
+        """
+        with cls.__lock:
+            cls.__session = None
+            cls.__requester = None
+            cls.__clients.clear()
+            cls.__queue_urls.clear()
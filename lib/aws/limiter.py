@@ -0,0 +1,58 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    적응형 token bucket
+    - throttle 을 받기 전까지는 max_rate(0 이면 제한 없음)로 보낸다.
+    - throttle 을 받으면 rate 를 절반으로 줄이고, 성공할 때마다 1%(최소 0.1 rps)씩 다시 늘린다(AIMD).
+    - bucket 크기는 1 초 분량(최소 1 token)이다.
+    """
+
+    def __init__(self, max_rate: float = 0, min_rate: float = 1.0):
+        self.__lock = threading.Lock()
+        self.__max_rate = max_rate
+        self.__min_rate = min_rate
+        self.__rate = max_rate
+        self.__tokens = max(1.0, max_rate)
+        self.__updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """
+        :return: 현재 초당 요청 수 제한(0 이면 제한 없음)
+        """
+        return self.__rate
+
+    def acquire(self):
+        """
+        token 하나를 쓸 수 있을 때까지 기다린다.
+        """
+        while True:
+            with self.__lock:
+                if not self.__rate:
+                    return
+                now = time.monotonic()
+                self.__tokens = min(max(1.0, self.__rate), self.__tokens + (now - self.__updated) * self.__rate)
+                self.__updated = now
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                wait = (1 - self.__tokens) / self.__rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.__lock:
+            if self.__rate:
+                rate = self.__rate + max(0.1, self.__rate * 0.01)
+                self.__rate = min(rate, self.__max_rate) if self.__max_rate else rate
+
+    def on_throttle(self, observed_rate: float):
+        """
+        :param observed_rate: throttle 직전에 실제로 보낸 초당 요청 수(처음 throttle 일 때 시작 rate)
+        """
+        with self.__lock:
+            rate = self.__rate or observed_rate
+            self.__rate = max(self.__min_rate, rate / 2)
+            self.__tokens = min(self.__tokens, 1.0)
@@ -0,0 +1,188 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterator
+
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
+from botocore.exceptions import ConnectionError as BotocoreConnectionError
+from botocore.exceptions import ReadTimeoutError
+
+from lib.aws.limiter import RateLimiter
+
+
+class Requester:
+    """
+    AWS API 호출 layer
+    - service 별 RateLimiter 로 요청 속도를 조절한다.
+    - throttle(SlowDown 등)과 일시적인 오류는 full jitter 지수 backoff 로 다시 시도한다.
+    - 호출 당 최대 시도 수(AWS_MAX_ATTEMPTS)와 operation 별 전체 재시도 예산(AWS_RETRY_BUDGET)을 둔다.
+    - operation 별 요청/throttle/재시도/실패 수와 초당 요청 수를 metrics 로 남긴다.
+    """
+
+    THROTTLE_CODES = {
+        "SlowDown",
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "RequestThrottled",
+        "RequestThrottledException",
+        "RequestLimitExceeded",
+        "TooManyRequestsException",
+        "AWS.SimpleQueueService.RequestThrottled",
+    }
+    TRANSIENT_CODES = {
+        "InternalError",
+        "InternalFailure",
+        "ServiceUnavailable",
+        "RequestTimeout",
+        "RequestTimeoutException",
+    }
+
+    def __init__(self, max_attempts: int = None, retry_budget: int = None, base_delay: float = None):
+        self.logger = logging.getLogger(__name__)
+        self.__max_attempts = max_attempts if max_attempts is not None else int(os.getenv("AWS_MAX_ATTEMPTS", 8))
+        # 재시도 loop(send_message_batch, delete_objects 등)는 최소 한 번은 호출해야 결과가 있다.
+        if self.__max_attempts < 1:
+            raise AttributeError(f"max_attempts({self.__max_attempts}) should be >= 1")
+        self.__retry_budget = retry_budget if retry_budget is not None else int(os.getenv("AWS_RETRY_BUDGET", 500))
+        self.__base_delay = base_delay if base_delay is not None else float(os.getenv("AWS_RETRY_BASE_DELAY", 0.1))
+        self.__max_rate = float(os.getenv("AWS_MAX_RPS", 0))
+        self.__lock = threading.Lock()
+        self.__limiters: Dict[str, RateLimiter] = {}
+        self.__budgets: Dict[str, int] = defaultdict(lambda: self.__retry_budget)
+        self.__metrics: Dict[str, Dict[str, Any]] = {}
+        # service 별 최근 1 초 동안의 요청 시각(throttle 시 실제 rate 계산)
+        self.__recent: Dict[str, Deque[float]] = defaultdict(deque)
+
+    def call(self, client: BaseClient, operation: str, attempts: int = None, **kwargs) -> Dict[str, Any]:
+        """
+        :param operation: client method 이름(put_object 등)
+        :param attempts: 최대 시도 수(없으면 AWS_MAX_ATTEMPTS)
+        """
+        service = client.meta.service_model.service_name
+        name = f"{service}.{operation}"
+        limiter = self.__limiter(service)
+        attempts = attempts or self.__max_attempts
+        for attempt in range(attempts):
+            limiter.acquire()
+            self.__count(name, "requests", service=service)
+            try:
+                response = getattr(client, operation)(**kwargs)
+            except Exception as e:
+                throttled = self.is_throttle(e)
+                if throttled:
+                    self.__count(name, "throttles")
+                    limiter.on_throttle(self.__observed_rate(service))
+                if not (throttled or self.is_transient(e)) or attempt == attempts - 1 or not self.__spend(name):
+                    self.__count(name, "errors")
+                    self.logger.error(f"Fail to {name}({attempt + 1}/{attempts}): {e}")
+                    raise
+                self.__count(name, "retries")
+                self.logger.info(f"Retry to {name}({attempt + 1}/{attempts}): {e}")
+                self.wait(attempt)
+            else:
+                limiter.on_success()
+                return response
+
+    def paginate(self, client: BaseClient, operation: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        ContinuationToken 방식(list_objects_v2 등) 목록 조회를 페이지마다 call 로 호출한다.
+        """
+        while True:
+            page = self.call(client, operation, **kwargs)
+            yield page
+            if not page.get("IsTruncated"):
+                return
+            kwargs = {**kwargs, "ContinuationToken": page["NextContinuationToken"]}
+
+    @property
+    def max_attempts(self) -> int:
+        return self.__max_attempts
+
+    def wait(self, attempt: int):
+        """
+        full jitter 지수 backoff: [0, base_delay * 2^attempt) 초(최대 20 초) 동안 기다린다.
+        """
+        time.sleep(random.uniform(0, min(20.0, self.__base_delay * 2**attempt)))
+
+    @classmethod
+    def is_throttle(cls, e: Exception) -> bool:
+        return isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") in cls.THROTTLE_CODES
+
+    @classmethod
+    def is_retryable_code(cls, code: str) -> bool:
+        """
+        :param code: batch API 의 항목 별 오류 코드(delete_objects Errors 등)
+        """
+        return code in cls.THROTTLE_CODES or code in cls.TRANSIENT_CODES
+
+    @classmethod
+    def is_transient(cls, e: Exception) -> bool:
+        if isinstance(e, (BotocoreConnectionError, ReadTimeoutError, ConnectionError, TimeoutError)):
+            return True
+        if isinstance(e, ClientError):
+            error = e.response.get("Error", {})
+            status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+            return error.get("Code") in cls.TRANSIENT_CODES or status >= 500
+        return False
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: {service.operation: {requests, throttles, retries, errors, rps, rate_limit}}
+        """
+        with self.__lock:
+            return {
+                name: {
+                    **{key: metric[key] for key in ["requests", "throttles", "retries", "errors"]},
+                    "rps": round(metric["requests"] / max(metric["last"] - metric["first"], 1e-3), 2),
+                    "rate_limit": round(self.__limiters[metric["service"]].rate, 2),
+                }
+                for name, metric in self.__metrics.items()
+            }
+
+    def log_metrics(self):
+        for name, metric in self.metrics().items():
+            self.logger.info(f"{name}: {metric}")
+
+    def __limiter(self, service: str) -> RateLimiter:
+        with self.__lock:
+            if service not in self.__limiters:
+                self.__limiters[service] = RateLimiter(max_rate=self.__max_rate)
+            return self.__limiters[service]
+
+    def __count(self, name: str, key: str, service: str = None):
+        now = time.monotonic()
+        with self.__lock:
+            if name not in self.__metrics:
+                self.__metrics[name] = {
+                    "service": service,
+                    "requests": 0,
+                    "throttles": 0,
+                    "retries": 0,
+                    "errors": 0,
+                    "first": now,
+                    "last": now,
+                }
+            self.__metrics[name][key] += 1
+            if key == "requests":
+                self.__metrics[name]["last"] = now
+                recent = self.__recent[service]
+                recent.append(now)
+                while recent and recent[0] < now - 1:
+                    recent.popleft()
+
+    def __observed_rate(self, service: str) -> float:
+        with self.__lock:
+            return max(1.0, len(self.__recent[service]))
+
+    def __spend(self, name: str) -> bool:
+        with self.__lock:
+            if self.__budgets[name] <= 0:
+                self.logger.error(f"Retry budget of {name} is exhausted")
+                return False
+            self.__budgets[name] -= 1
+            return True
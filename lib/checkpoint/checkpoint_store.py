@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Callable, List, Mapping
+
+
+class Checkpoint:
+    """
+    한 relation 의 단계(stage) 별 중간 결과 저장소(CheckpointStore.checkpoint 로 만든다)
+    - {directory}/{stage}.pkl: 단계 결과, {directory}/{stage}.json: 입력 fingerprint 와 결과 sha256
+    - 단계의 입력 fingerprint 는 이전 단계 결과의 sha256 이라, 앞 단계를 다시 실행해 결과가 바뀌면 뒤 단계도 다시 실행한다.
+    - resume 이면 입력 fingerprint 와 파일 hash 가 맞는 단계는 실행하지 않고 저장된 결과를 쓴다.
+    """
+
+    def __init__(self, directory: str, fingerprint: str, resume: bool):
+        self.logger = logging.getLogger(__name__)
+        self.__directory = directory
+        self.__fingerprint = fingerprint
+        self.__resume = resume
+        self.__restored: List[str] = []
+
+    @property
+    def restored(self) -> List[str]:
+        """
+        :return: 저장된 결과를 쓴 단계
+        """
+        return list(self.__restored)
+
+    def stage(self, name: str, fn: Callable[[], Any]) -> Any:
+        path, meta_path = self.__paths(name)
+        # 단계 안에서 다른 단계를 감싸도(_process 의 세부 단계) 입력은 시작 시점의 fingerprint 다.
+        fingerprint = self.__fingerprint
+        if self.__resume and os.path.exists(path) and os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            with open(path, "rb") as f:
+                body = f.read()
+            sha256 = hashlib.sha256(body).hexdigest()
+            if meta.get("input") == fingerprint and meta.get("sha256") == sha256:
+                self.logger.info(f"Resume {name} from {path}")
+                self.__restored.append(name)
+                self.__fingerprint = sha256
+                return pickle.loads(body)
+            self.logger.info(f"Checkpoint {path} doesn't match, run {name}")
+
+        result = fn()
+        body = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        sha256 = hashlib.sha256(body).hexdigest()
+        os.makedirs(self.__directory, exist_ok=True)
+        # data -> meta 순서로 교체한다. 중간에 실패하면 meta 가 맞지 않아 다음 resume 은 단계를 다시 실행한다.
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(body)
+        os.replace(f"{path}.tmp", path)
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump({"input": fingerprint, "sha256": sha256, "bytes": len(body)}, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        self.logger.info(f"Checkpoint {name}: {path}({len(body) / 1024 / 1024:.2f}MB)")
+        self.__fingerprint = sha256
+        return result
+
+    def __paths(self, name: str):
+        return os.path.join(self.__directory, f"{name}.pkl"), os.path.join(self.__directory, f"{name}.json")
+
+
+class CheckpointStore:
+    """
+    실행 날짜 별 checkpoint 저장소
+    - {CHECKPOINT_DIR}/{date}/run.json: 실행 id(resume 하면 같은 S3 prefix 에 이어서 쓴다)
+    - {CHECKPOINT_DIR}/{date}/{rel_name}/: relation 별 Checkpoint
+    CHECKPOINT_DIR 이 없으면 저장하지 않는다. 실행이 끝나면 clear 로 지운다.
+    """
+
+    def __init__(self, directory: str = None, resume: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.__directory = directory if directory is not None else os.getenv("CHECKPOINT_DIR")
+        self.__resume = resume
+        if resume and not self.enabled:
+            self.logger.error("CHECKPOINT_DIR should be set to resume")
+            raise RuntimeError("CHECKPOINT_DIR should be set to resume")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.__directory)
+
+    def run_id(self, date: datetime) -> str:
+        """
+        :return: resume 이면 저장된 실행 id, 아니면 새 실행 id
+        """
+        path = os.path.join(self.__date_dir(date), "run.json") if self.enabled else None
+        if self.__resume and os.path.exists(path):
+            with open(path, "r") as f:
+                run_id = json.load(f)["run_id"]
+            self.logger.info(f"Resume run {run_id}")
+            return run_id
+        run_id = f"{date.strftime('%Y-%m-%d')}-{uuid.uuid4().hex[:8]}"
+        if self.enabled:
+            os.makedirs(self.__date_dir(date), exist_ok=True)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump({"run_id": run_id}, f)
+            os.replace(f"{path}.tmp", path)
+        return run_id
+
+    def checkpoint(self, date: datetime, rel_name: str, options: Mapping[str, Any] = None) -> Checkpoint | None:
+        """
+        :param options: 결과에 영향을 주는 실행 옵션(바뀌면 저장된 단계를 쓰지 않는다)
+        :return: Checkpoint, CHECKPOINT_DIR 이 없으면 None
+        """
+        if not self.enabled:
+            return None
+        key = json.dumps(
+            {"date": date.strftime("%Y-%m-%d"), "rel_name": rel_name, "options": options or {}},
+            sort_keys=True,
+            default=str,
+        )
+        return Checkpoint(
+            directory=os.path.join(self.__date_dir(date), rel_name),
+            fingerprint=hashlib.sha256(key.encode()).hexdigest(),
+            resume=self.__resume,
+        )
+
+    def clear(self, date: datetime):
+        if self.enabled:
+            shutil.rmtree(self.__date_dir(date), ignore_errors=True)
+            self.logger.info(f"Clear checkpoints of {date.strftime('%Y-%m-%d')}")
+
+    def __date_dir(self, date: datetime) -> str:
+        return os.path.join(self.__directory, date.strftime("%Y-%m-%d"))
@@ -1,7 +1,9 @@
-from typing import Any, List, Mapping, Optional
+from itertools import islice
+from typing import Any, Iterator, List, Mapping, Optional
 
 from overrides import override
 from pymongo import ReadPreference
+from pymongo.cursor import Cursor
 from pymongo.database import Database
 
 from lib.interface.repository_ifs import RepositoryIfs
@@ -33,8 +35,7 @@ class MongoRepository(RepositoryIfs):
             self.logger.info(f"{self._db_name}.{rel_name}: {filter} Not Found")
         return data
 
-    @override
-    def find(
+    def __cursor(
         self,
         rel_name: str,
         filter: Mapping[str, Any] = None,
@@ -42,34 +43,56 @@ class MongoRepository(RepositoryIfs):
         hint: Mapping[str, int] = None,
         order_by: Mapping[str, int] = None,
         limit: int = None,
-        *args,
-        **kwargs,
-    ) -> List[Mapping[str, Any]]:
+    ) -> Cursor:
         if hint:
             hint = [(k, v) for k, v in hint.items()]
         if order_by:
-            order_by = [(k, v) for k, v in hint.items()]
+            order_by = [(k, v) for k, v in order_by.items()]
         else:
             order_by = [("_id", 1)]
+        cursor = self.read_db[rel_name].find(filter=filter, projection=project).sort(order_by).hint(hint)
         if limit:
-            data = list(
-                self.read_db[rel_name]
-                .find(filter=filter, projection=project)
-                .sort(order_by)
-                .limit(limit)
-                .hint(hint)
-            )
-        else:
-            data = list(
-                self.read_db[rel_name]
-                .find(filter=filter, projection=project)
-                .sort(order_by)
-                .hint(hint)
-            )
+            cursor = cursor.limit(limit)
+        return cursor
+
+    @override
+    def find(
+        self,
+        rel_name: str,
+        filter: Mapping[str, Any] = None,
+        project: Mapping[str, bool] = None,
+        hint: Mapping[str, int] = None,
+        order_by: Mapping[str, int] = None,
+        limit: int = None,
+        *args,
+        **kwargs,
+    ) -> List[Mapping[str, Any]]:
+        data = list(self.__cursor(rel_name, filter, project, hint, order_by, limit))
         if not data:
             self.logger.info(f"{self._db_name}.{rel_name}: {filter} Not Found")
         return data
 
+    @override
+    def find_batches(
+        self,
+        rel_name: str,
+        filter: Mapping[str, Any] = None,
+        project: Mapping[str, bool] = None,
+        hint: Mapping[str, int] = None,
+        order_by: Mapping[str, int] = None,
+        limit: int = None,
+        batch_size: int = 1000,
+        *args,
+        **kwargs,
+    ) -> Iterator[List[Mapping[str, Any]]]:
+        cursor = self.__cursor(rel_name, filter, project, hint, order_by, limit).batch_size(batch_size)
+        found = False
+        while batch := list(islice(cursor, batch_size)):
+            found = True
+            yield batch
+        if not found:
+            self.logger.info(f"{self._db_name}.{rel_name}: {filter} Not Found")
+
     @override
     def distinct(
         self,
@@ -11,6 +11,8 @@ from lib.domain.event.model.crawled_event_schema import CrawledBrandEventSchema
 from lib.domain.event.model.service_event_schema import ServiceBrandEventSchema
 from lib.interface.processor_ifs import ProcessorIfs
 from lib.interface.repository_ifs import RepositoryIfs
+from lib.model.records import FrameRecords
+from lib.model.validator import ValidatorFactory
 
 
 class EventProcessor(ProcessorIfs):
@@ -19,18 +21,26 @@ class EventProcessor(ProcessorIfs):
         self.__repository: RepositoryIfs = RepositoryFactory.get_instance(
             _type="mongo", db_name=os.getenv("MONGO_CRAWLING_DB")
         )
+        self.__batch_size = int(os.getenv("MONGO_BATCH_SIZE", 5000))
 
     def _preprocess(self, date: datetime, *args, **kwargs) -> DataFrame:
-        data = self.__repository.find(
+        # batch 단위로 읽으면서 검증하고 DataFrame chunk 로 바꾼 뒤, 마지막에 한 번만 합친다.
+        validator = ValidatorFactory.get_instance(CrawledBrandEventSchema)
+        chunks, errors = [], 0
+        for batch in self.__repository.find_batches(
             rel_name=self._name,
             project={"_id": False, "created_at": False, "updated_at": False},
-        )
-        errors = CrawledBrandEventSchema().validate(data, many=True)
+            batch_size=self.__batch_size,
+        ):
+            errors += len(validator.validate(batch))
+            chunks.append(DataFrame(batch, dtype=object))
         if errors:
-            self.logger.error(f"Crawling Event Schema Validation Error: {len(errors)}")
-            raise RuntimeError(f"Crawling Event Schema Validation Error: {len(errors)}")
+            self.logger.error(f"Crawling Event Schema Validation Error: {errors}")
+            raise RuntimeError(f"Crawling Event Schema Validation Error: {errors}")
+        # dtype 은 전체 chunk 를 합친 뒤 한 번에 추론한다.
+        data = pd.concat(chunks, ignore_index=True).infer_objects() if chunks else DataFrame()
         self.logger.info(f"Initial data: {len(data)}")
-        return DataFrame(data)
+        return data
 
     def _process(self, data: DataFrame, date: datetime, *args, **kwargs) -> DataFrame:
         data["name"] = data["name"].map(lambda x: x.lower())
@@ -66,9 +76,9 @@ class EventProcessor(ProcessorIfs):
             ]
         ].copy()
         data["status"] = 2  # 현재 업데이트 되는 데이터의 status = 2
-        data = data.to_dict("records")
-        errors = ServiceBrandEventSchema().validate(data, many=True)
+        errors = ValidatorFactory.get_instance(ServiceBrandEventSchema).validate_frame(data)
         if errors:
             self.logger.error(f"Service Event Schema Validation Error: {len(errors)}")
             raise RuntimeError(f"Service Event Schema Validation Error: {len(errors)}")
+        data = FrameRecords(data)
         return data
@@ -7,9 +7,9 @@ from lib.interface.processor_ifs import ProcessorIfs
 
 class ProcessorFactory:
     @classmethod
-    def get_instance(cls, _type: Literal["events", "products"]) -> ProcessorIfs:
+    def get_instance(cls, _type: Literal["events", "products"], *args, **kwargs) -> ProcessorIfs:
         match _type:
             case "events":
-                return EventProcessor()
+                return EventProcessor(*args, **kwargs)
             case "products":
-                return ProductProcessor()
+                return ProductProcessor(*args, **kwargs)
@@ -0,0 +1,449 @@
+import re
+from collections import Counter, deque
+from typing import Any, Iterable, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from lib.converter.category_converter import CategoryConverter
+
+
+CATEGORY_TAG_MAP = {
+    "Drink": [
+        "냉장커피",
+        "커피음료",
+        "가공유",
+        "음료",
+        "에너지음료",
+        "원컵류",
+        "커피차류",
+        "분말커피류",
+        "커피차",
+        "차류",
+        "디카페인",
+        "원컵",
+    ],
+    "Alcohol": [],
+    "Snack": [
+        "냉장디저트",
+        "디저트",
+        "스낵",
+        "과자류",
+        "토이캔디",
+        "상온디저트",
+        "기능성캔디",
+        "비스켓",
+        "쿠키",
+        "캔디",
+        "간식",
+    ],
+    "Ice Cream": [
+        "아이스크림",
+    ],
+    "Noodle": [
+        "조리면",
+        "용기면",
+        "봉지면",
+        "면류",
+        "냉장면",
+        "건면",
+    ],
+    "Lunch Box": [
+        "도시락",
+        "덮밥류",
+    ],
+    "Salad": [
+        "샐러드",
+    ],
+    "Kimbab": [
+        "삼각김밥",
+        "주먹밥",
+    ],
+    "Sandwich": [
+        "샌드위치",
+        "햄버거",
+    ],
+    "Bread": [
+        "빵",
+        "즉석빵",
+        "베이커리",
+    ],
+    "Food": [
+        "간편식사",
+        "건강기능식품",
+        "의약건강기능",
+        "즉석식",
+        "가공식사",
+        "냉장분식류",
+        "마른안주류",
+        "안주류",
+        "간편식",
+        "냉장안주",
+        "과일",
+        "식재료",
+        "육가공류",
+        "냉동간편식",
+        "햄",
+        "소시지",
+        "수프류",
+        "스프류",
+        "가공란",
+        "마른안주",
+        "수산안주",
+        "국",
+        "탕",
+        "찌개",
+        "농산안주",
+        "죽",
+        "수산안주류",
+        "냉동만두",
+        "조미소스",
+        "조미료류",
+        "냉동즉석식",
+        "즉석밥류",
+        "핫바",
+        "찌개류",
+        "분말커피",
+        "햄소시지",
+        "안주",
+        "축산안주",
+        "가공식품",
+        "반찬류",
+        "김치류",
+        "대용식",
+        "치즈",
+        "육포",
+        "즉석밥",
+        "국밥류",
+        "야채",
+        "밑반찬",
+        "소스류",
+        "두부",
+        "덮밥",
+        "생란",
+        "달걀",
+        "계란",
+        "분식류",
+        "국밥",
+        "김치",
+        "김",
+        "통조림",
+        "과일통조림",
+        "국탕찌개",
+        "즉석요리류",
+        "식사대용",
+        "식용유",
+        "얼음",
+        "HEYROO",
+        "육가공",
+        "편육",
+        "즉석요리",
+        "냉동밥",
+        "유가공품류",
+        "반숙란",
+        "채소",
+        "유부",
+        "핫바류",
+        "조미료",
+        "가루류",
+        "냉장분식",
+        "농산식재료",
+        "냉동식품",
+        "기타대용식",
+        "가공식",
+        "치즈 및 유가공품류",
+        "사료",
+        "반려동물용품",
+        "맛살",
+        "오뎅",
+        "양곡",
+        "맛남의광장",
+        "과일. 식재료",
+        "어묵",
+        "유제품",
+    ],
+    "Household Goods": [
+        "문구류",
+        "생활잡화",
+        "샴푸린스",
+        "신변잡화",
+        "패션의류",
+        "의류용품",
+        "목욕세면",
+        "여행용세트",
+    ],
+}
+
+CATEGORY_NAME_MAP = {
+    "Drink": [
+        "콤푸차",
+        "음료",
+        "드링크",
+        "워터",
+        "ml",
+        "l",
+        "아메리카노",
+        "라떼",
+        "우유",
+    ],
+    "Alcohol": [
+        "술",
+        "맥주",
+        "라거",
+        "비어",
+        "소주",
+    ],
+    "Snack": [
+        "쿠키",
+        "약과",
+        "칩",
+        "과자",
+        "스낵",
+        "젤리",
+        "스틱",
+        "초코콘",
+        "딸기별",
+        "오감자",
+        "푸딩",
+        "초코렛타",
+        "나쵸",
+        "꾸이깡",
+        "프레첼",
+        "팝콘",
+        "초코볼",
+        "누네띠네",
+        "자일리톨",
+        "새콤달콤",
+    ],
+    "Ice Cream": [
+        "수박바",
+        "폴라포",
+        "파르페",
+        "쿨샷스포츠",
+        "빵빠레",
+        "스크류바",
+        "옥동자",
+        "와일드바디",
+        "왕수박바",
+        "죠스바",
+        "돼지바",
+    ],
+    "Noodle": [
+        "라면",
+        "스파게티",
+        "파스타",
+        "소바",
+        "막국수",
+        "국수",
+        "짬뽕",
+        "당면",
+    ],
+    "Lunch Box": [
+        "도시락",
+        "비빔밥",
+        "볶음밥",
+        "덮밥",
+    ],
+    "Salad": [
+        "샐러드",
+        "셀러드",
+    ],
+    "Kimbab": [
+        "삼각",
+        "삼각김밥",
+        "김밥",
+        "주먹밥",
+    ],
+    "Sandwich": [
+        "버거",
+        "샌드",
+        "샌드위치",
+        "더블빅불고기",
+        "머핀",
+    ],
+    "Bread": [
+        "베이글",
+        "티라미수",
+        "케익",
+        "바닐라슈",
+        "모찌롤",
+        "휘낭시에",
+        "타르트",
+        "빵",
+        "까눌레",
+        "도넛",
+        "파이",
+    ],
+    "Household Goods": [
+        "바디워시",
+        "핑크솔트",
+        "스타킹",
+        "테이프",
+        "복사지",
+        "노트",
+        "밴드",
+        "멀티탭",
+        "슬리퍼",
+        "우의",
+        "종이컵",
+        "스타킹",
+        "장갑",
+        "이력서",
+        "수세미",
+        "호일",
+        "샤워볼",
+        "접착제",
+        "컷터칼",
+        "면도기",
+        "비누",
+        "컵",
+        "휴지",
+        "양말",
+        "팬티",
+        "셔츠",
+        "제트스트림",
+        "네일",
+        "메디폼",
+        "이어폰",
+        "케이블",
+        "화장솜",
+        "팬츠",
+        "풋커버",
+        "유성매직",
+        "네임펜",
+        "이쑤시개",
+        "크린",
+        "지퍼",
+        "젓가락",
+        "행주",
+        "삭스",
+        "칼",
+        "가위",
+        "돗자리",
+        "매트",
+        "티슈",
+        "봉투",
+        "잘풀리는집",
+        "생리대",
+        "좋은느낌",
+        "컨디셔너",
+        "삼푸",
+        "가글",
+        "페브리즈",
+        "다우니",
+        "피죤",
+        "치약",
+        "칫솔",
+        "순면",
+        "표백",
+        "여행",
+        "바디워시",
+    ],
+}
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick 오토마타
+    이름 한 번 순회로 포함된 모든 keyword 의 index 를 찾는다.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        self.__goto: List[dict] = [{}]
+        self.__fail: List[int] = [0]
+        self.__output: List[List[int]] = [[]]
+        for idx, keyword in enumerate(keywords):
+            self.__insert(idx, keyword)
+        self.__build()
+
+    def __insert(self, idx: int, keyword: str):
+        state = 0
+        for char in keyword:
+            if char not in self.__goto[state]:
+                self.__goto.append({})
+                self.__fail.append(0)
+                self.__output.append([])
+                self.__goto[state][char] = len(self.__goto) - 1
+            state = self.__goto[state][char]
+        self.__output[state].append(idx)
+
+    def __build(self):
+        queue = deque(self.__goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.__goto[state].items():
+                queue.append(child)
+                fail = self.__fail[state]
+                while fail and char not in self.__goto[fail]:
+                    fail = self.__fail[fail]
+                self.__fail[child] = self.__goto[fail].get(char, 0)
+                self.__output[child] = self.__output[child] + self.__output[self.__fail[child]]
+
+    def search(self, text: str) -> set:
+        goto, fail, output = self.__goto, self.__fail, self.__output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class CategoryClassifier:
+    """
+    tag, name 으로 카테고리를 찾는 분류기
+    Processor 실행마다 한 번만 생성해 전체 컬럼에 적용한다.
+    """
+
+    def __init__(
+        self,
+        tag_map: Mapping[str, Sequence[str]] = None,
+        name_map: Mapping[str, Sequence[str]] = None,
+    ):
+        converter = CategoryConverter()
+        tag_map = CATEGORY_TAG_MAP if tag_map is None else tag_map
+        name_map = CATEGORY_NAME_MAP if name_map is None else name_map
+
+        # tag -> [category id, ..] (카테고리 순서 유지)
+        self.__tag_index = {}
+        for category, tags in tag_map.items():
+            for tag in dict.fromkeys(tags):
+                self.__tag_index.setdefault(tag, []).append(converter.convert_to_id(category))
+
+        # keyword index 순서 = (카테고리 순서, keyword 순서)
+        keywords = [(category, keyword) for category, keywords in name_map.items() for keyword in keywords]
+        self.__keyword_ids = [converter.convert_to_id(category) for category, _ in keywords]
+        literals = [(idx, keyword) for idx, (_, keyword) in enumerate(keywords) if re.escape(keyword) == keyword]
+        self.__literal_ids = [idx for idx, _ in literals]
+        self.__automaton = KeywordAutomaton([keyword for _, keyword in literals])
+        # 정규식 문법이 섞인 keyword 는 개별 패턴으로 검사한다.
+        self.__patterns = [
+            (idx, re.compile(keyword)) for idx, (_, keyword) in enumerate(keywords) if re.escape(keyword) != keyword
+        ]
+
+    def classify(
+        self,
+        categories: Iterable[Any],
+        tags: Iterable[Sequence[str]],
+        names: Iterable[str],
+    ) -> List[Optional[int]]:
+        """
+        1. tag 로 카테고리 찾기
+        2. name 로 카테고리 찾기
+        3. 카테고리가 없다면 -> None
+        4. 카테고리가 있다면 가장 많이 걸린 카테고리(동률이면 먼저 걸린 카테고리)
+        """
+        return [self.classify_one(*row) for row in zip(categories, tags, names)]
+
+    def classify_one(self, category: Any, tags: Sequence[str], name: str) -> Optional[int]:
+        votes = [_id for tag in tags for _id in self.__tag_index.get(tag, ())]
+        matched = {self.__literal_ids[idx] for idx in self.__automaton.search(name)}
+        matched.update(idx for idx, pattern in self.__patterns if pattern.search(name))
+        votes.extend(self.__keyword_ids[idx] for idx in sorted(matched))
+        votes.append(category)
+        if votes := Counter(filter(pd.notna, votes)):
+            return votes.most_common(1)[0][0]
+        else:
+            return None
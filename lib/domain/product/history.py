@@ -0,0 +1,108 @@
+from datetime import date as Date, datetime, timedelta
+from typing import Any, List, Mapping, Optional, Sequence
+
+from pandas import DataFrame, Series
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class HistoryStore:
+    """
+    상품 가격 history 저장소
+    - 변경 시점만 저장한다: brand 별 가격/통화/할인가/이벤트가 직전 entry 와 같으면 entry 를 추가하지 않는다.
+    - retention_days 가 있으면 기준일 이전 entry 는 기준일 상태를 담은 anchor entry 하나로 압축한다.
+    - 날짜별 전체 series 는 expand 로 다시 만든다.
+    """
+
+    def __init__(self, retention_days: Optional[int] = None):
+        if retention_days is not None and retention_days < 0:
+            raise ValueError(f"retention_days({retention_days}) should be >= 0")
+        self.__retention_days = retention_days
+
+    def append(self, histories: Series, brands: Series, date: datetime) -> Series:
+        """
+        :param histories: 상품별 이전 history 리스트(없으면 NaN)
+        :param brands: 상품별 이전 brands 리스트(이전 데이터가 없으면 NaN)
+        :param date: 실행 날짜
+        :return: 상품별 history 리스트(index 유지)
+        @desc
+        모든 상품의 history entry 를 (상품, 날짜, 상태 key) 평탄화 표로 만든 뒤 한 번에
+        같은 날짜 중복 제거(마지막 entry 유지) -> 직전과 같은 상태 제거 -> retention 압축 을 적용한다.
+        """
+        today = date.strftime(DATE_FORMAT)
+        rows, dates, entries = [], [], []
+        for row, (history, brand) in enumerate(zip(histories, brands)):
+            if isinstance(history, list):
+                for entry in history:
+                    rows.append(row)
+                    dates.append(str(entry["date"]))
+                    entries.append(entry["brands"])
+            if isinstance(brand, list):
+                rows.append(row)
+                dates.append(today)
+                entries.append(brand)
+
+        result = [[] for _ in range(len(histories))]
+        if rows:
+            flat = DataFrame(
+                {"row": rows, "date": dates, "key": [self.key(x) for x in entries], "entry": range(len(rows))}
+            )
+            flat = flat.sort_values(["row", "date"], kind="stable")
+            flat = flat[~flat.duplicated(["row", "date"], keep="last")]
+            same_row = flat["row"].eq(flat["row"].shift())
+            flat = flat[~(same_row & flat["key"].eq(flat["key"].shift()))]
+            if self.__retention_days is not None:
+                flat = self.__compact(flat, date)
+            for row, entry_date, entry in zip(flat["row"].tolist(), flat["date"].tolist(), flat["entry"].tolist()):
+                result[row].append({"date": entry_date, "brands": entries[entry]})
+        return Series(result, index=histories.index, dtype=object)
+
+    def __compact(self, flat: DataFrame, date: datetime) -> DataFrame:
+        # 기준일 이전 entry 중 상품별 마지막 entry 만 기준일 날짜의 anchor 로 남긴다(기준일 entry 가 있으면 제거).
+        cutoff = (date - timedelta(days=self.__retention_days)).strftime(DATE_FORMAT)
+        old = flat["date"].lt(cutoff)
+        next_same_row = flat["row"].eq(flat["row"].shift(-1))
+        next_not_after_cutoff = flat["date"].shift(-1).le(cutoff)
+        anchor = old & ~(next_same_row & next_not_after_cutoff)
+        return flat.assign(date=flat["date"].mask(anchor, cutoff))[~old | anchor]
+
+    @staticmethod
+    def key(brands: Sequence[Mapping[str, Any]]) -> str:
+        """
+        :return: brand 순서와 무관한 가격/이벤트 상태 key
+        """
+        return repr(
+            sorted(
+                (
+                    brand["id"],
+                    brand["price"]["value"],
+                    brand["price"]["currency"],
+                    brand["price"]["discounted_value"],
+                    sorted(brand["events"]),
+                )
+                for brand in brands
+            )
+        )
+
+    @staticmethod
+    def expand(histories: Sequence[Mapping[str, Any]], until: Date = None) -> List[dict]:
+        """
+        변경 시점 history 를 날짜별 history 로 복원한다.
+        :param histories: append 결과 history 리스트
+        :param until: 마지막 날짜(기본: 마지막 entry 날짜)
+        :return: [{date: yyyy-MM-dd, brands: [..]}, ..] 첫 entry 날짜부터 하루 단위
+        """
+        if not histories:
+            return []
+        entries = sorted(histories, key=lambda x: str(x["date"]))
+        day = datetime.strptime(str(entries[0]["date"]), DATE_FORMAT).date()
+        last = datetime.strptime(str(entries[-1]["date"]), DATE_FORMAT).date()
+        if until is not None:
+            last = until.date() if isinstance(until, datetime) else until
+        result, idx = [], 0
+        while day <= last:
+            while idx + 1 < len(entries) and str(entries[idx + 1]["date"]) <= day.strftime(DATE_FORMAT):
+                idx += 1
+            result.append({"date": day.strftime(DATE_FORMAT), "brands": entries[idx]["brands"]})
+            day += timedelta(days=1)
+        return result
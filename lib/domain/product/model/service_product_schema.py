@@ -43,3 +43,4 @@ class ServiceProductSchema(Schema):
     price = fields.Float(required=True)  # 기본 가격
     best = fields.Nested(ServiceProductBestSchema, required=True)
     histories = fields.Nested(ServiceProductHistorySchema, required=False, many=True)
+    fingerprint = fields.String(required=False, allow_none=True)  # crawled data fingerprint
@@ -0,0 +1,86 @@
+import re
+from collections import OrderedDict
+from typing import Dict, Mapping
+
+import pandas as pd
+from pandas import Series
+
+
+class NameNormalizer:
+    """
+    상품 이름 정제기
+    - 정규식은 미리 컴파일하고, 처음 보는 이름만 pandas .str 연산으로 한 번에 정제한다.
+    - 정제 결과는 원본 이름 기준 LRU memo(최대 maxsize 개)에 보관한다.
+      memo 는 snapshot 옆에 저장해 다음 실행에서 다시 쓴다(이름 대부분은 전날과 같다).
+    """
+
+    # 정제 규칙이 바뀌면 올린다(저장된 memo 를 쓰지 않는다).
+    VERSION = "1"
+
+    OPEN_BRACKET = re.compile(r"\[|\{")
+    CLOSE_BRACKET = re.compile(r"\]|\}")
+    UNIT = re.compile(r"(\d+(\.\d)?\d*)\s*(ml|l|kg|g|mm|p|t|입)")
+    EMPTY_BRACKET = re.compile(r"(\(\s*\)|\s*\}|\s*\])")
+    UNCLOSED_BRACKET = re.compile(r"\(\)|^\)")
+    SPACES = re.compile(r"\s+")
+
+    def __init__(self, maxsize: int = 2**17):
+        self.__maxsize = maxsize
+        self.__cache: OrderedDict = OrderedDict()
+
+    def normalize(self, names: Series) -> Series:
+        """
+        :param names: 원본 이름 컬럼
+        :return: 정제된 이름 컬럼(index 유지)
+        """
+        codes, uniques = pd.factorize(names)
+        normalized = {}
+        for name in uniques:
+            if name in self.__cache:
+                self.__cache.move_to_end(name)
+                normalized[name] = self.__cache[name]
+        if missing := [name for name in uniques if name not in normalized]:
+            normalized.update(zip(missing, self.__normalize(Series(missing, dtype=object))))
+            self.__store(missing, normalized)
+        normalized = [normalized[name] for name in uniques]
+        return Series([normalized[code] for code in codes], index=names.index, dtype=object)
+
+    def memo(self) -> Dict[str, str]:
+        """
+        :return: {원본 이름: 정제된 이름}(오래 쓰지 않은 순)
+        """
+        return dict(self.__cache)
+
+    def update(self, memo: Mapping[str, str]):
+        """
+        :param memo: 저장해 둔 memo(오래 쓰지 않은 순), maxsize 를 넘으면 앞에서부터 버린다.
+        """
+        self.__store(list(memo), memo)
+
+    def __normalize(self, names: Series) -> Series:
+        names = names.str.strip().str.lower()
+        names = names.str.replace(self.OPEN_BRACKET, "(", regex=True)
+        names = names.str.replace(self.CLOSE_BRACKET, ")", regex=True)
+        names = names.map(self.__normalize_unit)
+        names = names.str.replace(self.SPACES, " ", regex=True).str.strip()
+        # dm -> 덴마크로 변환
+        names = names.str.replace("dm)", "덴마크)", regex=False)
+        return names
+
+    def __normalize_unit(self, x: str) -> str:
+        # 용량/개수는 이름 끝의 (digit metric) 으로 옮긴다.
+        if t := self.UNIT.search(x):
+            digit = float(t.group(1))
+            metric = t.group(3)
+            x = self.UNIT.sub("", x)
+            x = self.EMPTY_BRACKET.sub("", x)
+            # remove unclosed & empty parenthesis
+            x = self.UNCLOSED_BRACKET.sub("", x)
+            x = f"{x}({digit}{metric})"
+        return x
+
+    def __store(self, names, normalized: Mapping[str, str]):
+        for name in names:
+            self.__cache[name] = normalized[name]
+        while len(self.__cache) > self.__maxsize:
+            self.__cache.popitem(last=False)
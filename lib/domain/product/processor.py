@@ -1,71 +1,261 @@
+import hashlib
+import json
+import logging
 import os
-import re
+import zlib
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from functools import reduce
 from itertools import chain
-from typing import Any, List, Mapping, Optional, Sequence
+from multiprocessing import get_context
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 from urllib.parse import urlparse
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from pandas import DataFrame, Series
 
-from lib.converter.category_converter import CategoryConverter
 from lib.db.factory import RepositoryFactory
+from lib.dependency_injector.injector import MainInjector
+from lib.domain.product.classifier import CategoryClassifier
+from lib.domain.product.history import HistoryStore
 from lib.domain.product.model.crawled_product_schema import CrawledProductSchema
 from lib.domain.product.model.service_product_schema import ServiceProductSchema
+from lib.domain.product.normalizer import NameNormalizer
 from lib.downloader.downloader import Downloader
+from lib.downloader.snapshot_store import SnapshotStore
+from lib.instrumentation.recorder import Recorder
 from lib.interface.processor_ifs import ProcessorIfs
 from lib.interface.repository_ifs import RepositoryIfs
+from lib.model.records import FrameRecords
+from lib.model.validator import ValidatorFactory
 
 
 class ProductProcessor(ProcessorIfs):
-    def __init__(self, *args, **kwargs):
+    # TODO : Default Image는 제거
+    DEFAULT_IMAGES = frozenset(
+        {
+            "products/be780835fd93417525fe2304be3b8c917902348d.webp",  # seven eleven
+        }
+    )
+
+    # 이전 서비스 데이터(Backup, snapshot)에서 사용하는 컬럼
+    PREVIOUS_COLUMNS = [
+        "crawled_infos",
+        "name",
+        "brands",
+        "histories",
+        "image",
+        "category",
+        "description",
+        "price",
+        "best",
+        "recommendation",
+        "fingerprint",
+    ]
+
+    # __append_histories 에서 사용하는 이전 서비스 데이터 컬럼
+    HISTORY_COLUMNS = ["crawled_infos", "name", "brands", "histories", "image", "category"]
+
+    # 처리 로직이 바뀌어 이전 결과를 재사용하면 안 될 때 올린다.
+    FINGERPRINT_VERSION = "1"
+
+    def __init__(self, *args, incremental: bool = False, workers: int = 1, isolated: bool = False, **kwargs):
+        """
+        :param incremental: True 면 crawled data 가 바뀌지 않은 이름 그룹은 이전 Backup 결과를 재사용한다.
+        :param workers: 2 이상이면 정제된 이름의 hash 로 나눈 partition 을 worker process 에서 처리한다.
+        :param isolated: True 면 workers 가 1 이어도 정제를 worker process 에서 처리한다(다른 domain 과 동시에 돌 때).
+        """
         super().__init__("products")
         self.__repository: RepositoryIfs = RepositoryFactory.get_instance(
             _type="mongo", db_name=os.getenv("MONGO_CRAWLING_DB")
         )
+        self.__batch_size = int(os.getenv("MONGO_BATCH_SIZE", 5000))
+        self.__classifier = CategoryClassifier()
+        self.__normalizer = NameNormalizer(maxsize=int(os.getenv("NAME_MEMO_SIZE", 2**17)))
+        retention_days = os.getenv("PRODUCT_HISTORY_RETENTION_DAYS")
+        self.__histories = HistoryStore(retention_days=int(retention_days) if retention_days else None)
+        self.__image_domain = os.getenv("IMAGE_DOMAIN")
+        self.__incremental = incremental
+        self.__workers = max(1, workers)
+        self.__isolated = isolated
+        self.__snapshots = SnapshotStore()
+        # 이전 실행의 이름 정제 결과(snapshot 옆에 저장된 memo)
+        self.__normalizer.update(self.__snapshots.read_memo(rel_name=self._name, version=NameNormalizer.VERSION))
+        # snapshot 저장용: 이전 서비스 데이터 전체, 이번 결과
+        self.__previous: Optional[pa.Table | DataFrame] = None
+        self.__result: Optional[DataFrame] = None
+
+    def __getstate__(self):
+        # worker process 에는 DB 연결을 넘기지 않는다.
+        state = self.__dict__.copy()
+        state.pop("_ProductProcessor__repository", None)
+        state.pop("_ProductProcessor__previous", None)
+        return state
 
     def _preprocess(self, date: datetime, *args, **kwargs) -> DataFrame:
-        data = self.__repository.find(
+        # batch 단위로 읽으면서 검증하고 DataFrame chunk 로 바꾼 뒤, 마지막에 한 번만 합친다.
+        validator = ValidatorFactory.get_instance(CrawledProductSchema)
+        chunks, errors = [], 0
+        for batch in self.__repository.find_batches(
             rel_name=self._name,
             project={"_id": False, "created_at": False, "updated_at": False},
-        )
-        errors = CrawledProductSchema().validate(data, many=True)
+            batch_size=self.__batch_size,
+        ):
+            errors += len(validator.validate(batch))
+            chunks.append(DataFrame(batch, dtype=object))
         if errors:
-            self.logger.error(f"Crawling Product Schema Validation Error: {len(errors)}")
-            raise RuntimeError(f"Crawling Product Schema Validation Error: {len(errors)}")
+            self.logger.error(f"Crawling Product Schema Validation Error: {errors}")
+            raise RuntimeError(f"Crawling Product Schema Validation Error: {errors}")
+        # dtype 은 전체 chunk 를 합친 뒤 한 번에 추론한다.
+        data = pd.concat(chunks, ignore_index=True).infer_objects() if chunks else DataFrame()
         self.logger.info(f"Initial data: {len(data)}")
-        return DataFrame(data)
+        return data
 
     def _process(self, data: DataFrame, date: datetime, *args, **kwargs) -> DataFrame:
+        # 0. 이전 데이터 & fingerprint
+        self.logger.info("Process: load previous data")
+        # 정제된 이름은 fingerprint 와 바뀌지 않은 그룹 찾기에 같이 쓴다.
+        names = self.__normalizer.normalize(data["name"])
+        fingerprints = self.__fingerprint(data, names)
+        previous = self._stage("process.previous", lambda: self.__load_previous(date, names=fingerprints.index))
+        data = self._stage("process.transform", lambda: self.__transform_changed(data, names, fingerprints, previous))
+        data["fingerprint"] = data["name"].map(fingerprints)
+
+        # 4. hostory 추가
+        self.logger.info("Process append histories")
+        data = self._measure("process.histories", lambda: self.__append_histories(data, previous, date), rows_in=data)
+
+        return data
+
+    def __transform_changed(
+        self, data: DataFrame, names: Series, fingerprints: Series, previous: Optional[DataFrame]
+    ) -> DataFrame:
+        """
+        incremental 이면 바뀌지 않은 이름 그룹은 이전 결과를 쓰고, 나머지만 정제한다.
+        """
+        reused = None
+        if self.__incremental and previous is not None:
+            self.logger.info("Process: find unchanged products")
+            data, reused = self.__split_unchanged(data, names, fingerprints, previous)
+
+        if reused is None:
+            return self.__transform_partitions(data, names)
+        if data.empty:
+            return reused
+        data = pd.concat([self.__transform_partitions(data, names), reused], ignore_index=True)
+        data.sort_values("name", kind="stable", ignore_index=True, inplace=True)
+        return data
+
+    def __transform_partitions(self, data: DataFrame, names: Series) -> DataFrame:
+        """
+        정제된 이름의 hash 로 partition 을 나눠 worker process 에서 _transform 을 실행한다.
+        병합은 이름 단위라 partition 끼리 독립적이고, 결과는 이름 순으로 합쳐 serial 실행과 같다.
+        :param names: _process 에서 정제한 이름(data 의 index 를 포함한다)
+        """
+        if (self.__workers == 1 and not self.__isolated) or len(data) < 2:
+            return self._transform(data)
+        # 원본 이름은 카테고리 분류에 쓰이므로 이미 정제한 이름을 partition key 로만 쓴다.
+        keys = names.loc[data.index]
+        partitions = keys.map(lambda x: zlib.crc32(x.encode()) % self.__workers).to_numpy()
+        parts = [data[partitions == idx] for idx in range(self.__workers)]
+        parts = [part for part in parts if not part.empty]
+        self.logger.info(f"Process: transform {len(parts)} partitions with {self.__workers} workers")
+        # 다른 pipeline thread 가 잡고 있는 lock(boto3 connection pool, logging 등)을 물려받지 않도록 spawn 으로 띄운다.
+        with ProcessPoolExecutor(
+            max_workers=len(parts),
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self, Recorder.enabled(), logging.getLogger().getEffectiveLevel()),
+        ) as executor:
+            results = list(executor.map(_transform_partition, parts))
+        # worker 에서 잰 단계(process.filter 등)는 partition 별로 이 process 의 Recorder 에 다시 남긴다.
+        for idx, (_, records) in enumerate(results):
+            Recorder.merge(records, partition=idx)
+        data = pd.concat([result for result, _ in results], ignore_index=True)
+        data.sort_values("name", kind="stable", ignore_index=True, inplace=True)
+        return data
+
+    def _transform(self, data: DataFrame) -> DataFrame:
+        """
+        이름 그룹 단위로 독립적인 처리 단계
+        """
         # 1. 데이터 필터
         self.logger.info("Process: filter data")
-        data = self.__filter(data)
+        data = self._measure("process.filter", lambda: self.__filter(data), rows_in=data)
 
         # 2. 카테고리 찾기
         self.logger.info("Process: find categories")
-        data = self.__fill(data)
+        data = self._measure("process.fill", lambda: self.__fill(data), rows_in=data)
 
         # 1. 데이터 정제
         self.logger.info("Process: normalize data")
-        data = self.__normalize(data)
+        data = self._measure("process.normalize", lambda: self.__normalize(data), rows_in=data)
 
         # 2. 이름 기준으로 병합
         self.logger.info("Process: merge data")
-        data = self.__merge(data)
+        data = self._measure("process.merge", lambda: self.__merge(data), rows_in=data)
 
         # 3. 병합 후 데이터 정제
         self.logger.info("Process: postmerge data")
-        data = self.__post_merge(data)
-
-        # 4. hostory 추가
-        self.logger.info("Process append histories")
-        data = self.__append_histories(data, date)
-
+        data = self._measure("process.post_merge", lambda: self.__post_merge(data), rows_in=data)
         return data
 
+    def __fingerprint(self, data: DataFrame, names: Series) -> Series:
+        """
+        :param names: data 의 정제된 이름
+        :return: 정제된 이름별 fingerprint
+        @desc
+        crawled document 마다 CrawledProductSchema 필드를 hash 하고,
+        같은 이름 그룹의 document hash 를 원래 순서대로 이어 다시 hash 한다.
+        멤버가 추가/삭제/변경되면 그룹 fingerprint 가 바뀐다.
+        """
+        fields = sorted(CrawledProductSchema().fields)
+        documents = Series(
+            [
+                hashlib.md5(json.dumps(row, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+                for row in zip(*(data[field] for field in fields))
+            ],
+            index=data.index,
+            dtype=object,
+        )
+        # 처리 로직/이미지 도메인이 바뀌면 이전 결과를 재사용하지 않는다.
+        salt = f"{self.FINGERPRINT_VERSION}:{self.__image_domain}"
+        groups = documents.groupby(names.to_numpy(), sort=False).agg("".join)
+        return groups.map(lambda x: hashlib.md5((salt + x).encode()).hexdigest())
+
+    def __split_unchanged(
+        self, data: DataFrame, names: Series, fingerprints: Series, previous: DataFrame
+    ) -> Tuple[DataFrame, Optional[DataFrame]]:
+        """
+        :param names: data 의 정제된 이름
+        :return: (다시 처리할 crawled data, 이전 결과를 그대로 쓰는 병합 데이터)
+        """
+        previous = previous[previous["name"].map(fingerprints).eq(previous["fingerprint"])]
+        if previous.empty:
+            return data, None
+        changed = data[~names.isin(set(previous["name"]))].copy()
+        # __post_merge 결과와 같은 형태로 맞춘다.
+        reused = DataFrame(
+            {
+                "name": previous["name"],
+                "crawled_info": previous["crawled_infos"],
+                "description": previous["description"],
+                "events": [[]] * len(previous),
+                "image": previous["image"],
+                "price": previous["price"],
+                "category": previous["category"],
+                "brands": previous["brands"],
+                "recommendation": previous["recommendation"],
+                "best": previous["best"],
+            }
+        ).reset_index(drop=True)
+        self.logger.info(f"Unchanged products: {len(reused)}, Changed crawled data: {len(changed)}")
+        return changed, reused
+
     def __filter(self, data: DataFrame, *args, **kwargs) -> DataFrame:
         # SALE - discounted_price 정제(discounted value 가 없으면 sale event 제거)
         data["events"] = data[["price", "events"]].apply(
@@ -80,424 +270,47 @@ class ProductProcessor(ProcessorIfs):
         return data
 
     def __fill(self, data: DataFrame, *args, **kwargs) -> DataFrame:
-        data["category"] = data[["category", "tags", "name"]].apply(self.__fill_category, axis=1)
-        return data
-
-    def __fill_category(self, row: Series) -> Optional[int]:
         """
         1. tag 로 카테고리 찾기
         2. name 로 카테고리 찾기
-        3. 카테고리가 없다면 -> Food(Default)
-        4. 카테고리가 있다면
-            1. household 카테고리가 하나라도 걸리면 houshold
-            2. food 와 다른 카테고리가 겹치면 해당 카테고리
-            3. food 이외의 다른 카테고리 두 개 이상 겹치면 로그 띄우고, 첫번째 카테고리로 매칭
+        3. 카테고리가 없다면 -> None
+        4. 카테고리가 있다면 가장 많이 걸린 카테고리
         """
-        converter = CategoryConverter()
-        category_tag_map = {
-            "Drink": [
-                "냉장커피",
-                "커피음료",
-                "가공유",
-                "음료",
-                "에너지음료",
-                "원컵류",
-                "커피차류",
-                "분말커피류",
-                "커피차",
-                "차류",
-                "디카페인",
-                "원컵",
-            ],
-            "Alcohol": [],
-            "Snack": [
-                "냉장디저트",
-                "디저트",
-                "스낵",
-                "과자류",
-                "토이캔디",
-                "상온디저트",
-                "기능성캔디",
-                "비스켓",
-                "쿠키",
-                "캔디",
-                "간식",
-            ],
-            "Ice Cream": [
-                "아이스크림",
-            ],
-            "Noodle": [
-                "조리면",
-                "용기면",
-                "봉지면",
-                "면류",
-                "냉장면",
-                "건면",
-            ],
-            "Lunch Box": [
-                "도시락",
-                "덮밥류",
-            ],
-            "Salad": [
-                "샐러드",
-            ],
-            "Kimbab": [
-                "삼각김밥",
-                "주먹밥",
-            ],
-            "Sandwich": [
-                "샌드위치",
-                "햄버거",
-            ],
-            "Bread": [
-                "빵",
-                "즉석빵",
-                "베이커리",
-            ],
-            "Food": [
-                "간편식사",
-                "건강기능식품",
-                "의약건강기능",
-                "즉석식",
-                "가공식사",
-                "냉장분식류",
-                "마른안주류",
-                "안주류",
-                "간편식",
-                "냉장안주",
-                "과일",
-                "식재료",
-                "육가공류",
-                "냉동간편식",
-                "햄",
-                "소시지",
-                "수프류",
-                "스프류",
-                "가공란",
-                "마른안주",
-                "수산안주",
-                "국",
-                "탕",
-                "찌개",
-                "농산안주",
-                "죽",
-                "수산안주류",
-                "냉동만두",
-                "조미소스",
-                "조미료류",
-                "냉동즉석식",
-                "즉석밥류",
-                "핫바",
-                "찌개류",
-                "분말커피",
-                "햄소시지",
-                "안주",
-                "축산안주",
-                "가공식품",
-                "반찬류",
-                "김치류",
-                "대용식",
-                "치즈",
-                "육포",
-                "즉석밥",
-                "국밥류",
-                "야채",
-                "밑반찬",
-                "소스류",
-                "두부",
-                "덮밥",
-                "생란",
-                "달걀",
-                "계란",
-                "분식류",
-                "국밥",
-                "김치",
-                "김",
-                "통조림",
-                "과일통조림",
-                "국탕찌개",
-                "즉석요리류",
-                "식사대용",
-                "식용유",
-                "얼음",
-                "HEYROO",
-                "육가공",
-                "편육",
-                "즉석요리",
-                "냉동밥",
-                "유가공품류",
-                "반숙란",
-                "채소",
-                "유부",
-                "핫바류",
-                "조미료",
-                "가루류",
-                "냉장분식",
-                "농산식재료",
-                "냉동식품",
-                "기타대용식",
-                "가공식",
-                "치즈 및 유가공품류",
-                "사료",
-                "반려동물용품",
-                "맛살",
-                "오뎅",
-                "양곡",
-                "맛남의광장",
-                "과일. 식재료",
-                "어묵",
-                "유제품",
-            ],
-            "Household Goods": [
-                "문구류",
-                "생활잡화",
-                "샴푸린스",
-                "신변잡화",
-                "패션의류",
-                "의류용품",
-                "목욕세면",
-                "여행용세트",
-            ],
-        }
-        category_name_map = {
-            "Drink": [
-                "콤푸차",
-                "음료",
-                "드링크",
-                "워터",
-                "ml",
-                "l",
-                "아메리카노",
-                "라떼",
-                "우유",
-            ],
-            "Alcohol": [
-                "술",
-                "맥주",
-                "라거",
-                "비어",
-                "소주",
-            ],
-            "Snack": [
-                "쿠키",
-                "약과",
-                "칩",
-                "과자",
-                "스낵",
-                "젤리",
-                "스틱",
-                "초코콘",
-                "딸기별",
-                "오감자",
-                "푸딩",
-                "초코렛타",
-                "나쵸",
-                "꾸이깡",
-                "프레첼",
-                "팝콘",
-                "초코볼",
-                "누네띠네",
-                "자일리톨",
-                "새콤달콤",
-            ],
-            "Ice Cream": [
-                "수박바",
-                "폴라포",
-                "파르페",
-                "쿨샷스포츠",
-                "빵빠레",
-                "스크류바",
-                "옥동자",
-                "와일드바디",
-                "왕수박바",
-                "죠스바",
-                "돼지바",
-            ],
-            "Noodle": [
-                "라면",
-                "스파게티",
-                "파스타",
-                "소바",
-                "막국수",
-                "국수",
-                "짬뽕",
-                "당면",
-            ],
-            "Lunch Box": [
-                "도시락",
-                "비빔밥",
-                "볶음밥",
-                "덮밥",
-            ],
-            "Salad": [
-                "샐러드",
-                "셀러드",
-            ],
-            "Kimbab": [
-                "삼각",
-                "삼각김밥",
-                "김밥",
-                "주먹밥",
-            ],
-            "Sandwich": [
-                "버거",
-                "샌드",
-                "샌드위치",
-                "더블빅불고기",
-                "머핀",
-            ],
-            "Bread": [
-                "베이글",
-                "티라미수",
-                "케익",
-                "바닐라슈",
-                "모찌롤",
-                "휘낭시에",
-                "타르트",
-                "빵",
-                "까눌레",
-                "도넛",
-                "파이",
-            ],
-            "Household Goods": [
-                "바디워시",
-                "핑크솔트",
-                "스타킹",
-                "테이프",
-                "복사지",
-                "노트",
-                "밴드",
-                "멀티탭",
-                "슬리퍼",
-                "우의",
-                "종이컵",
-                "스타킹",
-                "장갑",
-                "이력서",
-                "수세미",
-                "호일",
-                "샤워볼",
-                "접착제",
-                "컷터칼",
-                "면도기",
-                "비누",
-                "컵",
-                "휴지",
-                "양말",
-                "팬티",
-                "셔츠",
-                "제트스트림",
-                "네일",
-                "메디폼",
-                "이어폰",
-                "케이블",
-                "화장솜",
-                "팬츠",
-                "풋커버",
-                "유성매직",
-                "네임펜",
-                "이쑤시개",
-                "크린",
-                "지퍼",
-                "젓가락",
-                "행주",
-                "삭스",
-                "칼",
-                "가위",
-                "돗자리",
-                "매트",
-                "티슈",
-                "봉투",
-                "잘풀리는집",
-                "생리대",
-                "좋은느낌",
-                "컨디셔너",
-                "삼푸",
-                "가글",
-                "페브리즈",
-                "다우니",
-                "피죤",
-                "치약",
-                "칫솔",
-                "순면",
-                "표백",
-                "여행",
-                "바디워시",
-            ],
-        }
-        categories = []
-        for tag in row["tags"]:
-            for category, tags in category_tag_map.items():
-                if tag in tags:
-                    categories.append(category)
-
-        for category, names in category_name_map.items():
-            for _pattern in names:
-                if re.search(_pattern, row["name"]):
-                    categories.append(category)
-
-        categories = list(map(converter.convert_to_id, categories))
-        categories.append(row["category"])
-        if categories := Counter(filter(pd.notna, categories)):
-            category = categories.most_common(1)[0][0]
-            return category
-        else:
-            return None
+        data["category"] = Series(
+            self.__classifier.classify(data["category"], data["tags"], data["name"]),
+            index=data.index,
+        )
+        return data
 
     def __normalize(self, data: DataFrame, **kwargs):
         # 이름 정제
-        data["name"] = data["name"].map(self.__normalize_name)
+        data["name"] = self.__normalizer.normalize(data["name"])
         return data
 
-    def __normalize_name(self, x: str):
-        x = x.strip().lower()
-        x = re.sub(r"\[|\{", "(", x)
-        x = re.sub(r"\]|\}", ")", x)
-
-        p = re.compile(r"(\d+(\.\d)?\d*)\s*(ml|l|kg|g|mm|p|t|입)")
-        if t := p.search(x):
-            digit = float(t.group(1))
-            metric = t.group(3)
-            x = p.sub("", x)
-            x = re.sub(r"(\(\s*\)|\s*\}|\s*\])", "", x)
-            # remove unclosed & empty parenthesis
-            x = re.sub(r"\(\)|^\)", "", x)
-            x = f"{x}({digit}{metric})"
-        x = re.sub(r"\s+", " ", x).strip()
-
-        # dm -> 덴마크로 변환
-        x = x.replace("dm)", "덴마크)")
-        return x
-
     def __merge(self, data: DataFrame, **kwargs):
         # Name 기준으로 병합 - nan 값은 무시
-        data = data.groupby("name").agg(
-            {
-                "crawled_info": list,
-                "description": list,
-                "events": "sum",
-                "image": list,
-                "price": list,
-                "category": list,
-            }
-        )
-        for column in data.columns:
-            if column == "name":
-                continue
-            data[column] = data[column].map(
-                lambda x: list(
-                    filter(
-                        lambda y: isinstance(y, list) or isinstance(y, dict) or pd.notna(y),
-                        x,
-                    )
-                )
-            )
-        data.reset_index(inplace=True)
-        return data
+        # 이름 순으로 정렬한 그룹 경계(offset)를 한 번 구하고, 컬럼마다 한 번의 순회로 리스트를 모은다.
+        codes, names = pd.factorize(data["name"], sort=True)
+        order = np.argsort(codes, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(names)))]).tolist()
+        bounds = list(zip(offsets[:-1], offsets[1:]))
+
+        def is_present(y) -> bool:
+            return isinstance(y, list) or isinstance(y, dict) or pd.notna(y)
+
+        merged = {"name": list(names)}
+        for column in ["crawled_info", "description", "events", "image", "price", "category"]:
+            values = data[column].to_numpy(dtype=object)[order].tolist()
+            if column == "events":
+                # 그룹 내 이벤트 리스트는 이어 붙인다.
+                merged[column] = [list(filter(is_present, chain.from_iterable(values[s:e]))) for s, e in bounds]
+            else:
+                merged[column] = [list(filter(is_present, values[s:e])) for s, e in bounds]
+        return DataFrame(merged)
 
     def __post_merge(self, data: DataFrame, **kwargs):
         # 1. image
-        data["image"] = data["image"].map(self.__get_largest_image)
+        data["image"] = self.__get_largest_images(data["image"])
         # 2. description
         data["description"] = data["description"].map(lambda x: x[0] if len(x) > 0 else None)
         # 3. category
@@ -515,33 +328,44 @@ class ProductProcessor(ProcessorIfs):
         data["best"] = data[["price", "brands"]].apply(self.__get_best, axis=1)
         return data
 
-    def __get_largest_image(self, images: List[dict]):
-        # TODO : Default Image는 제거
-        default_images = {
-            "products/be780835fd93417525fe2304be3b8c917902348d.webp",  # seven eleven
-        }
-        thumb_images = [x["thumb"] for x in images if x["thumb"] is not None]
-        thumb_sizes = list(
-            map(
-                lambda x: x["size"]["thumb"]["width"] * x["size"]["thumb"]["height"],
-                filter(lambda y: "thumb" in y["size"], images),
-            )
-        )
-        other_images = reduce(lambda acc, cur: acc + cur["others"], images, [])
-        other_sizes = reduce(
-            lambda acc, cur: acc + list(map(lambda x: x["width"] * x["height"], cur["size"]["others"])),
-            filter(lambda y: "others" in y["size"], images),
-            [],
-        )
-        images = thumb_images + other_images
-        sizes = thumb_sizes + other_sizes
-        tuples = filter(lambda x: "/".join(x[0].split("/")[-2:]) not in default_images, zip(images, sizes))
-        try:
-            max_img = max(tuples, key=lambda x: x[1])[0]
-            max_img = os.getenv("IMAGE_DOMAIN") + "/" + "/".join(urlparse(max_img).path.split("/")[2:])
-            return max_img
-        except ValueError:
-            return None
+    def __get_largest_images(self, images: Series) -> Series:
+        """
+        :param images: 병합된 상품별 crawled image 리스트 컬럼
+        :return: 상품별 가장 큰 이미지 URL(IMAGE_DOMAIN 기준), 없으면 None
+        @desc
+        모든 상품의 thumb/others 후보를 (url, 면적, 상품 index) 평탄화 배열로 만든 뒤,
+        Default Image 를 제거하고 상품별 최대 면적(동률이면 앞선 후보) 이미지를 고른다.
+        """
+        urls, sizes, groups = [], [], []
+        for group, crawled_images in enumerate(images):
+            candidates = [x["thumb"] for x in crawled_images if x["thumb"] is not None]
+            candidate_sizes = [
+                x["size"]["thumb"]["width"] * x["size"]["thumb"]["height"]
+                for x in crawled_images
+                if "thumb" in x["size"]
+            ]
+            for x in crawled_images:
+                candidates.extend(x["others"])
+            for x in crawled_images:
+                if "others" in x["size"]:
+                    candidate_sizes.extend(y["width"] * y["height"] for y in x["size"]["others"])
+            # 이미지와 크기는 순서대로 짝짓는다(짧은 쪽 기준).
+            for url, size in zip(candidates, candidate_sizes):
+                if "/".join(url.split("/")[-2:]) not in self.DEFAULT_IMAGES:
+                    urls.append(url)
+                    sizes.append(size)
+                    groups.append(group)
+
+        result = [None] * len(images)
+        if urls:
+            groups = np.asarray(groups)
+            order = np.lexsort((np.arange(len(groups)), -np.asarray(sizes), groups))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = groups[order][1:] != groups[order][:-1]
+            for idx in order[first].tolist():
+                path = "/".join(urlparse(urls[idx]).path.split("/")[2:])
+                result[groups[idx]] = self.__image_domain + "/" + path
+        return Series(result, index=images.index, dtype=object)
 
     def __collect_by_brand(self, row: Series):
         brands = {}
@@ -629,41 +453,105 @@ class ProductProcessor(ProcessorIfs):
             "events": best_events,
         }
 
-    def __append_histories(self, data: DataFrame, date: datetime) -> DataFrame:
-        downloader = Downloader()
-        previous_data = downloader.download(db_name=os.getenv("MONGO_SERVICE_DB"), rel_name=self._name, date=date)
-        # TODO : 이전 카테고리 가져오기
+    def __load_previous(self, date: datetime, names: Sequence[str]) -> Optional[DataFrame]:
+        """
+        :param names: 이번 실행의 정제된 이름(snapshot 에서는 이 이름의 row 만 꺼낸다)
+        :return: 이전 서비스 데이터(전날 snapshot 또는 Backup), 없으면 None
+        """
+        snapshot = self.__snapshots.read(rel_name=self._name, date=date)
+        if snapshot is not None:
+            self.__keep_previous(snapshot)
+            if snapshot.num_rows == 0:
+                self.logger.info("Previous Data doesn't exist")
+                return None
+            # memory map 된 컬럼에서 이름으로 거른 뒤 필요한 row 만 python 객체로 바꾼다.
+            matched = snapshot.filter(pc.is_in(snapshot["name"], value_set=pa.array(list(names), type=pa.string())))
+            columns = [column for column in self.PREVIOUS_COLUMNS if column in matched.column_names]
+            previous_df = DataFrame(matched.select(columns).to_pylist(), columns=self.PREVIOUS_COLUMNS)
+        else:
+            # history 에 필요한 컬럼만 decode 한다(재사용/snapshot 에는 전체 컬럼 필요).
+            projection = self.HISTORY_COLUMNS
+            if self.__incremental or self.__snapshots.enabled:
+                projection = self.PREVIOUS_COLUMNS
+            downloader = Downloader()
+            previous_data = downloader.download_columns(
+                db_name=os.getenv("MONGO_SERVICE_DB"), rel_name=self._name, date=date, projection=projection
+            )
+            # TODO : 이전 카테고리 가져오기
+            if not previous_data["name"]:
+                self.logger.info("Previous Data doesn't exist")
+                return None
+            previous_df = DataFrame(previous_data, columns=self.PREVIOUS_COLUMNS)
+            previous_df["histories"] = previous_df["histories"].map(lambda x: x if isinstance(x, list) else [])
+            self.__keep_previous(previous_df)
+        # add-hock
+        previous_df = previous_df[
+            previous_df["name"].map(
+                lambda x: x not in {"cj)햇반소프트밀버섯야채죽(280.0g)", "cj)햇반소프트밀소고기죽(280.0g)", "cj)햇반소프트밀전복죽(280.0g)"}
+            )
+        ].copy()
+        return previous_df
+
+    def save_snapshot(self, date: datetime):
+        """
+        이번 결과를 이전 서비스 데이터에 이름 기준으로 덮어써(DB upsert 와 같은 상태) snapshot 으로 저장한다.
+        이름 정제 memo 도 snapshot 옆에 저장한다.
+        """
+        try:
+            self.__write_snapshot(date)
+            self.__write_memo()
+        finally:
+            # snapshot 을 쓴 뒤에는 이전 데이터/결과를 들고 있지 않는다.
+            self.__previous, self.__result = None, None
+
+    def __keep_previous(self, previous: pa.Table | DataFrame):
+        # snapshot 을 쓸 때만 이전 서비스 데이터 전체를 save_snapshot 까지 들고 있는다.
+        if self.__snapshots.enabled:
+            self.__previous = previous
+
+    def __write_snapshot(self, date: datetime):
+        if not self.__snapshots.enabled or self.__result is None:
+            return
+        if self._checkpoint is not None and {"process", "process.previous"} & set(self._checkpoint.restored):
+            # checkpoint 에서 이어 실행하면 전체 이전 데이터가 없으므로 snapshot 을 만들지 않는다(다음 실행은 S3 Backup 사용).
+            self.logger.info("Skip snapshot: previous data was restored from checkpoint")
+            return
+        result = self.__result
+        previous = self.__previous
+        if isinstance(previous, pa.Table):
+            previous = previous.filter(pc.invert(pc.is_in(previous["name"], value_set=pa.array(result["name"]))))
+            previous = DataFrame(previous.to_pylist(), columns=previous.column_names)
+        elif isinstance(previous, DataFrame):
+            previous = previous[~previous["name"].isin(set(result["name"]))]
+        try:
+            data = result if previous is None or previous.empty else pd.concat([previous, result], ignore_index=True)
+            self.__snapshots.write(rel_name=self._name, date=date, data=data)
+        except (pa.ArrowException, OSError) as e:
+            # snapshot 은 cache 이므로 실패해도 다음 실행은 S3 Backup 을 쓴다.
+            self.logger.error(f"Snapshot Write Error: {e}")
+
+    def __write_memo(self):
         try:
-            check = next(previous_data)
-            previous_data = chain([check], previous_data)
-            if "histories" in check:
-                previous_df = DataFrame(
-                    previous_data,
-                    columns=["crawled_infos", "name", "brands", "histories", "image", "category"],
-                )
-            else:
-                previous_df = DataFrame(previous_data, columns=["crawled_infos", "name", "brands", "image", "category"])
-                previous_df["histories"] = [[]] * len(previous_df)
-        except StopIteration as e:
-            self.logger.info("Previous Data doesn't exist")
+            self.__snapshots.write_memo(
+                rel_name=self._name, version=NameNormalizer.VERSION, memo=self.__normalizer.memo()
+            )
+        except (pa.ArrowException, OSError) as e:
+            # memo 는 cache 이므로 실패해도 다음 실행은 이름을 다시 정제한다.
+            self.logger.error(f"Memo Write Error: {e}")
+
+    def __append_histories(self, data: DataFrame, previous_df: Optional[DataFrame], date: datetime) -> DataFrame:
+        if previous_df is None:
             data["histories"] = [[]] * len(data)
             return data
         else:
-            previous_df.rename(
+            previous_df = previous_df[["crawled_infos", "name", "brands", "histories", "image", "category"]].rename(
                 columns={
                     "crawled_infos": "previous_crawled_infos",
                     "brands": "previous_brands",
                     "image": "previous_image",
                     "category": "previous_category",
                 },
-                inplace=True,
             )
-            # add-hock
-            previous_df = previous_df[
-                previous_df["name"].map(
-                    lambda x: x not in {"cj)햇반소프트밀버섯야채죽(280.0g)", "cj)햇반소프트밀소고기죽(280.0g)", "cj)햇반소프트밀전복죽(280.0g)"}
-                )
-            ].copy()
             # merge
             data = data.merge(previous_df, on="name", how="left", validate="one_to_one")
             data["image"] = data[["image", "previous_image"]].apply(lambda x: x["image"] or x["previous_image"], axis=1)
@@ -686,17 +574,8 @@ class ProductProcessor(ProcessorIfs):
                 lambda x: [{"spider": y[0], "id": y[1], "url": y[2]} for y in x]
             )
             data.drop(columns=["tmp_crawled_info"], inplace=True)
-            # history 추가
-            data["histories"] = data["histories"].map(lambda x: x if isinstance(x, list) else [])
-            data["histories"] = data[["histories", "previous_brands"]].apply(
-                lambda x: x["histories"] + [{"date": date.strftime("%Y-%m-%d"), "brands": x["previous_brands"]}]
-                if isinstance(x["previous_brands"], list)
-                else x["histories"],
-                axis=1,
-            )
-            # Deduplicate histories
-            data["histories"] = data["histories"].map(lambda x: {y["date"]: y["brands"] for y in x})
-            data["histories"] = data["histories"].map(lambda x: [{"date": k, "brands": v} for k, v in x.items()])
+            # history 추가(가격/이벤트가 바뀐 경우만) & 중복 제거 & retention 압축
+            data["histories"] = self.__histories.append(data["histories"], data["previous_brands"], date)
             data.drop(
                 columns=["previous_brands", "previous_crawled_infos", "previous_image", "previous_category"],
                 inplace=True,
@@ -718,9 +597,39 @@ class ProductProcessor(ProcessorIfs):
         data["status"] = data["brands"].map(
             lambda x: 2 if len(reduce(lambda acc, cur: acc + cur["events"], x, [])) > 0 else -1
         )  # event가 아무것도 없으면 -1
-        data = data.to_dict("records")
-        errors = ServiceProductSchema().validate(data, many=True)
+        errors = ValidatorFactory.get_instance(ServiceProductSchema).validate_frame(data)
         if errors:
             self.logger.error(f"Service Product Schema Validation Error: {len(errors)}")
             raise RuntimeError(f"Service Product Schema Validation Error: {len(errors)}")
+        if self.__snapshots.enabled:
+            self.__result = data
+        data = FrameRecords(data)
         return data
+
+
+# worker process 마다 한 번 전달받는 Processor(분류기, 이름 정제기 등 읽기 전용 lookup table 포함)
+_worker_processor: Optional[ProductProcessor] = None
+
+
+def _init_worker(processor: ProductProcessor, instrument: bool, level: int):
+    """
+    spawn 으로 띄운 worker 는 main 의 설정을 물려받지 않으므로 logging 과 instrumentation 을 다시 설정한다.
+    :param instrument: parent process 의 Recorder 켜짐 여부
+    :param level: parent process 의 logging level
+    """
+    global _worker_processor
+    _worker_processor = processor
+    MainInjector().inject()
+    logging.getLogger().setLevel(level)
+    Recorder.reset(enabled=instrument)
+    # span log 는 parent process 가 기록을 받아 한 번만 남긴다.
+    Recorder.logger.setLevel(logging.WARNING)
+
+
+def _transform_partition(data: DataFrame) -> Tuple[DataFrame, List[Dict[str, Any]]]:
+    """
+    :return: (정제 결과, 이 partition 에서 끝난 span 기록)
+    """
+    start = len(Recorder.records())
+    data = _worker_processor._transform(data)
+    return data, Recorder.records()[start:]
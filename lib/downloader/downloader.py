@@ -1,14 +1,40 @@
 from datetime import datetime
-from typing import Iterator
+from typing import Any, Dict, Iterator, List, Sequence
 
 from lib.downloader.s3_downloader import S3Downloader
+from lib.instrumentation.recorder import Recorder
 
 
 class Downloader:
     def __init__(self, *args, **kwargs):
         self.__downloaders = {"s3": S3Downloader()}
 
-    def download(self, db_name: str, rel_name: str, date: datetime) -> Iterator[dict]:
-        return self.__downloaders["s3"].download(
-            db_name=db_name, rel_name=rel_name, date=date
+    def download(
+        self, db_name: str, rel_name: str, date: datetime, projection: Sequence[str] = None
+    ) -> Iterator[dict]:
+        docs = self.__downloaders["s3"].download(
+            db_name=db_name, rel_name=rel_name, date=date, projection=projection
         )
+        if not Recorder.enabled():
+            return docs
+        return self.__measure(f"download.{db_name}.{rel_name}", docs)
+
+    def download_columns(
+        self, db_name: str, rel_name: str, date: datetime, projection: Sequence[str]
+    ) -> Dict[str, List[Any]]:
+        with Recorder.span(f"download.{db_name}.{rel_name}", columns=len(projection)) as span:
+            columns = self.__downloaders["s3"].download_columns(
+                db_name=db_name, rel_name=rel_name, date=date, projection=projection
+            )
+            span.rows_out = len(next(iter(columns.values()), []))
+        return columns
+
+    @staticmethod
+    def __measure(name: str, docs: Iterator[dict]) -> Iterator[dict]:
+        # 다 소비할 때까지를 하나의 span 으로 잰다.
+        with Recorder.span(name) as span:
+            count = 0
+            for doc in docs:
+                count += 1
+                yield doc
+            span.rows_out = count
@@ -1,36 +1,178 @@
 import logging
 import os
+import struct
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from io import BytesIO
-from itertools import chain
-from typing import Iterator
+from typing import Any, Deque, Dict, Iterator, List, Sequence, Tuple
 
-import boto3
-from boto3_type_annotations.s3 import ServiceResource
-from bson import decode_iter
+from boto3_type_annotations.s3 import Client
+from bson import decode_all
+
+from lib.aws.factory import ClientFactory
 
 
 class S3Downloader:
+    """
+    S3 Backup(.bson) Downloader
+    - prefix 아래 객체를 chunk_size 단위 ranged GET 으로 나눠 worker thread 에서 받는다.
+    - 모든 객체를 통틀어 최대 window 개의 chunk 만 미리 받아두고(prefetch), 순서대로 소비한다.
+    - chunk 가 도착하는 대로 완성된 document 만 decode 하므로 파일 전체를 메모리에 올리지 않는다.
+    - projection 이 있으면 document 의 최상위 element 를 byte 단위로 훑어 요청한 필드만 decode 한다.
+    """
+
     def __init__(self):
-        self.__s3: ServiceResource = boto3.resource("s3")
+        self.__client: Client = ClientFactory.get_instance("s3")
+        self.__workers = int(os.getenv("S3_DOWNLOAD_WORKERS", 8))
+        self.__chunk_size = int(os.getenv("S3_DOWNLOAD_CHUNK_SIZE", 8 * 1024 * 1024))
+        self.__window = int(os.getenv("S3_DOWNLOAD_WINDOW", 2 * self.__workers))
         self.logger = logging.getLogger(__name__)
 
-    def download(self, db_name: str, rel_name: str, date: datetime) -> Iterator[dict]:
+    def download(self, db_name: str, rel_name: str, date: datetime, projection: Sequence[str] = None) -> Iterator[dict]:
+        """
+        :param projection: 가져올 필드(없으면 전체 필드)
+        """
+        return self.__decode(*self.__list(db_name, rel_name, date), projection=projection)
+
+    def download_columns(
+        self, db_name: str, rel_name: str, date: datetime, projection: Sequence[str]
+    ) -> Dict[str, List[Any]]:
+        """
+        :param projection: 가져올 필드
+        :return: {필드: [document 별 값(없으면 None)]}
+        """
+        columns = {key: [] for key in projection}
+        appends = [(key, columns[key].append) for key in projection]
+        for doc in self.__decode(*self.__list(db_name, rel_name, date), projection=projection):
+            for key, append in appends:
+                append(doc.get(key))
+        return columns
+
+    def __list(self, db_name: str, rel_name: str, date: datetime) -> Tuple[str, List[Tuple[str, int]]]:
         date = date.strftime("%Y-%m-%d")  # 2022-11-11 형식
         key = f"{date}/{db_name}/{rel_name}"
-        data = []
         bucket = os.getenv("S3_BACKUP_BUCKET")
         if not bucket:
             self.logger.error(f"{bucket} doesn't exist")
             raise RuntimeError(f"{bucket} doesn't exist")
 
         self.logger.info(f"Download s3://{bucket}/{key}")
-        for obj in self.__s3.Bucket(bucket).objects.filter(Prefix=key):
-            if not obj.key.endswith(".bson"):
-                continue
-            with BytesIO() as bytes_io:
-                obj = self.__s3.Object(bucket, obj.key)
-                obj.download_fileobj(bytes_io)
-                bytes_io.seek(0)
-                data.append(decode_iter(bytes_io.read()))
-        return chain.from_iterable(data)
+        objects = [
+            (obj["Key"], obj["Size"])
+            for page in ClientFactory.get_requester().paginate(
+                self.__client, "list_objects_v2", Bucket=bucket, Prefix=key
+            )
+            for obj in page.get("Contents", [])
+            if obj["Key"].endswith(".bson")
+        ]
+        return bucket, objects
+
+    def __decode(self, bucket: str, objects: List[Tuple[str, int]], projection: Sequence[str] = None) -> Iterator[dict]:
+        keys = None if projection is None else {key.encode() for key in projection}
+        buffer, current = bytearray(), None
+        for key, chunk in self.__prefetch(bucket, objects):
+            if key != current:
+                self.__check_end(current, buffer)
+                buffer, current = bytearray(), key
+            buffer += chunk
+            # 완성된 document 까지만 decode 하고, 나머지는 다음 chunk 와 이어 붙인다.
+            end, bounds = 0, []
+            while end + 4 <= len(buffer):
+                size = int.from_bytes(buffer[end : end + 4], "little")
+                if size < 5 or end + size > len(buffer):
+                    break
+                bounds.append((end, end + size))
+                end += size
+            if end:
+                data = bytes(buffer[:end])
+                del buffer[:end]
+                if keys is not None:
+                    data = b"".join(_project(data, start, stop, keys) for start, stop in bounds)
+                yield from decode_all(data)
+        self.__check_end(current, buffer)
+
+    def __prefetch(self, bucket: str, objects: List[Tuple[str, int]]) -> Iterator[Tuple[str, bytes]]:
+        ranges = (
+            (key, start, min(start + self.__chunk_size, size) - 1)
+            for key, size in objects
+            for start in range(0, size, self.__chunk_size)
+        )
+        client = self.__client
+        futures: Deque[Tuple[str, Future]] = deque()
+        executor = ThreadPoolExecutor(max_workers=self.__workers)
+        try:
+            for key, start, end in ranges:
+                futures.append((key, executor.submit(self.__get, client, bucket, key, start, end)))
+                if len(futures) >= self.__window:
+                    key, future = futures.popleft()
+                    yield key, future.result()
+            while futures:
+                key, future = futures.popleft()
+                yield key, future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def __get(client, bucket: str, key: str, start: int, end: int) -> bytes:
+        response = ClientFactory.get_requester().call(
+            client, "get_object", Bucket=bucket, Key=key, Range=f"bytes={start}-{end}"
+        )
+        return response["Body"].read()
+
+    def __check_end(self, key: str, buffer: bytearray):
+        if buffer:
+            self.logger.error(f"Invalid BSON: {key} has {len(buffer)} trailing bytes")
+            raise RuntimeError(f"Invalid BSON: {key} has {len(buffer)} trailing bytes")
+
+
+# element type -> 고정 길이 값의 byte 수
+_FIXED_SIZES = {
+    0x01: 8,
+    0x06: 0,
+    0x07: 12,
+    0x08: 1,
+    0x09: 8,
+    0x0A: 0,
+    0x10: 4,
+    0x11: 8,
+    0x12: 8,
+    0x13: 16,
+    0x7F: 0,
+    0xFF: 0,
+}
+_INT32 = struct.Struct("<i")
+
+
+def _project(data: bytes, start: int, stop: int, keys: set) -> bytes:
+    """
+    :param data: BSON document 들이 이어진 bytes
+    :param start: document 시작 위치
+    :param stop: document 끝 위치
+    :param keys: 남길 최상위 필드 이름(bytes)
+    :return: keys 에 해당하는 element 만 남긴 BSON document
+    """
+    elements, pos, end = [], start + 4, stop - 1
+    while pos < end:
+        element_type = data[pos]
+        value = data.index(b"\x00", pos + 1) + 1
+        if element_type in _FIXED_SIZES:
+            next_pos = value + _FIXED_SIZES[element_type]
+        elif element_type in (0x02, 0x0D, 0x0E):  # string, code, symbol
+            next_pos = value + 4 + _INT32.unpack_from(data, value)[0]
+        elif element_type in (0x03, 0x04, 0x0F):  # document, array, code with scope
+            next_pos = value + _INT32.unpack_from(data, value)[0]
+        elif element_type == 0x05:  # binary
+            next_pos = value + 5 + _INT32.unpack_from(data, value)[0]
+        elif element_type == 0x0B:  # regex
+            next_pos = data.index(b"\x00", data.index(b"\x00", value) + 1) + 1
+        elif element_type == 0x0C:  # db pointer
+            next_pos = value + 16 + _INT32.unpack_from(data, value)[0]
+        else:
+            raise RuntimeError(f"Invalid BSON element type: {element_type}")
+        if data[pos + 1 : value - 1] in keys:
+            elements.append(data[pos:next_pos])
+            if len(elements) == len(keys):
+                break
+        pos = next_pos
+    body = b"".join(elements)
+    return _INT32.pack(len(body) + 5) + body + b"\x00"
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Mapping, Optional
+
+import pyarrow as pa
+from pandas import DataFrame
+
+
+class SnapshotStore:
+    """
+    이전 실행 결과(서비스 데이터) 로컬 snapshot 저장소
+    - {SNAPSHOT_DIR}/{rel_name}.arrow: name 순으로 정렬한 압축 없는 Arrow IPC(Feather v2) 파일
+    - {SNAPSHOT_DIR}/{rel_name}.json: snapshot 날짜, 파일 sha256, row 수
+    - {SNAPSHOT_DIR}/{rel_name}.memo.arrow: 처리 중 만든 {원본 값: 정제된 값} memo(schema metadata 에 version)
+    snapshot 은 memory map 으로 읽으며, 날짜(전날 실행)와 hash 가 맞지 않으면 None 을 반환해 S3 Backup 을 쓰게 한다.
+    """
+
+    def __init__(self, directory: str = None):
+        self.__directory = directory if directory is not None else os.getenv("SNAPSHOT_DIR")
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.__directory)
+
+    def read(self, rel_name: str, date: datetime) -> Optional[pa.Table]:
+        """
+        :param date: 실행 날짜
+        :return: date 전날 실행에서 저장된 snapshot(memory map), 없거나 맞지 않으면 None
+        """
+        if not self.enabled:
+            return None
+        path, meta_path = self.__paths(rel_name)
+        if not os.path.exists(path) or not os.path.exists(meta_path):
+            self.logger.info(f"Snapshot {path} doesn't exist")
+            return None
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        expected = (date - timedelta(days=1)).strftime("%Y-%m-%d")
+        if meta.get("date") != expected:
+            self.logger.info(f"Snapshot date {meta.get('date')} != {expected}")
+            return None
+        source = pa.memory_map(path, "r")
+        if self.__sha256(source) != meta.get("sha256"):
+            self.logger.info(f"Snapshot {path} hash mismatch")
+            return None
+        table = pa.ipc.open_file(source).read_all()
+        self.logger.info(f"Read snapshot {path}: {table.num_rows}")
+        return table
+
+    def write(self, rel_name: str, date: datetime, data: DataFrame):
+        """
+        :param date: 실행 날짜
+        :param data: 실행 결과 서비스 데이터(name 컬럼 필수)
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.__directory, exist_ok=True)
+        path, meta_path = self.__paths(rel_name)
+        table = pa.Table.from_pandas(data.sort_values("name", kind="stable"), preserve_index=False)
+        # data -> meta 순서로 교체한다. 중간에 실패하면 meta 가 맞지 않아 다음 실행은 S3 Backup 을 쓴다.
+        with pa.OSFile(f"{path}.tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(f"{path}.tmp", path)
+        with pa.memory_map(path, "r") as source:
+            sha256 = self.__sha256(source)
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump({"date": date.strftime("%Y-%m-%d"), "sha256": sha256, "rows": table.num_rows}, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        self.logger.info(f"Write snapshot {path}: {table.num_rows}")
+
+    def read_memo(self, rel_name: str, version: str) -> Dict[str, str]:
+        """
+        :param version: memo 를 만든 규칙의 version
+        :return: 저장된 memo, 없거나 version 이 다르면 {}
+        """
+        if not self.enabled:
+            return {}
+        path = os.path.join(self.__directory, f"{rel_name}.memo.arrow")
+        if not os.path.exists(path):
+            return {}
+        try:
+            with pa.memory_map(path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (pa.ArrowException, OSError) as e:
+            # memo 는 cache 이므로 읽지 못하면 처음부터 다시 만든다.
+            self.logger.error(f"Memo Read Error: {e}")
+            return {}
+        if (table.schema.metadata or {}).get(b"version") != version.encode():
+            self.logger.info(f"Memo {path} version doesn't match {version}")
+            return {}
+        self.logger.info(f"Read memo {path}: {table.num_rows}")
+        return dict(zip(table["key"].to_pylist(), table["value"].to_pylist()))
+
+    def write_memo(self, rel_name: str, version: str, memo: Mapping[str, str]):
+        """
+        :param version: memo 를 만든 규칙의 version
+        :param memo: {원본 값: 정제된 값}(순서 유지)
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.__directory, exist_ok=True)
+        path = os.path.join(self.__directory, f"{rel_name}.memo.arrow")
+        table = pa.table(
+            {"key": pa.array(list(memo), pa.string()), "value": pa.array(list(memo.values()), pa.string())}
+        ).replace_schema_metadata({"version": version})
+        with pa.OSFile(f"{path}.tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(f"{path}.tmp", path)
+        self.logger.info(f"Write memo {path}: {table.num_rows}")
+
+    def __paths(self, rel_name: str):
+        path = os.path.join(self.__directory, f"{rel_name}.arrow")
+        return path, os.path.join(self.__directory, f"{rel_name}.json")
+
+    @staticmethod
+    def __sha256(source: pa.MemoryMappedFile) -> str:
+        digest = hashlib.sha256()
+        for offset in range(0, source.size(), 1 << 24):
+            digest.update(memoryview(source.read_at(min(1 << 24, source.size() - offset), offset)))
+        return digest.hexdigest()
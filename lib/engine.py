@@ -1,14 +1,19 @@
 import logging
 import os
 from datetime import datetime
-from typing import Any, Dict, Literal, Mapping, NoReturn, Sequence
+from typing import Any, Callable, Dict, List, Literal, Mapping, NoReturn, Sequence
 
+from lib.aws.factory import ClientFactory
+from lib.checkpoint.checkpoint_store import CheckpointStore
 from lib.domain.factory import ProcessorFactory
+from lib.instrumentation.recorder import Recorder
 from lib.interface.processor_ifs import ProcessorIfs
 from lib.out.eraser.s3_eraser import S3Eraser
 from lib.out.sender.db.db import DBSender
 from lib.out.sender.event.event import EventSender
+from lib.out.sender.s3.model.chunk import Chunk
 from lib.out.sender.s3.s3 import S3Sender
+from lib.scheduler.dag import DAGScheduler, Task
 
 
 class Engine:
@@ -21,7 +26,15 @@ class Engine:
         stage: Literal["dev", "test", "prod"],
         date: str,
         domain: Literal["all", "event", "product"],
+        incremental: bool = False,
+        workers: int = 1,
+        stream: bool = False,
+        resume: bool = False,
     ):
+        """
+        :param stream: chunk 업로드가 끝날 때마다 DB 반영 메시지를 보낸다(아니면 모든 업로드 후 manifest 범위로 보낸다).
+        :param resume: 같은 날짜의 실패한 실행에서 끝난 단계(CHECKPOINT_DIR)는 건너뛴다.
+        """
         if stage not in {"dev", "test", "prod"}:
             raise AttributeError(f"{stage} not in [dev, test, prod]")
         self.__stage = stage
@@ -33,62 +46,160 @@ class Engine:
         if domain not in {"all", "events", "products"}:
             raise AttributeError(f"{domain} not in [all, events, products]")
         self.__domain = domain
+        # Processor 옵션
+        if workers < 1:
+            raise AttributeError(f"workers({workers}) should be >= 1")
+        self.__options = {"incremental": incremental, "workers": workers}
+        self.__stream = stream
+        self.__checkpoints = CheckpointStore(resume=resume)
 
         # Logger
         self.logger = logging.getLogger(__name__)
 
     def run(self) -> NoReturn:
         """
-        0. tmp 파일 지우기
-        1. Processor 돌리기
-        2. S3 Upload
+        1. domain 별 pipeline(Processor → S3 Upload(실행 prefix) → DB 반영 메시지 → snapshot)을 동시에 돌리기
+        2. 결과 pointer 교체 & 이전 실행 결과 정리(background)
         3. Event 보내기
-        4. Slack 보내기
-        5. 종료
+        4. 종료
+        instrumentation 을 켜면(INSTRUMENT_REPORT) 성공/실패와 관계없이 단계 별 측정 보고서를 남긴다.
         """
+        status = "failed"
+        try:
+            with Recorder.span("engine.run", domain=self.__domain):
+                self.__run()
+            status = "succeeded"
+        finally:
+            Recorder.write_report(
+                date=self.__date.strftime("%Y-%m-%d"),
+                domain=self.__domain,
+                status=status,
+                aws=ClientFactory.get_requester().metrics(),
+            )
+
+    def __run(self):
         tmp_bucket = os.getenv("S3_BUCKET")
         tmp_key = os.getenv("S3_KEY")
-        self.logger.info(f"Erase {tmp_bucket}/{tmp_key}")
+        # 실행마다 다른 prefix 에 결과를 쓰고, 끝나면 pointer 를 교체한 뒤 이전 실행 결과를 지운다.
+        run_id = self.__checkpoints.run_id(self.__date)
         s3_eraser = S3Eraser(bucket=tmp_bucket, key=tmp_key)
-        s3_eraser.erase()
 
-        s3_sender = S3Sender()
+        s3_sender = S3Sender(run_id=run_id)
         db_sender = DBSender()
         event_sender = EventSender()
 
         processors: Dict[Literal["events", "products"], ProcessorIfs] = {}
         if self.__domain in {"all", "events"}:
-            processors["events"] = ProcessorFactory.get_instance(_type="events")
+            processors["events"] = ProcessorFactory.get_instance(_type="events", **self.__options)
         if self.__domain in {"all", "products"}:
-            processors["products"] = ProcessorFactory.get_instance(_type="products")
-
-        results: Dict[
-            Literal["events", "products"],
-            Mapping[Literal["data"], Sequence[Mapping[str, Any]]],
-        ] = {}
-        self.logger.info(f"Start processors: {list(processors.keys())}")
-        for _type, processor in processors.items():
-            data = processor.run(date=self.__date)
-            results[_type] = data
-
-        self.logger.info(f"Send results to s3://{tmp_bucket}/{tmp_key}")
-        s3_results: Dict[Literal["events", "products"], Sequence[str]] = {}
-        for _type, data in results.items():
-            s3_results[_type] = s3_sender.send(_type, data)
-        if self.__stage != "test":
-            self.logger.info("Send db update messages")
-            for _type, data in s3_results.items():
-                db_sender.send(
-                    date=self.__date,
-                    rel_name=_type,
-                    db_name=os.getenv("MONGO_SERVICE_DB"),
-                    data=data,
-                )
-        else:
-            self.logger.info("Don't send db update messages when TEST mode")
+            # 다른 domain 과 동시에 돌 때는 CPU 를 많이 쓰는 상품 정제를 별도 process 에서 실행한다.
+            processors["products"] = ProcessorFactory.get_instance(
+                _type="products", **self.__options, isolated=len(processors) > 0
+            )
+
+        self.logger.info(f"Start pipelines: {list(processors.keys())}")
+        tasks = [
+            task
+            for _type, processor in processors.items()
+            for task in self.__pipeline(_type, processor, s3_sender=s3_sender, db_sender=db_sender)
+        ]
+        results = DAGScheduler().run(tasks)
+        s3_results: Dict[Literal["events", "products"], Sequence[Chunk]] = {
+            _type: results[f"{_type}.upload"] for _type in processors
+        }
+
+        s3_sender.publish(
+            date=self.__date, results={_type: [chunk.key for chunk in chunks] for _type, chunks in s3_results.items()}
+        )
+        cleanup = s3_eraser.erase_async(exclude=[f"{s3_sender.prefix}/", s3_sender.pointer])
 
         if self.__stage != "test":
             self.logger.info("Broadcast the finished event")
             event_sender.send(event_type="finished", date=self.__date)
         else:
             self.logger.info("Don't send db update messages when TEST mode")
+
+        self.logger.info(f"Erase previous results in {tmp_bucket}/{tmp_key}")
+        cleanup.result()
+        self.__checkpoints.clear(self.__date)
+        # AWS 호출 별 초당 요청 수, throttle/재시도 수
+        ClientFactory.get_requester().log_metrics()
+
+    def __pipeline(
+        self,
+        rel_name: Literal["events", "products"],
+        processor: ProcessorIfs,
+        s3_sender: S3Sender,
+        db_sender: DBSender,
+    ) -> List[Task]:
+        """
+        {rel_name}.process → {rel_name}.upload → {rel_name}.notify → {rel_name}.snapshot
+        - stream 이면 upload 에서 chunk 마다 DB 반영 메시지를 보내므로 notify 가 없다.
+        - test 면 DB 반영 메시지와 snapshot 이 없다.
+        """
+        manifest = f"{s3_sender.prefix}/{rel_name}.manifest.json"
+        streaming = self.__stream and self.__stage != "test"
+        checkpoint = self.__checkpoints.checkpoint(
+            self.__date, rel_name, options={**self.__options, "stage": self.__stage, "stream": streaming}
+        )
+
+        def stage(name: str, fn: Callable[[], Any]) -> Any:
+            return fn() if checkpoint is None else checkpoint.stage(name, fn)
+
+        def upload(results: Mapping[str, Any]) -> Sequence[Chunk]:
+            data = results[f"{rel_name}.process"]
+            if streaming:
+                return stage(
+                    "upload", lambda: self.__send_stream(rel_name, data, s3_sender=s3_sender, db_sender=db_sender)
+                )
+            self.logger.info(f"Send {rel_name} to s3://{os.getenv('S3_BUCKET')}/{s3_sender.prefix}")
+            return stage("upload", lambda: s3_sender.send(rel_name, data))
+
+        def notify(results: Mapping[str, Any]):
+            self.logger.info(f"Send {rel_name} db update messages")
+            stage(
+                "notify",
+                lambda: db_sender.send(
+                    date=self.__date,
+                    rel_name=rel_name,
+                    db_name=os.getenv("MONGO_SERVICE_DB"),
+                    data=results[f"{rel_name}.upload"],
+                    manifest=manifest,
+                ),
+            )
+
+        tasks = [
+            Task(name=f"{rel_name}.process", fn=lambda results: processor.run(date=self.__date, checkpoint=checkpoint)),
+            Task(name=f"{rel_name}.upload", fn=upload, deps=[f"{rel_name}.process"]),
+        ]
+        if self.__stage == "test":
+            return tasks
+        if not streaming:
+            tasks.append(Task(name=f"{rel_name}.notify", fn=notify, deps=[f"{rel_name}.upload"]))
+        # DB 에 반영된 결과를 다음 실행의 이전 데이터로 저장
+        tasks.append(
+            Task(
+                name=f"{rel_name}.snapshot",
+                fn=lambda results: processor.save_snapshot(date=self.__date),
+                deps=[tasks[-1].name],
+            )
+        )
+        return tasks
+
+    def __send_stream(
+        self,
+        rel_name: Literal["events", "products"],
+        data: Mapping[Literal["data"], Sequence[Mapping[str, Any]]],
+        s3_sender: S3Sender,
+        db_sender: DBSender,
+    ) -> Sequence[Chunk]:
+        self.logger.info(f"Stream {rel_name} to s3://{os.getenv('S3_BUCKET')}/{s3_sender.prefix}")
+        stream = db_sender.stream(
+            date=self.__date,
+            rel_name=rel_name,
+            db_name=os.getenv("MONGO_SERVICE_DB"),
+            manifest=f"{s3_sender.prefix}/{rel_name}.manifest.json",
+        )
+        chunks = s3_sender.send(rel_name, data, on_chunk=stream.send)
+        stream.close()
+        return chunks
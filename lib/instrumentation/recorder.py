@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+
+class Span:
+    """
+    한 단계의 측정 값(Recorder.span 으로 만든다)
+    - 측정: wall time, 현재 thread 의 CPU time, 최대 RSS(와 증가량), tracemalloc 증가량(켠 경우)
+    - rows_in/rows_out/extra 는 단계 안에서 채운다.
+    """
+
+    def __init__(self, name: str, parent: Optional[str], rows_in: Optional[int], labels: Mapping[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.extra: Dict[str, Any] = dict(labels)
+        self.__started = time.time()
+        self.__wall = time.perf_counter()
+        self.__cpu = time.thread_time()
+        self.__rss = _max_rss()
+        self.__traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+    def finish(self, error: Optional[BaseException]) -> Dict[str, Any]:
+        rss = _max_rss()
+        record = {
+            "name": self.name,
+            "parent": self.parent,
+            "thread": threading.current_thread().name,
+            "started_at": round(self.__started, 3),
+            "wall_seconds": round(time.perf_counter() - self.__wall, 4),
+            "cpu_seconds": round(time.thread_time() - self.__cpu, 4),
+            "max_rss_mb": round(rss / 1024 / 1024, 2),
+            "rss_growth_mb": round((rss - self.__rss) / 1024 / 1024, 2),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "status": "error" if error is not None else "ok",
+        }
+        if self.__traced is not None and tracemalloc.is_tracing():
+            record["traced_delta_mb"] = round((tracemalloc.get_traced_memory()[0] - self.__traced) / 1024 / 1024, 2)
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+        record.update(self.extra)
+        return record
+
+
+class _NoopSpan:
+    """
+    instrumentation 을 끈 경우 쓰는 span(아무것도 측정하지 않는다)
+    """
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *args) -> bool:
+        return False
+
+    def __setattr__(self, key: str, value: Any):
+        pass
+
+    @property
+    def extra(self) -> Dict[str, Any]:
+        return {}
+
+
+class _SpanContext:
+    def __init__(self, recorder: "type[Recorder]", name: str, rows_in: Optional[int], labels: Mapping[str, Any]):
+        self.__recorder = recorder
+        self.__name = name
+        self.__rows_in = rows_in
+        self.__labels = labels
+        self.__span: Optional[Span] = None
+
+    def __enter__(self) -> Span:
+        stack = self.__recorder._stack()
+        self.__span = Span(self.__name, stack[-1].name if stack else None, self.__rows_in, self.__labels)
+        stack.append(self.__span)
+        return self.__span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        # generator 를 감싼 span 은 중간에 다른 span 이 열릴 수 있어 자기 자신만 뺀다.
+        stack = self.__recorder._stack()
+        for idx in range(len(stack) - 1, -1, -1):
+            if stack[idx] is self.__span:
+                del stack[idx]
+                break
+        self.__recorder._emit(self.__span.finish(exc))
+        return False
+
+
+class Recorder:
+    """
+    단계 별 실행 측정(instrumentation) 저장소
+    - INSTRUMENT=1 이거나 INSTRUMENT_REPORT(보고서 경로)가 있으면 켠다. 끄면 span 은 아무것도 하지 않는다.
+    - INSTRUMENT_TRACEMALLOC=1 이면 tracemalloc 으로 python 객체 메모리 증가량도 잰다(느려진다).
+    - 끝난 span 은 hook 으로 넘긴다. 기본 hook 은 JSON 한 줄 log 와 보고서용 수집이다.
+    - span 은 thread 별로 중첩되며 parent 에 감싼 span 이름을 남긴다.
+    """
+
+    logger = logging.getLogger(__name__)
+    __lock = threading.Lock()
+    __local = threading.local()
+    __enabled: Optional[bool] = None
+    __records: List[Dict[str, Any]] = []
+    __hooks: List[Callable[[Dict[str, Any]], None]] = []
+    __noop = _NoopSpan()
+
+    @classmethod
+    def enabled(cls) -> bool:
+        if cls.__enabled is None:
+            cls.__enabled = os.getenv("INSTRUMENT", "").lower() in {"1", "true"} or bool(os.getenv("INSTRUMENT_REPORT"))
+            if cls.__enabled and os.getenv("INSTRUMENT_TRACEMALLOC", "").lower() in {"1", "true"}:
+                tracemalloc.start()
+        return cls.__enabled
+
+    @classmethod
+    def span(cls, name: str, rows_in: Any = None, **labels):
+        """
+        with Recorder.span("products.process.merge", rows_in=data) as span:
+            ...
+            span.rows_out = len(data)
+        :param rows_in: 입력 row 수(또는 길이를 잴 수 있는 입력)
+        """
+        if not cls.enabled():
+            return cls.__noop
+        return _SpanContext(cls, name, rows(rows_in), labels)
+
+    @classmethod
+    def add_hook(cls, hook: Callable[[Dict[str, Any]], None]):
+        """
+        :param hook: 끝난 span 의 record(dict)를 받는 함수
+        """
+        with cls.__lock:
+            cls.__hooks.append(hook)
+
+    @classmethod
+    def merge(cls, records: Sequence[Mapping[str, Any]], **labels):
+        """
+        다른 process(worker)에서 끝난 span 기록을 이 process 의 기록으로 다시 남긴다(log, hook 포함).
+        - parent 가 없는 기록은 현재 thread 에서 열려 있는 span 아래에 둔다.
+        :param labels: 기록에 더할 값 ex) partition=0
+        """
+        if not cls.enabled():
+            return
+        stack = cls._stack()
+        for record in records:
+            record = {**record, **labels}
+            if record["parent"] is None and stack:
+                record["parent"] = stack[-1].name
+            cls._emit(record)
+
+    @classmethod
+    def records(cls) -> List[Dict[str, Any]]:
+        with cls.__lock:
+            return list(cls.__records)
+
+    @classmethod
+    def write_report(cls, path: str = None, **meta) -> Optional[str]:
+        """
+        :param path: 보고서 경로(없으면 INSTRUMENT_REPORT)
+        :param meta: 보고서에 함께 남길 값(실행 날짜, AWS metrics 등)
+        :return: 보고서 경로, 꺼져 있으면 None
+        """
+        path = path or os.getenv("INSTRUMENT_REPORT")
+        if not cls.enabled() or not path:
+            return None
+        report = {**meta, "spans": cls.records()}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(report, f, ensure_ascii=False, default=str, indent=2)
+        os.replace(f"{path}.tmp", path)
+        cls.logger.info(f"Write instrumentation report {path}: {len(report['spans'])} spans")
+        return path
+
+    @classmethod
+    def reset(cls, enabled: bool = None):
+        """
+        기록과 hook 을 지우고, 켜짐 여부를 다시 정한다(없으면 환경 변수로 다시 정한다).
+        """
+        with cls.__lock:
+            cls.__records.clear()
+            cls.__hooks.clear()
+            cls.__enabled = enabled
+
+    @classmethod
+    def _stack(cls) -> List[Span]:
+        if not hasattr(cls.__local, "stack"):
+            cls.__local.stack = []
+        return cls.__local.stack
+
+    @classmethod
+    def _emit(cls, record: Dict[str, Any]):
+        with cls.__lock:
+            cls.__records.append(record)
+            hooks = list(cls.__hooks)
+        cls.logger.info(json.dumps({"span": record}, ensure_ascii=False, default=str))
+        for hook in hooks:
+            hook(record)
+
+
+def rows(value: Any) -> Optional[int]:
+    """
+    :return: row 수(int 면 그대로, Processor 결과({"data": ...})면 data 길이, 길이가 없으면 None)
+    """
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, Mapping) and "data" in value:
+        value = value["data"]
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _max_rss() -> int:
+    # linux 의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
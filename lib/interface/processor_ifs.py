@@ -1,32 +1,71 @@
 import logging
 from abc import ABCMeta, abstractmethod
 from datetime import datetime
-from typing import Any, Literal, Mapping, Sequence
+from typing import Any, Callable, Literal, Mapping, Optional, Sequence
 
 from pandas import DataFrame
 
+from lib.checkpoint.checkpoint_store import Checkpoint
+from lib.instrumentation.recorder import Recorder, rows
+
 
 class ProcessorIfs(metaclass=ABCMeta):
     def __init__(self, name: str):
         self._name = name
         self.logger = logging.getLogger(__name__)
+        self._checkpoint: Optional[Checkpoint] = None
 
     def run(
-        self, date: datetime, *args, **kwargs
+        self, date: datetime, *args, checkpoint: Checkpoint = None, **kwargs
     ) -> Mapping[Literal["data"], Sequence[Mapping[str, Any]]]:
-        self.logger.info("Start Preprocessing")
-        data: DataFrame = self._preprocess(date, *args, **kwargs)
-        self.logger.info("Start Processing")
-        data = self._process(data, date, *args, **kwargs)
-        self.logger.info("Start Postprocessing")
-        data: Sequence[Mapping[str, Any]] = self._postprocess(
-            data, date, *args, **kwargs
-        )
+        """
+        :param checkpoint: 있으면 단계가 끝날 때마다 결과를 저장하고, resume 이면 저장된 단계는 건너뛴다.
+        """
+        self._checkpoint = checkpoint
+        with Recorder.span(f"{self._name}.run") as span:
+            data = self.__run(date, *args, **kwargs)
+            span.rows_out = len(data)
         self.logger.info(f"{self._name} result: {len(data)}")
         return {
             "data": data,
         }
 
+    def __run(self, date: datetime, *args, **kwargs) -> Sequence[Mapping[str, Any]]:
+        self.logger.info("Start Preprocessing")
+        data: DataFrame = self._stage(
+            "preprocess", lambda: self._preprocess(date, *args, **kwargs)
+        )
+        self.logger.info("Start Processing")
+        data = self._stage("process", lambda: self._process(data, date, *args, **kwargs), rows_in=data)
+        self.logger.info("Start Postprocessing")
+        return self._stage("postprocess", lambda: self._postprocess(data, date, *args, **kwargs), rows_in=data)
+
+    def _stage(self, name: str, fn: Callable[[], Any], rows_in: Any = None) -> Any:
+        """
+        checkpoint 가 있으면 name 단계 결과를 저장(resume 이면 저장된 결과 사용)한다.
+        _process 안의 오래 걸리는 단계도 이걸로 감싼다. 단계 실행은 instrumentation span 으로도 잰다.
+        """
+        if self._checkpoint is None:
+            return self._measure(name, fn, rows_in=rows_in)
+        return self._checkpoint.stage(name, lambda: self._measure(name, fn, rows_in=rows_in))
+
+    def _measure(self, name: str, fn: Callable[[], Any], rows_in: Any = None) -> Any:
+        """
+        fn 실행을 {processor 이름}.{name} span 으로 잰다(출력 row 수는 결과 길이).
+        """
+        if not Recorder.enabled():
+            return fn()
+        with Recorder.span(f"{self._name}.{name}", rows_in=rows_in) as span:
+            result = fn()
+            span.rows_out = rows(result)
+        return result
+
+    def save_snapshot(self, date: datetime):
+        """
+        결과가 서비스 DB 에 반영된 뒤 호출된다. 다음 실행에서 재사용할 snapshot 이 있는 Processor 만 구현한다.
+        """
+        pass
+
     @abstractmethod
     def _preprocess(self, date: datetime, *args, **kwargs) -> DataFrame:
         pass
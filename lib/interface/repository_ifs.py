@@ -1,6 +1,6 @@
 import logging
 from abc import ABCMeta, abstractmethod
-from typing import Any, List, Mapping, Optional
+from typing import Any, Iterator, List, Mapping, Optional
 
 
 class RepositoryIfs(metaclass=ABCMeta):
@@ -35,6 +35,24 @@ class RepositoryIfs(metaclass=ABCMeta):
     ) -> List[Mapping[str, Any]]:
         pass
 
+    @abstractmethod
+    def find_batches(
+        self,
+        rel_name: str,
+        filter: Mapping[str, Any] = None,
+        project: Mapping[str, bool] = None,
+        hint: Mapping[str, int] = None,
+        order_by: Mapping[str, int] = None,
+        limit: int = None,
+        batch_size: int = 1000,
+        *args,
+        **kwargs,
+    ) -> Iterator[List[Mapping[str, Any]]]:
+        """
+        find 결과를 batch_size 개씩 나눠 읽는다.
+        """
+        pass
+
     @abstractmethod
     def distinct(
         self,
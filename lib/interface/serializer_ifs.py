@@ -0,0 +1,25 @@
+from abc import ABCMeta, abstractmethod
+from typing import Any, Iterator, Sequence
+
+
+class SerializerIfs(metaclass=ABCMeta):
+    """
+    JSON Serializer
+    - json.dumps(obj, ensure_ascii=False) 와 같은 bytes(구분자 ", " ": ", UTF-8)로 직렬화한다.
+    - NaN/Infinity 는 null, numpy scalar/array 는 python 값으로 직렬화한다.
+    """
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        pass
+
+    def dumps_rows(self, columns: Sequence[str], values: Sequence[Sequence[Any]]) -> Iterator[bytes]:
+        """
+        컬럼별 값 리스트에서 row 를 하나씩 만들어 바로 직렬화한다(전체 record 리스트를 만들지 않는다).
+        :param columns: 컬럼 이름
+        :param values: 컬럼별 값 리스트
+        :return: row 별 dumps({column: value, ..})
+        """
+        dumps = self.dumps
+        for row in zip(*values):
+            yield dumps(dict(zip(columns, row)))
@@ -0,0 +1,51 @@
+from typing import Any, Dict, Iterator, List, Mapping, Sequence
+
+from pandas import DataFrame
+
+from lib.interface.serializer_ifs import SerializerIfs
+
+
+class FrameRecords(Sequence[Mapping[str, Any]]):
+    """
+    DataFrame.to_dict("records") 와 같은 값을 필요할 때만 만드는 record Sequence
+    - 컬럼 값은 한 번만 python 값으로 바꿔 두고(tolist), row dict 는 접근할 때 만든다.
+    - dumps 는 전체 record 리스트를 만들지 않고 컬럼 값에서 row 하나씩 직렬화한다.
+    """
+
+    def __init__(self, data: DataFrame):
+        self.__columns: List[str] = list(data.columns)
+        self.__values: List[list] = [data[column].tolist() for column in self.__columns]
+        self.__length = len(data)
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.__row(i) for i in range(*idx.indices(self.__length))]
+        if idx < 0:
+            idx += self.__length
+        if not 0 <= idx < self.__length:
+            raise IndexError(idx)
+        return self.__row(idx)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in zip(*self.__values):
+            yield dict(zip(self.__columns, row))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"FrameRecords(columns={self.__columns}, length={self.__length})"
+
+    def dumps(self, serializer: SerializerIfs) -> Iterator[bytes]:
+        """
+        :return: record 별 serializer.dumps(record) 와 같은 bytes
+        """
+        return serializer.dumps_rows(self.__columns, self.__values)
+
+    def __row(self, idx: int) -> Dict[str, Any]:
+        return {column: values[idx] for column, values in zip(self.__columns, self.__values)}
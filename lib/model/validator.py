@@ -0,0 +1,238 @@
+import math
+import numbers
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Type
+
+from marshmallow import EXCLUDE, Schema, ValidationError, fields
+from marshmallow.utils import from_iso_date, is_collection
+from marshmallow.validate import URL
+from pandas import DataFrame
+
+Check = Callable[[Any], bool]
+
+
+class SchemaValidator:
+    """
+    marshmallow Schema 를 필드별 검사 함수로 컴파일한 Validator
+    - Schema().validate(data, many=True) 와 같은 record 를 오류로 판단한다.
+    - 오류는 {record index: [오류 필드, ..]} 형식으로 반환한다.
+    - 컴파일할 수 없는 필드는 marshmallow field.deserialize 로 검사한다.
+    """
+
+    def __init__(self, schema: Type[Schema]):
+        self.schema = schema
+        self.__fields, self.__raise_unknown = self.__compile_schema(schema())
+        self.__keys = {key for key, _, _ in self.__fields}
+
+    def validate(self, data: Sequence[Mapping[str, Any]]) -> Dict[Any, List[str]]:
+        """
+        :param data: record 리스트
+        :return: 오류 record 의 {index: [오류 필드, ..]}
+        """
+        if not is_collection(data):
+            return {"_schema": ["_schema"]}
+        errors = {}
+        for idx, record in enumerate(data):
+            if invalid := self.__check_record(record):
+                errors[idx] = invalid
+        return errors
+
+    def validate_frame(self, data: DataFrame) -> Dict[Any, List[str]]:
+        """
+        data.to_dict("records") 를 검사한 것과 같은 결과를 컬럼 단위로 검사한다.
+        :param data: DataFrame
+        :return: 오류 record 의 {위치: [오류 필드, ..]}
+        """
+        errors = {}
+        for key, required, check in self.__fields:
+            if key not in data.columns:
+                invalid = range(len(data)) if required else []
+            else:
+                invalid = [idx for idx, value in enumerate(data[key].tolist()) if not check(value)]
+            for idx in invalid:
+                errors.setdefault(idx, []).append(key)
+        if self.__raise_unknown:
+            if unknown := [column for column in data.columns if column not in self.__keys]:
+                for idx in range(len(data)):
+                    errors.setdefault(idx, []).extend(unknown)
+        return dict(sorted(errors.items()))
+
+    def __check_record(self, record: Any) -> List[str]:
+        if not isinstance(record, Mapping):
+            return ["_schema"]
+        invalid = [
+            key
+            for key, required, check in self.__fields
+            if (key in record and not check(record[key])) or (key not in record and required)
+        ]
+        if self.__raise_unknown:
+            invalid.extend(key for key in record if key not in self.__keys)
+        return invalid
+
+    @classmethod
+    def __compile_schema(cls, schema: Schema, unknown: str = None):
+        compiled = [
+            (field.data_key if field.data_key is not None else name, field.required, cls.__compile_field(field))
+            for name, field in schema.load_fields.items()
+        ]
+        return compiled, (unknown or schema.unknown) != EXCLUDE
+
+    @classmethod
+    def __compile_field(cls, field: fields.Field) -> Check:
+        validators = field.validators[1:] if type(field) is fields.Url else field.validators
+        check = None if validators else cls.__compile_type(field)
+        if check is None:
+            # marshmallow 로 검사
+            def check(value: Any) -> bool:
+                try:
+                    field.deserialize(value)
+                except ValidationError:
+                    return False
+                return True
+
+            return check
+
+        allow_none = field.allow_none
+
+        def check_or_none(value: Any) -> bool:
+            if value is None:
+                return allow_none
+            return check(value)
+
+        return check_or_none
+
+    @classmethod
+    def __compile_type(cls, field: fields.Field) -> Check | None:
+        match type(field):
+            case fields.String:
+                return _check_string
+            case fields.Integer:
+                return _check_strict_integer if field.strict else _check_integer
+            case fields.Float:
+                return _check_number if field.allow_nan else _check_finite_number
+            case fields.Url:
+                return cls.__compile_url(field)
+            case fields.Date if field.format in {None, "iso", "iso8601"}:
+                return _check_iso_date
+            case fields.List:
+                return cls.__compile_list(field)
+            case fields.Nested if not field.only and not field.exclude:
+                return cls.__compile_nested(field)
+            case _:
+                return None
+
+    @classmethod
+    def __compile_url(cls, field: fields.Url) -> Check:
+        validator: URL = field.validators[0]
+        schemes = validator.schemes
+        regex = URL._regex(validator.relative, validator.absolute, validator.require_tld)
+
+        def check(value: Any) -> bool:
+            if not _check_string(value):
+                return False
+            if isinstance(value, bytes):
+                value = value.decode("utf-8")
+            if not value:
+                return False
+            if "://" in value and value.split("://")[0].lower() not in schemes:
+                return False
+            return regex.search(value) is not None
+
+        return check
+
+    @classmethod
+    def __compile_list(cls, field: fields.List) -> Check:
+        inner = cls.__compile_field(field.inner)
+
+        def check(value: Any) -> bool:
+            return is_collection(value) and all(map(inner, value))
+
+        return check
+
+    @classmethod
+    def __compile_nested(cls, field: fields.Nested) -> Check:
+        schema = field.schema
+        nested_fields, raise_unknown = cls.__compile_schema(schema, unknown=field.unknown)
+        keys = {key for key, _, _ in nested_fields}
+
+        def check_one(value: Any) -> bool:
+            if not isinstance(value, Mapping):
+                return False
+            for key, required, check in nested_fields:
+                if key in value:
+                    if not check(value[key]):
+                        return False
+                elif required:
+                    return False
+            return not raise_unknown or all(key in keys for key in value)
+
+        if field.many or schema.many:
+            return lambda value: is_collection(value) and all(map(check_one, value))
+        return check_one
+
+
+class ValidatorFactory:
+    __validators: Dict[Type[Schema], SchemaValidator] = {}
+
+    @classmethod
+    def get_instance(cls, schema: Type[Schema]) -> SchemaValidator:
+        if schema not in cls.__validators:
+            cls.__validators[schema] = SchemaValidator(schema)
+        return cls.__validators[schema]
+
+
+def _check_string(value: Any) -> bool:
+    if isinstance(value, str):
+        return True
+    if isinstance(value, bytes):
+        try:
+            value.decode("utf-8")
+        except UnicodeDecodeError:
+            return False
+        return True
+    return False
+
+
+def _check_integer(value: Any) -> bool:
+    if type(value) is int:
+        return True
+    if value is True or value is False:
+        return False
+    try:
+        int(value)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return True
+
+
+def _check_strict_integer(value: Any) -> bool:
+    return isinstance(value, numbers.Integral) and _check_integer(value)
+
+
+def _check_number(value: Any) -> bool:
+    if type(value) is float:
+        return True
+    if value is True or value is False:
+        return False
+    try:
+        float(value)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return True
+
+
+def _check_finite_number(value: Any) -> bool:
+    if type(value) is float:
+        return math.isfinite(value)
+    if not _check_number(value):
+        return False
+    return math.isfinite(float(value))
+
+
+def _check_iso_date(value: Any) -> bool:
+    if not value:
+        return False
+    try:
+        from_iso_date(value)
+    except (TypeError, AttributeError, ValueError):
+        return False
+    return True
@@ -1,9 +1,24 @@
 import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Sequence
 
-import boto3
+from boto3_type_annotations.s3 import Client
+
+from lib.aws.factory import ClientFactory
 
 
 class S3Eraser:
+    """
+    S3 prefix 정리
+    - prefix 아래 key 를 list_objects_v2 로 모아 delete_objects(최대 1000 개씩)를 병렬로 호출한다.
+    - 호출은 공용 Requester 를 거치며, SlowDown 등으로 지우지 못한 key 만 다시 지운다.
+    - exclude 로 넘긴 prefix 아래 key 는 남긴다.
+    - erase_async 는 background thread 에서 정리한다.
+    """
+
+    DELETE_BATCH_SIZE = 1000
+
     def __init__(self, bucket: str, key: str):
         self.logger = logging.getLogger(__name__)
         self.__bucket = bucket
@@ -11,12 +26,56 @@ class S3Eraser:
         if not bucket or not key:
             self.logger.error(f"bucket: {bucket}, key: {key} shouldn't be none")
             raise RuntimeError(f"bucket: {bucket}, key: {key} shouldn't be none")
+        self.__workers = int(os.getenv("S3_ERASE_WORKERS", 4))
 
-    def erase(self):
-        s3 = boto3.resource("s3")
+    def erase(self, exclude: Sequence[str] = ()) -> int:
+        """
+        :param exclude: 남길 key prefix
+        :return: 지운 객체 수
+        """
+        s3: Client = ClientFactory.get_instance("s3")
+        requester = ClientFactory.get_requester()
         try:
-            bucket = s3.Bucket(self.__bucket)
-            bucket.objects.filter(Prefix=self.__key).delete()
+            keys = [
+                obj["Key"]
+                for page in requester.paginate(s3, "list_objects_v2", Bucket=self.__bucket, Prefix=self.__key)
+                for obj in page.get("Contents", [])
+                if not any(obj["Key"].startswith(prefix) for prefix in exclude)
+            ]
+            batches = [keys[p : p + self.DELETE_BATCH_SIZE] for p in range(0, len(keys), self.DELETE_BATCH_SIZE)]
+            with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+                for errors in executor.map(lambda batch: self.__delete(s3, batch), batches):
+                    if errors:
+                        raise RuntimeError(f"Fail to delete {len(errors)} objects: {errors[:3]}")
         except Exception as e:
             self.logger.error(f"Fail to erase {self.__bucket}/{self.__key} in S3")
             raise RuntimeError(f"Fail to erase {self.__bucket}/{self.__key} in S3")
+        self.logger.info(f"Erase {len(keys)} objects in {self.__bucket}/{self.__key}")
+        return len(keys)
+
+    def erase_async(self, exclude: Sequence[str] = ()) -> Future:
+        """
+        :return: erase 결과(지운 객체 수) Future
+        """
+        background = ThreadPoolExecutor(max_workers=1)
+        future = background.submit(self.erase, exclude)
+        background.shutdown(wait=False)
+        return future
+
+    def __delete(self, s3: Client, keys: List[str]) -> list:
+        requester = ClientFactory.get_requester()
+        for attempt in range(requester.max_attempts):
+            response = requester.call(
+                s3,
+                "delete_objects",
+                Bucket=self.__bucket,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+            errors = response.get("Errors", [])
+            # SlowDown 등 다시 시도할 수 있는 오류만 남은 key 로 다시 지운다.
+            if not errors or not all(requester.is_retryable_code(x.get("Code")) for x in errors):
+                break
+            if attempt < requester.max_attempts - 1:
+                keys = [x["Key"] for x in errors]
+                requester.wait(attempt)
+        return errors
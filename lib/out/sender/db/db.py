@@ -1,48 +1,193 @@
-import json
 import logging
+import math
 import os
 from dataclasses import asdict
 from datetime import datetime
-from typing import NoReturn, Sequence
+from typing import List, NoReturn, Sequence
 
-import boto3
+from boto3_type_annotations.s3 import Client as S3Client
 from boto3_type_annotations.sqs import Client
 
+from lib.aws.factory import ClientFactory
+from lib.instrumentation.recorder import Recorder
 from lib.out.sender.db.model.message import Data, Message
+from lib.out.sender.db.stream import DBStream
+from lib.out.sender.s3.model.chunk import Chunk
+from lib.serializer.factory import SerializerFactory
 
 
 class DBSender:
+    """
+    DB 반영 메시지 Sender
+    - 결과 chunk 목록은 manifest 객체(key, record 수, byte 수, checksum)로 S3 에 올린다.
+    - send: SQS 메시지에는 manifest key 와 chunk 범위만 담아, chunk 수와 상관없이 메시지 크기가 일정하다.
+      범위는 DB_MESSAGE_CHUNKS 개씩 나눠 send_message_batch(최대 10 개씩)로 보낸다.
+    - stream: chunk 업로드가 끝날 때마다 chunk 별 UPSERT 메시지를 보내고, 끝나면 manifest 와 COMPLETE 메시지를 보낸다.
+    """
+
+    # send_message_batch 한 번에 보낼 수 있는 최대 메시지 수
+    BATCH_SIZE = 10
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.__bucket = os.getenv("S3_BUCKET")
+        self.__chunks_per_message = int(os.getenv("DB_MESSAGE_CHUNKS", 16))
+        self.__flush_seconds = float(os.getenv("DB_STREAM_FLUSH_SECONDS", 1.0))
 
     def send(
         self,
         date: datetime,
         db_name: str,
         rel_name: str,
-        data: Sequence[str],
+        data: Sequence[Chunk],
+        manifest: str,
     ) -> NoReturn:
-        sqs_client: Client = boto3.client("sqs")
-        sqs_queue_url: str = sqs_client.get_queue_url(
-            QueueName=os.getenv("DB_QUEUE_NAME")
-        )["QueueUrl"]
-        try:
-            self.logger.info(f"Send {len(data)} messages to {sqs_queue_url}")
-            message = Message(
-                date=datetime.strftime(date, "%Y-%m-%dT%H:%M:%S"),
+        """
+        :param data: S3Sender.send 로 업로드한 chunk 리스트
+        :param manifest: manifest 를 올릴 key
+        """
+        with Recorder.span(f"send.db.{rel_name}", rows_in=len(data)) as span:
+            span.rows_out = self.__send(date=date, db_name=db_name, rel_name=rel_name, data=data, manifest=manifest)
+
+    def __send(self, date: datetime, db_name: str, rel_name: str, data: Sequence[Chunk], manifest: str) -> int:
+        """
+        :return: 보낸 메시지 수
+        """
+        self.__write_manifest(date=date, db_name=db_name, rel_name=rel_name, data=data, manifest=manifest)
+
+        # chunk 가 없어도 메시지 하나는 보내 빈 결과를 반영하게 한다.
+        parts = max(1, math.ceil(len(data) / self.__chunks_per_message))
+        messages = [
+            self.__message(
+                date=date,
                 db_name=db_name,
                 rel_name=rel_name,
-                origin="transform",
                 action="UPSERT",
                 data=[
-                    Data(column="bucket", value=os.getenv("S3_BUCKET")),
-                    Data(column="keys", value=data),
+                    Data(
+                        column="manifest",
+                        value=manifest,
+                        start=part * self.__chunks_per_message,
+                        stop=min((part + 1) * self.__chunks_per_message, len(data)),
+                    )
                 ],
+                part=part,
+                parts=parts,
             )
-            sqs_client.send_message(
-                QueueUrl=sqs_queue_url,
-                MessageBody=json.dumps(asdict(message)),
+            for part in range(parts)
+        ]
+        self.logger.info(f"Send {len(messages)} messages({len(data)} chunks) of {rel_name}")
+        for p in range(0, len(messages), self.BATCH_SIZE):
+            self.__send_batch(messages[p : p + self.BATCH_SIZE])
+        return len(messages)
+
+    def stream(self, date: datetime, db_name: str, rel_name: str, manifest: str) -> DBStream:
+        """
+        :param manifest: 완료 시 manifest 를 올릴 key
+        :return: DBStream(chunk 마다 send, 끝나면 close)
+        """
+
+        def upsert(idx: int, chunk: Chunk) -> Message:
+            # 전체 메시지 수는 COMPLETE 메시지에서 알 수 있다.
+            return self.__message(
+                date=date,
+                db_name=db_name,
+                rel_name=rel_name,
+                action="UPSERT",
+                data=[Data(column="keys", value=[chunk.key])],
+                part=idx,
+                parts=None,
             )
+
+        def complete(chunks: Sequence[Chunk]) -> Message:
+            with Recorder.span(f"send.db.{rel_name}.manifest", rows_in=len(chunks)):
+                self.__write_manifest(date=date, db_name=db_name, rel_name=rel_name, data=chunks, manifest=manifest)
+            self.logger.info(f"Complete {len(chunks)} chunks of {rel_name}")
+            return self.__message(
+                date=date,
+                db_name=db_name,
+                rel_name=rel_name,
+                action="COMPLETE",
+                data=[Data(column="manifest", value=manifest, start=0, stop=len(chunks))],
+                part=len(chunks),
+                parts=len(chunks),
+            )
+
+        return DBStream(
+            send=self.__send_batch,
+            upsert=upsert,
+            complete=complete,
+            batch_size=self.BATCH_SIZE,
+            flush_seconds=self.__flush_seconds,
+        )
+
+    def __message(
+        self, date: datetime, db_name: str, rel_name: str, action: str, data: List[Data], part: int, parts: int
+    ) -> Message:
+        return Message(
+            date=datetime.strftime(date, "%Y-%m-%dT%H:%M:%S"),
+            db_name=db_name,
+            rel_name=rel_name,
+            origin="transform",
+            action=action,
+            data=[Data(column="bucket", value=self.__bucket)] + data,
+            part=part,
+            parts=parts,
+        )
+
+    def __send_batch(self, messages: Sequence[Message]) -> NoReturn:
+        sqs_client: Client = ClientFactory.get_instance("sqs")
+        sqs_queue_url: str = ClientFactory.get_queue_url(os.getenv("DB_QUEUE_NAME"))
+        serializer = SerializerFactory.get_instance()
+        requester = ClientFactory.get_requester()
+        entries = [
+            {"Id": str(message.part), "MessageBody": serializer.dumps(asdict(message)).decode()} for message in messages
+        ]
+        try:
+            for attempt in range(requester.max_attempts):
+                response = requester.call(sqs_client, "send_message_batch", QueueUrl=sqs_queue_url, Entries=entries)
+                failed = response.get("Failed", [])
+                # SQS 쪽 오류(SenderFault=False, throttle 등)로 실패한 메시지만 다시 보낸다.
+                if not failed or any(x["SenderFault"] for x in failed) or attempt == requester.max_attempts - 1:
+                    break
+                ids = {x["Id"] for x in failed}
+                entries = [entry for entry in entries if entry["Id"] in ids]
+                requester.wait(attempt)
+            if failed:
+                raise RuntimeError(f"Fail to send {len(failed)} messages: {failed[:3]}")
         except Exception as e:
             self.logger.error(f"Fail to send message to {sqs_queue_url}")
             raise RuntimeError(f"Fail to send message to {sqs_queue_url}")
+
+    def __write_manifest(
+        self, date: datetime, db_name: str, rel_name: str, data: Sequence[Chunk], manifest: str
+    ) -> NoReturn:
+        body = {
+            "date": datetime.strftime(date, "%Y-%m-%dT%H:%M:%S"),
+            "db_name": db_name,
+            "rel_name": rel_name,
+            "bucket": self.__bucket,
+            "records": sum(chunk.records for chunk in data),
+            "size": sum(chunk.size for chunk in data),
+            # chunk 별 값은 컬럼 단위 배열로 담는다.
+            "keys": [chunk.key for chunk in data],
+            "counts": [chunk.records for chunk in data],
+            "sizes": [chunk.size for chunk in data],
+            "checksums": [chunk.checksum for chunk in data],
+        }
+        try:
+            s3_client: S3Client = ClientFactory.get_instance("s3")
+            ClientFactory.get_requester().call(
+                s3_client,
+                "put_object",
+                Bucket=self.__bucket,
+                Key=manifest,
+                Body=SerializerFactory.get_instance().dumps(body),
+                ContentType="application/json",
+            )
+        except Exception as e:
+            self.logger.error(f"Fail to write manifest s3://{self.__bucket}/{manifest}")
+            raise RuntimeError(f"Fail to write manifest s3://{self.__bucket}/{manifest}")
+        self.logger.info(
+            f"Write manifest s3://{self.__bucket}/{manifest}: {len(data)} chunks({body['records']} records)"
+        )
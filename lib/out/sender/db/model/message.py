@@ -7,6 +7,9 @@ from typing import Any, List
 class Data:
     column: str = field(default=None)
     value: Any = field(default=None)
+    # value 가 manifest key 일 때 처리할 chunk 범위 [start, stop)
+    start: int = field(default=None)
+    stop: int = field(default=None)
 
 
 @dataclass(kw_only=True, frozen=True)
@@ -26,3 +29,6 @@ class Message:
     action: str = field(default=None)
     filters: List[Filter] = field(default_factory=list)
     data: List[Data] = field(default_factory=list)
+    # 한 작업을 여러 메시지로 나눴을 때 메시지 순번(0 부터)과 전체 메시지 수(stream UPSERT 는 None, COMPLETE 에만 있음)
+    part: int = field(default=0)
+    parts: int = field(default=1)
@@ -0,0 +1,55 @@
+import time
+from typing import Callable, List, Sequence
+
+from lib.out.sender.db.model.message import Message
+from lib.out.sender.s3.model.chunk import Chunk
+
+
+class DBStream:
+    """
+    chunk 업로드가 끝날 때마다 UPSERT 메시지를 보내는 stream(DBSender.stream 으로 만든다)
+    - 메시지는 batch_size 개가 모이거나 마지막 전송 후 flush_seconds 가 지나면 한 번에 보낸다.
+    - close 에서 relation 완료(COMPLETE) 메시지를 보낸다.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Sequence[Message]], None],
+        upsert: Callable[[int, Chunk], Message],
+        complete: Callable[[Sequence[Chunk]], Message],
+        batch_size: int,
+        flush_seconds: float,
+    ):
+        """
+        :param send: 메시지를 최대 batch_size 개씩 보내는 함수
+        :param upsert: (chunk 순번, chunk) -> UPSERT 메시지
+        :param complete: 전체 chunk -> COMPLETE 메시지
+        """
+        self.__send = send
+        self.__upsert = upsert
+        self.__complete = complete
+        self.__batch_size = batch_size
+        self.__flush_seconds = flush_seconds
+        self.__chunks: List[Chunk] = []
+        self.__buffer: List[Message] = []
+        self.__flushed = time.monotonic()
+
+    def send(self, chunk: Chunk):
+        self.__buffer.append(self.__upsert(len(self.__chunks), chunk))
+        self.__chunks.append(chunk)
+        if len(self.__buffer) >= self.__batch_size or time.monotonic() - self.__flushed >= self.__flush_seconds:
+            self.__flush()
+
+    def close(self) -> List[Chunk]:
+        """
+        :return: stream 으로 보낸 chunk 리스트
+        """
+        self.__buffer.append(self.__complete(self.__chunks))
+        self.__flush()
+        return self.__chunks
+
+    def __flush(self):
+        for p in range(0, len(self.__buffer), self.__batch_size):
+            self.__send(self.__buffer[p : p + self.__batch_size])
+        self.__buffer = []
+        self.__flushed = time.monotonic()
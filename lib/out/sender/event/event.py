@@ -1,12 +1,14 @@
-import json
 import logging
 import os
 from datetime import datetime
 from typing import Literal, NoReturn
 
-import boto3
 from boto3_type_annotations.events import Client
 
+from lib.aws.factory import ClientFactory
+from lib.instrumentation.recorder import Recorder
+from lib.serializer.factory import SerializerFactory
+
 
 class EventSender:
     def __init__(self):
@@ -26,20 +28,24 @@ class EventSender:
         if event_type != "finished":
             self.logger.error(f"{event_type} should be in ['finished']")
             raise RuntimeError(f"{event_type} should be in ['finished']")
-        client: Client = boto3.client("events")
-        response = client.put_events(
+        detail = {"status": "finished", "date": date.strftime("%Y-%m-%d")}
+        client: Client = ClientFactory.get_instance("events")
+        with Recorder.span(f"send.event.{event_type}"):
+            response = self.__put(client, detail)
+        if response["FailedEntryCount"] > 0:
+            self.logger.error(f"Fail to send message: {response['FailedEntryCount']}")
+            raise RuntimeError(f"Fail to send message: {response['FailedEntryCount']}")
+
+    def __put(self, client: Client, detail: dict) -> dict:
+        return ClientFactory.get_requester().call(
+            client,
+            "put_events",
             Entries=[
                 {
                     "Source": self.__source,
                     "DetailType": self.__detail_type,
-                    "Detail": json.dumps(
-                        {"status": "finished", "date": date.strftime("%Y-%m-%d")},
-                        ensure_ascii=False,
-                    ),
+                    "Detail": SerializerFactory.get_instance().dumps(detail).decode(),
                     "EventBusName": os.getenv("EVENT_BUS_NAME"),
                 },
             ],
         )
-        if response["FailedEntryCount"] > 0:
-            self.logger.error(f"Fail to send message: {response['FailedEntryCount']}")
-            raise RuntimeError(f"Fail to send message: {response['FailedEntryCount']}")
@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(kw_only=True, frozen=True)
+class Chunk:
+    key: str = field(default=None)
+    # chunk 에 담긴 record 수
+    records: int = field(default=0)
+    # 업로드한 byte 수(압축 후)
+    size: int = field(default=0)
+    # 업로드한 body 의 sha256(hex)
+    checksum: str = field(default=None)
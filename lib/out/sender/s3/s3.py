@@ -1,17 +1,31 @@
-import json
 import logging
 import os
-from typing import Any, List, Literal, Mapping, Sequence
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Literal, Mapping, Sequence, Tuple
 
-import boto3
 from boto3_type_annotations.s3 import Client
 
+from lib.aws.factory import ClientFactory
+from lib.instrumentation.recorder import Recorder
+from lib.out.sender.s3.model.chunk import Chunk
+from lib.out.sender.s3.uploader import S3Uploader
+from lib.out.sender.s3.writer import ChunkWriter
+from lib.serializer.factory import SerializerFactory
+
 
 class S3Sender:
-    def __init__(self, *args, **kwargs):
+    # 마지막으로 완료된 실행의 결과 위치
+    POINTER = "latest.json"
+
+    def __init__(self, *args, run_id: str = None, **kwargs):
+        """
+        :param run_id: 있으면 {S3_KEY}/runs/{run_id} 아래에 결과를 쓴다.
+        """
         self.logger = logging.getLogger(__name__)
         self.__bucket = os.getenv("S3_BUCKET")
         self.__key = os.getenv("S3_KEY")
+        self.__run_id = run_id
+        self.__prefix = f"{self.__key}/runs/{run_id}" if run_id else self.__key
 
         if not self.__bucket or not self.__key:
             self.logger.error(
@@ -26,27 +40,75 @@ class S3Sender:
         rel_name: str,
         result: Mapping[Literal["data"], Sequence[Mapping[str, Any]]],
         *args,
+        on_chunk: Callable[[Chunk], None] = None,
         **kwargs,
-    ) -> List[str]:
+    ) -> List[Chunk]:
         """
-        Data를 100개씩 쪼개 {rel_name}_{idx}.json으로 전송
+        Data를 byte 크기 기준 chunk 로 쪼개 {prefix}/{rel_name}_{idx}.{json|ndjson}[.gz|.zst]으로 전송
+        chunk 직렬화는 ChunkWriter, 압축/업로드는 S3Uploader 에서 동시에 처리한다.
+        :param on_chunk: chunk 업로드가 끝날 때마다 순서대로 호출
+        :return: 업로드한 chunk(key, record 수, byte 수, checksum) 리스트
         """
         data = result["data"]
-        result = []
+        writer = ChunkWriter()
+        records: Dict[str, int] = {}
+
+        def chunks() -> Iterator[Tuple[str, Callable[[], bytes]]]:
+            for key, count, body in writer.chunks(prefix=f"{self.__prefix}/{rel_name}", records=data):
+                records[key] = count
+                yield key, body
+
+        uploaded: List[Chunk] = []
+
+        def on_upload(key: str, size: int, checksum: str):
+            uploaded.append(Chunk(key=key, records=records.pop(key), size=size, checksum=checksum))
+            if on_chunk is not None:
+                on_chunk(uploaded[-1])
+
         try:
-            s3: Client = boto3.client("s3")
-            for idx, p in enumerate(range(0, len(data), 100)):
-                buffer = data[p : p + 100]
-                body: bytes = json.dumps(buffer, ensure_ascii=False).encode()
-                key = f"{self.__key}/{rel_name}_{idx}.json"
-                s3.put_object(
-                    Bucket=self.__bucket,
-                    Key=key,
-                    Body=body,
-                )
-                result.append(key)
+            with Recorder.span(f"send.s3.{rel_name}", rows_in=len(data)) as span:
+                uploader = S3Uploader(bucket=self.__bucket, put_args=writer.put_args)
+                uploader.upload_objects(chunks(), on_upload=on_upload)
+                span.rows_out = sum(chunk.records for chunk in uploaded)
+                span.extra.update(chunks=len(uploaded), bytes=sum(chunk.size for chunk in uploaded))
         except Exception as e:
             self.logger.error("Fail to upload result to s3")
             raise RuntimeError("Fail to upload result to s3")
         else:
-            return result
+            return uploaded
+
+    @property
+    def prefix(self) -> str:
+        return self.__prefix
+
+    @property
+    def pointer(self) -> str:
+        return f"{self.__key}/{self.POINTER}"
+
+    def publish(self, date: datetime, results: Mapping[str, Sequence[str]]) -> str:
+        """
+        실행 결과가 모두 올라간 뒤 pointer 객체({S3_KEY}/latest.json)를 한 번에 교체한다.
+        :param results: {rel_name: [key, ..]}
+        :return: pointer key
+        """
+        body = {
+            "run_id": self.__run_id,
+            "date": date.strftime("%Y-%m-%d"),
+            "prefix": self.__prefix,
+            "keys": dict(results),
+        }
+        try:
+            s3: Client = ClientFactory.get_instance("s3")
+            ClientFactory.get_requester().call(
+                s3,
+                "put_object",
+                Bucket=self.__bucket,
+                Key=self.pointer,
+                Body=SerializerFactory.get_instance().dumps(body),
+                ContentType="application/json",
+            )
+        except Exception as e:
+            self.logger.error(f"Fail to publish s3://{self.__bucket}/{self.pointer}")
+            raise RuntimeError(f"Fail to publish s3://{self.__bucket}/{self.pointer}")
+        self.logger.info(f"Publish s3://{self.__bucket}/{self.pointer}: {self.__prefix}")
+        return self.pointer
@@ -0,0 +1,103 @@
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterable, List, Mapping, Tuple
+
+from boto3_type_annotations.s3 import Client
+
+from lib.aws.factory import ClientFactory
+
+
+class S3Uploader:
+    """
+    chunk 단위 S3 업로드 엔진
+    - worker thread 에서 chunk 를 직렬화하고 put_object 로 올린다.
+    - 동시에 처리 중인 chunk 는 최대 window 개로 제한해 메모리를 묶어둔다.
+    - 실패한 chunk 만 공용 Requester 로 속도를 조절하며 jitter backoff 로 다시 시도한다.
+    - 반환하는 key 는 입력 순서를 유지한다.
+    """
+
+    def __init__(self, bucket: str, workers: int = None, retries: int = None, put_args: Mapping[str, Any] = None):
+        """
+        :param put_args: 모든 chunk 의 put_object 에 함께 넘길 인자(ContentType 등)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.__bucket = bucket
+        self.__put_args = dict(put_args or {})
+        self.__workers = workers or int(os.getenv("S3_UPLOAD_WORKERS", 8))
+        # 없으면 Requester 기본값(AWS_MAX_ATTEMPTS)
+        retries = retries if retries is not None else os.getenv("S3_UPLOAD_RETRIES")
+        self.__attempts = int(retries) + 1 if retries is not None else None
+        self.__window = 2 * self.__workers
+        self.__client: Client = ClientFactory.get_instance("s3")
+        self.__requester = ClientFactory.get_requester()
+
+    def upload(self, chunks: Iterable[Tuple[str, Callable[[], bytes]]]) -> List[str]:
+        """
+        :param chunks: (key, body 를 만드는 함수) 목록
+        :return: 업로드한 key 리스트(입력 순서)
+        """
+        return [key for key, _, _ in self.upload_objects(chunks)]
+
+    def upload_objects(
+        self,
+        chunks: Iterable[Tuple[str, Callable[[], bytes]]],
+        on_upload: Callable[[str, int, str], None] = None,
+    ) -> List[Tuple[str, int, str]]:
+        """
+        :param chunks: (key, body 를 만드는 함수) 목록
+        :param on_upload: chunk 업로드가 끝날 때마다 입력 순서대로 (key, byte 수, sha256)로 호출
+        :return: 업로드한 (key, byte 수, sha256) 리스트(입력 순서)
+        """
+        start = time.perf_counter()
+        objects = []
+        futures: Deque[Tuple[str, Future]] = deque()
+
+        def complete():
+            key, future = futures.popleft()
+            objects.append((key, *future.result()))
+            if on_upload is not None:
+                on_upload(*objects[-1])
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            try:
+                for key, serialize in chunks:
+                    futures.append((key, executor.submit(self.__put, key, serialize)))
+                    if len(futures) >= self.__window:
+                        complete()
+                    # 이미 끝난 앞쪽 chunk 는 바로 완료 처리한다.
+                    while futures and futures[0][1].done():
+                        complete()
+                while futures:
+                    complete()
+            except Exception:
+                for _, future in futures:
+                    future.cancel()
+                raise
+        elapsed = time.perf_counter() - start
+        size = sum(x[1] for x in objects)
+        self.logger.info(
+            f"Upload {len(objects)} chunks({size / 1024 / 1024:.2f}MB) to s3://{self.__bucket} in {elapsed:.2f}s "
+            f"({size / 1024 / 1024 / max(elapsed, 1e-9):.2f}MB/s)"
+        )
+        return objects
+
+    def __put(self, key: str, serialize: Callable[[], bytes]) -> Tuple[int, str]:
+        body = serialize()
+        try:
+            self.__requester.call(
+                self.__client,
+                "put_object",
+                attempts=self.__attempts,
+                Bucket=self.__bucket,
+                Key=key,
+                Body=body,
+                **self.__put_args,
+            )
+        except Exception as e:
+            self.logger.error(f"Fail to upload s3://{self.__bucket}/{key}: {e}")
+            raise
+        return len(body), hashlib.sha256(body).hexdigest()
@@ -0,0 +1,103 @@
+import gzip
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from lib.interface.serializer_ifs import SerializerIfs
+from lib.model.records import FrameRecords
+from lib.serializer.factory import SerializerFactory
+
+try:
+    import zstandard
+except ImportError:  # zstd 압축을 쓸 때만 필요
+    zstandard = None
+
+
+class ChunkWriter:
+    """
+    결과 record 를 byte 크기 기준 chunk 로 나눠 직렬화하는 writer
+    - json: record 배열(기존 형식), ndjson: record 한 줄씩
+    - record 는 SerializerFactory 의 JSON backend 로 직렬화한다(FrameRecords 는 컬럼 값에서 바로 직렬화).
+    - chunk 는 직렬화한 크기(압축 전)가 target_bytes 를 넘기 직전에 끊는다.
+    - gzip/zstd 압축은 업로드 worker 에서 수행한다.
+    """
+
+    FORMATS = {
+        "json": {"extension": "json", "content_type": "application/json"},
+        "ndjson": {"extension": "ndjson", "content_type": "application/x-ndjson"},
+    }
+    COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+    def __init__(
+        self, fmt: str = None, target_bytes: int = None, compression: str = None, serializer: SerializerIfs = None
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.__serializer = serializer or SerializerFactory.get_instance()
+        self.__format = fmt or os.getenv("S3_OUTPUT_FORMAT", "json")
+        self.__target_bytes = target_bytes or int(os.getenv("S3_CHUNK_BYTES", 4 * 1024 * 1024))
+        self.__compression = compression or os.getenv("S3_COMPRESSION", "none")
+        if self.__format not in self.FORMATS:
+            self.logger.error(f"{self.__format} not in {list(self.FORMATS)}")
+            raise RuntimeError(f"{self.__format} not in {list(self.FORMATS)}")
+        if self.__compression not in self.COMPRESSIONS:
+            self.logger.error(f"{self.__compression} not in {list(self.COMPRESSIONS)}")
+            raise RuntimeError(f"{self.__compression} not in {list(self.COMPRESSIONS)}")
+        if self.__compression == "zstd" and zstandard is None:
+            self.logger.error("zstandard should be installed for zstd compression")
+            raise RuntimeError("zstandard should be installed for zstd compression")
+
+    @property
+    def put_args(self) -> Dict[str, Any]:
+        """
+        :return: put_object 에 함께 넘길 ContentType/ContentEncoding/Metadata
+        """
+        args = {
+            "ContentType": self.FORMATS[self.__format]["content_type"],
+            "Metadata": {"format": self.__format},
+        }
+        if self.__compression != "none":
+            args["ContentEncoding"] = self.__compression
+        return args
+
+    def chunks(
+        self, prefix: str, records: Iterable[Mapping[str, Any]]
+    ) -> Iterator[Tuple[str, int, Callable[[], bytes]]]:
+        """
+        :param prefix: chunk key prefix ({prefix}_{idx}.{extension})
+        :return: (key, record 수, body 를 만드는 함수)
+        """
+        if isinstance(records, FrameRecords):
+            lines = records.dumps(self.__serializer)
+        else:
+            lines = map(self.__serializer.dumps, records)
+        # chunk 크기 = record 마다 (길이 + 구분자 "\n" or ", ")
+        # (json 배열은 구분자가 record 수 - 1 개이고 괄호 "[" "]" 가 2 byte 이므로 합은 같다)
+        separator = 2 if self.__format == "json" else 1
+        buffer, size, idx = [], 0, 0
+        for line in lines:
+            if buffer and size + len(line) + separator > self.__target_bytes:
+                yield self.__chunk(prefix, idx, buffer)
+                buffer, size, idx = [], 0, idx + 1
+            buffer.append(line)
+            size += len(line) + separator
+        if buffer:
+            yield self.__chunk(prefix, idx, buffer)
+
+    def __chunk(self, prefix: str, idx: int, lines: List[bytes]) -> Tuple[str, int, Callable[[], bytes]]:
+        key = f"{prefix}_{idx}.{self.FORMATS[self.__format]['extension']}{self.COMPRESSIONS[self.__compression]}"
+        return key, len(lines), lambda: self.__compress(self.__join(lines))
+
+    def __join(self, lines: List[bytes]) -> bytes:
+        if self.__format == "ndjson":
+            return b"\n".join(lines) + b"\n"
+        # serializer.dumps(list) 와 같은 형식
+        return b"[" + b", ".join(lines) + b"]"
+
+    def __compress(self, body: bytes) -> bytes:
+        match self.__compression:
+            case "gzip":
+                return gzip.compress(body, mtime=0)
+            case "zstd":
+                return zstandard.ZstdCompressor().compress(body)
+            case _:
+                return body
@@ -0,0 +1,143 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Sequence
+
+
+@dataclass(kw_only=True, frozen=True)
+class Task:
+    name: str = field(default=None)
+    # 의존 task 결과({task 이름: 결과})를 받아 실행하는 함수
+    fn: Callable[[Mapping[str, Any]], Any] = field(default=None)
+    deps: Sequence[str] = field(default_factory=tuple)
+
+
+class DAGScheduler:
+    """
+    Task 의존 관계(DAG)에 따라 실행하는 scheduler
+    - 의존 task 가 모두 끝난 task 부터 thread 에서 동시에 실행한다.
+    - 실패한 task 에 의존하는 task 는 실행하지 않고, 의존 관계가 없는 task 는 계속 실행한다.
+    - 모든 task 가 끝난 뒤 실패한 task 가 있으면 RuntimeError 를 낸다.
+    """
+
+    def __init__(self, workers: int = None):
+        """
+        :param workers: 동시에 실행할 최대 task 수(없으면 task 수)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.__workers = workers
+
+    def run(self, tasks: Sequence[Task]) -> Dict[str, Any]:
+        """
+        :return: {task 이름: 결과}
+        """
+        graph = {task.name: task for task in tasks}
+        self.__check(graph)
+        state = _State(graph)
+        with ThreadPoolExecutor(max_workers=self.__workers or max(1, len(graph))) as executor:
+            for name in state.ready():
+                self.__submit(executor, state, name)
+            while state.running:
+                done, _ = wait(state.running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for name in self.__complete(state, future):
+                        self.__submit(executor, state, name)
+        if state.errors:
+            self.logger.error(f"Failed tasks: {list(state.errors)}, skipped tasks: {state.skipped}")
+            raise RuntimeError(f"Failed tasks: {list(state.errors)}, skipped tasks: {state.skipped}") from next(
+                iter(state.errors.values())
+            )
+        return state.results
+
+    def __submit(self, executor: ThreadPoolExecutor, state: "_State", name: str):
+        task = state.graph[name]
+        state.started[name] = time.perf_counter()
+        self.logger.info(f"Start task {name}")
+        state.running[executor.submit(task.fn, {dep: state.results[dep] for dep in task.deps})] = name
+
+    def __complete(self, state: "_State", future: Future) -> List[str]:
+        """
+        :return: 이번 task 가 끝나 실행할 수 있게 된 task
+        """
+        name = state.running.pop(future)
+        elapsed = time.perf_counter() - state.started[name]
+        if future.exception() is not None:
+            state.errors[name] = future.exception()
+            self.logger.error(f"Fail task {name} in {elapsed:.2f}s: {state.errors[name]}")
+            skipped = state.skip(name)
+            if skipped:
+                self.logger.info(f"Skip tasks {skipped}")
+            return []
+        state.results[name] = future.result()
+        self.logger.info(f"Finish task {name} in {elapsed:.2f}s")
+        return state.release(name)
+
+    def __check(self, graph: Mapping[str, Task]):
+        for task in graph.values():
+            unknown = [dep for dep in task.deps if dep not in graph]
+            if unknown:
+                self.logger.error(f"{task.name} depends on unknown tasks: {unknown}")
+                raise RuntimeError(f"{task.name} depends on unknown tasks: {unknown}")
+        # 위상 정렬로 순환 의존을 찾는다.
+        remains = {name: len(task.deps) for name, task in graph.items()}
+        ready = [name for name, count in remains.items() if not count]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for task in graph.values():
+                if name in task.deps:
+                    remains[task.name] -= 1
+                    if not remains[task.name]:
+                        ready.append(task.name)
+        if visited != len(graph):
+            cycle = [name for name, count in remains.items() if count]
+            self.logger.error(f"Tasks have a cycle: {cycle}")
+            raise RuntimeError(f"Tasks have a cycle: {cycle}")
+
+
+class _State:
+    """
+    DAGScheduler.run 한 번의 실행 상태
+    """
+
+    def __init__(self, graph: Mapping[str, Task]):
+        self.graph = graph
+        self.dependents: Dict[str, List[str]] = {name: [] for name in graph}
+        for task in graph.values():
+            for dep in task.deps:
+                self.dependents[dep].append(task.name)
+        self.remains = {name: len(task.deps) for name, task in graph.items()}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.skipped: List[str] = []
+        self.running: Dict[Future, str] = {}
+        self.started: Dict[str, float] = {}
+
+    def ready(self) -> List[str]:
+        return [name for name, count in self.remains.items() if not count]
+
+    def release(self, name: str) -> List[str]:
+        """
+        :return: name 이 끝나 의존 task 가 모두 끝난 task
+        """
+        ready = []
+        for dependent in self.dependents[name]:
+            self.remains[dependent] -= 1
+            if not self.remains[dependent] and dependent not in self.skipped:
+                ready.append(dependent)
+        return ready
+
+    def skip(self, name: str) -> List[str]:
+        """
+        :return: name 이 실패해 실행하지 않을 task(의존 task 의 의존 task 포함)
+        """
+        skipped, stack = [], list(self.dependents[name])
+        while stack:
+            dependent = stack.pop()
+            if dependent not in self.skipped:
+                self.skipped.append(dependent)
+                skipped.append(dependent)
+                stack.extend(self.dependents[dependent])
+        return skipped
@@ -0,0 +1,41 @@
+import importlib.util
+import logging
+import os
+from typing import Literal
+
+from lib.interface.serializer_ifs import SerializerIfs
+
+
+class SerializerFactory:
+    logger = logging.getLogger(__name__)
+    __serializers = {}
+
+    @classmethod
+    def get_instance(cls, _type: Literal["auto", "stdlib", "orjson", "msgspec"] = None) -> SerializerIfs:
+        """
+        :param _type: JSON backend(기본: JSON_SERIALIZER 환경 변수, auto 면 orjson > msgspec > stdlib 중 설치된 것)
+        """
+        _type = _type or os.getenv("JSON_SERIALIZER", "auto")
+        if _type == "auto":
+            _type = next(
+                (name for name in ["orjson", "msgspec"] if importlib.util.find_spec(name) is not None),
+                "stdlib",
+            )
+        if _type not in cls.__serializers:
+            cls.logger.info(f"JSON serializer: {_type}")
+            match _type:
+                case "stdlib":
+                    from lib.serializer.stdlib_serializer import StdlibSerializer
+
+                    cls.__serializers[_type] = StdlibSerializer()
+                case "orjson":
+                    from lib.serializer.orjson_serializer import OrjsonSerializer
+
+                    cls.__serializers[_type] = OrjsonSerializer()
+                case "msgspec":
+                    from lib.serializer.msgspec_serializer import MsgspecSerializer
+
+                    cls.__serializers[_type] = MsgspecSerializer()
+                case _:
+                    raise NotImplementedError
+        return cls.__serializers[_type]
@@ -0,0 +1,14 @@
+from typing import Any
+
+import msgspec
+
+from lib.interface.serializer_ifs import SerializerIfs
+from lib.serializer.stdlib_serializer import to_builtin, to_stdlib_format
+
+
+class MsgspecSerializer(SerializerIfs):
+    def __init__(self):
+        self.__encoder = msgspec.json.Encoder(enc_hook=to_builtin)
+
+    def dumps(self, obj: Any) -> bytes:
+        return to_stdlib_format(self.__encoder.encode(obj))
@@ -0,0 +1,13 @@
+from typing import Any
+
+import orjson
+
+from lib.interface.serializer_ifs import SerializerIfs
+from lib.serializer.stdlib_serializer import to_builtin, to_stdlib_format
+
+
+class OrjsonSerializer(SerializerIfs):
+    OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any) -> bytes:
+        return to_stdlib_format(orjson.dumps(obj, default=to_builtin, option=self.OPTIONS))
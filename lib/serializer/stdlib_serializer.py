@@ -0,0 +1,68 @@
+import json
+import math
+import re
+from typing import Any
+
+import numpy as np
+
+from lib.interface.serializer_ifs import SerializerIfs
+
+
+class StdlibSerializer(SerializerIfs):
+    def __init__(self):
+        self.__encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, default=to_builtin)
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return self.__encoder.encode(obj).encode()
+        except ValueError:
+            # NaN/Infinity 가 있을 때만 null 로 바꿔 다시 직렬화한다.
+            return self.__encoder.encode(sanitize(obj)).encode()
+
+
+def to_builtin(obj: Any) -> Any:
+    """
+    json 이 직렬화하지 못하는 numpy 값을 python 값으로 바꾼다.
+    """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# 문자열 token(escape 된 따옴표 포함)
+STRING = re.compile(rb'("[^"\\]*(?:\\.[^"\\]*)*")')
+# stdlib 와 표기가 다른 float(지수 표기 1e16/1.5e-7, 0.00001)
+FLOAT = re.compile(rb"(?<![\d.])-?(?:\d+(?:\.\d+)?e[-+]?\d+|0\.0000\d+)")
+
+
+def to_stdlib_format(data: bytes) -> bytes:
+    """
+    공백 없는 JSON(orjson, msgspec 출력)을 json.dumps 기본 형식과 같은 bytes 로 바꾼다.
+    - 문자열 밖의 구분자 "," ":" 를 ", " ": " 로 바꾼다.
+    - 지수 표기 float 는 python repr 로 다시 쓴다. ex) 1e16 -> 1e+16, 0.00001 -> 1e-05
+    """
+    if b'\\"' in data:
+        # escape 된 따옴표가 있을 때만 정규식으로 문자열 token 을 나눈다(token 에 따옴표 포함).
+        tokens, quote = STRING.split(data), b""
+    else:
+        tokens, quote = data.split(b'"'), b'"'
+    # 짝수 번째가 문자열 밖이다. 한 번에 바꾸도록 JSON 에 나올 수 없는 NUL 로 이어 붙인다.
+    outer = b"\x00".join(tokens[::2]).replace(b",", b", ").replace(b":", b": ")
+    if b"e" in outer or b"0.0000" in outer:
+        outer = FLOAT.sub(lambda x: repr(float(x[0])).encode(), outer)
+    tokens[::2] = outer.split(b"\x00")
+    return quote.join(tokens)
+
+
+def sanitize(obj: Any) -> Any:
+    if isinstance(obj, (float, np.floating)):
+        return float(obj) if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: sanitize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [sanitize(value) for value in obj]
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return sanitize(to_builtin(obj))
+    return obj
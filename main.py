@@ -22,13 +22,43 @@ parser.add_argument(
     help="실행할 프로세서 정보: default = all",
     required=False,
 )
+parser.add_argument(
+    "--incremental",
+    action="store_true",
+    help="crawled data 가 바뀌지 않은 상품은 이전 Backup 결과를 재사용",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="상품 처리에 사용할 process 수: default = 1",
+    required=False,
+)
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="S3 chunk 업로드가 끝날 때마다 DB 반영 메시지를 보냄",
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="같은 날짜의 실패한 실행에서 끝난 단계는 건너뜀(CHECKPOINT_DIR 필요)",
+)
 if __name__ == "__main__":
     args = parser.parse_args()
     main_injector = MainInjector()
     main_injector.inject()
     logger = logging.getLogger(__name__)
     try:
-        engine = Engine(stage=args.stage, date=args.date, domain=args.domain)
+        engine = Engine(
+            stage=args.stage,
+            date=args.date,
+            domain=args.domain,
+            incremental=args.incremental,
+            workers=args.workers,
+            stream=args.stream,
+            resume=args.resume,
+        )
         res = engine.run()
         logger.info("Normal exit")
         exit(0)
@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import platform
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, List, Literal, Mapping, Sequence
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+from lib.aws.factory import ClientFactory
+from lib.db.factory import RepositoryFactory
+from lib.domain.factory import ProcessorFactory
+from lib.instrumentation.recorder import Recorder
+from lib.out.sender.db.db import DBSender
+from lib.out.sender.s3.s3 import S3Sender
+from profile.synthetic import MemoryRepository, crawled_events, crawled_products, write_backup
+
+# 실제 AWS/Mongo 대신 쓰는 moto(in-memory) 설정
+ENVIRONMENT = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "S3_BUCKET": "benchmark-result",
+    "S3_KEY": "transform",
+    "S3_BACKUP_BUCKET": "benchmark-backup",
+    "DB_QUEUE_NAME": "benchmark-db",
+    "MONGO_SERVICE_DB": "service",
+    "IMAGE_DOMAIN": "https://image.benchmark.test",
+}
+# 이전 실행(cold: 이전 데이터 없음)과 다음 날 실행(warm: cold 결과를 Backup 으로 사용)
+DATES = {"cold": datetime(2024, 1, 2), "warm": datetime(2024, 1, 3)}
+
+
+class Benchmark:
+    """
+    합성 데이터로 Processor 단계와 sender 를 돌려 단계 별 처리량/메모리를 재는 benchmark
+    - crawling DB 는 MemoryRepository, S3/SQS 는 moto 로 대신하므로 외부 서비스 없이 돌아간다.
+    - products 는 이전 데이터가 없는 cold 실행 결과를 Backup 으로 올린 뒤, 가격이 바뀐 다음 날 warm 실행을 한 번 더 한다.
+    - 단계 측정은 Recorder(instrumentation) span 을 그대로 쓴다.
+    """
+
+    def __init__(
+        self,
+        domain: Literal["events", "products"],
+        size: int,
+        workers: int = 1,
+        incremental: bool = False,
+        duplicate_ratio: float = 0.3,
+        seed: int = 0,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.__domain = domain
+        self.__size = size
+        self.__options = {"workers": workers, "incremental": incremental}
+        self.__duplicate_ratio = duplicate_ratio
+        self.__seed = seed
+
+    def run(self) -> Dict[str, Any]:
+        """
+        :return: {domain, size, options, seconds, stages: [단계 별 측정]}
+        """
+        # 실행 중에만 benchmark 설정을 쓰고, 끝나면 원래 환경 변수로 되돌린다.
+        with patch.dict(os.environ, ENVIRONMENT):
+            return self.__run()
+
+    def __run(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        stages = []
+        with mock_aws():
+            ClientFactory.clear()
+            s3 = boto3.client("s3")
+            s3.create_bucket(Bucket=os.getenv("S3_BUCKET"))
+            s3.create_bucket(Bucket=os.getenv("S3_BACKUP_BUCKET"))
+            boto3.client("sqs").create_queue(QueueName=os.getenv("DB_QUEUE_NAME"))
+            phases = ["cold", "warm"] if self.__domain == "products" else ["cold"]
+            for phase in phases:
+                result = self.__run_phase(phase)
+                stages.extend(summarize(phase, Recorder.records()))
+                Recorder.reset(enabled=True)
+                if phase == "cold" and "warm" in phases:
+                    # cold 결과 = warm 실행 날짜의 서비스 DB Backup
+                    write_backup(
+                        bucket=os.getenv("S3_BACKUP_BUCKET"),
+                        date=DATES["warm"],
+                        db_name=os.getenv("MONGO_SERVICE_DB"),
+                        rel_name=self.__domain,
+                        documents=iter(result["data"]),
+                    )
+                del result
+            ClientFactory.clear()
+        return {
+            "domain": self.__domain,
+            "size": self.__size,
+            "options": {**self.__options, "duplicate_ratio": self.__duplicate_ratio, "seed": self.__seed},
+            "seconds": round(time.perf_counter() - start, 3),
+            "stages": stages,
+        }
+
+    def __run_phase(self, phase: Literal["cold", "warm"]) -> Mapping[Literal["data"], Sequence[Mapping[str, Any]]]:
+        date = DATES[phase]
+        repository = MemoryRepository({self.__domain: lambda: self.__documents(phase)})
+        with patch.object(RepositoryFactory, "get_instance", lambda *args, **kwargs: repository):
+            processor = ProcessorFactory.get_instance(_type=self.__domain, **self.__options)
+        self.logger.info(f"Run {self.__domain}({self.__size}) {phase}")
+        result = processor.run(date=date)
+        chunks = S3Sender(run_id=f"benchmark-{phase}").send(self.__domain, result)
+        DBSender().send(
+            date=date,
+            db_name=os.getenv("MONGO_SERVICE_DB"),
+            rel_name=self.__domain,
+            data=chunks,
+            manifest=f"{os.getenv('S3_KEY')}/runs/benchmark-{phase}/{self.__domain}.manifest.json",
+        )
+        return result
+
+    def __documents(self, phase: Literal["cold", "warm"]):
+        if self.__domain == "events":
+            return crawled_events(self.__size, seed=self.__seed, date=DATES[phase])
+        return crawled_products(
+            self.__size, seed=self.__seed, duplicate_ratio=self.__duplicate_ratio, day=int(phase == "warm")
+        )
+
+
+def summarize(phase: str, records: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    :param records: Recorder 가 남긴 span 기록
+    :return: 단계 별 {phase, name, wall/cpu 초, row 수, 초당 row 수, RSS}
+    """
+    stages = []
+    for record in records:
+        rows = record["rows_in"] if record["rows_in"] is not None else record["rows_out"]
+        stage = {
+            "phase": phase,
+            "name": record["name"],
+            "wall_seconds": record["wall_seconds"],
+            "cpu_seconds": record["cpu_seconds"],
+            "rows_in": record["rows_in"],
+            "rows_out": record["rows_out"],
+            "rows_per_second": round(rows / record["wall_seconds"], 1) if rows and record["wall_seconds"] else None,
+            "max_rss_mb": record["max_rss_mb"],
+            "rss_growth_mb": record["rss_growth_mb"],
+        }
+        if "traced_delta_mb" in record:
+            stage["traced_delta_mb"] = record["traced_delta_mb"]
+        stages.append(stage)
+    return stages
+
+
+def run_case(domain: str, size: int, traced: bool = False, **kwargs) -> Dict[str, Any]:
+    """
+    새 process 에서 실행한다(최대 RSS 는 process 단위이므로 case 끼리 섞이지 않게 한다).
+    :param traced: True 면 tracemalloc 을 켜 단계 별 python 객체 메모리 증가량도 잰다.
+    """
+    if traced:
+        tracemalloc.start()
+    Recorder.reset(enabled=True)
+    return Benchmark(domain=domain, size=size, **kwargs).run()
+
+
+def parse_size(value: str) -> int:
+    """
+    :param value: 10000, 10k, 1m 형식
+    """
+    units = {"k": 1_000, "m": 1_000_000}
+    value = value.strip().lower()
+    if value[-1:] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def format_table(cases: Sequence[Mapping[str, Any]]) -> str:
+    lines = [
+        f"{'case':<18} {'phase':<5} {'stage':<34} {'wall(s)':>8} {'cpu(s)':>8} {'rows':>9} {'rows/s':>11} "
+        f"{'rss(MB)':>8} {'+rss(MB)':>8}"
+    ]
+    for case in cases:
+        name = f"{case['domain']}:{case['size']}"
+        for stage in case["stages"]:
+            rows = stage["rows_in"] if stage["rows_in"] is not None else stage["rows_out"]
+            lines.append(
+                f"{name:<18} {stage['phase']:<5} {stage['name']:<34} {stage['wall_seconds']:>8.3f} "
+                f"{stage['cpu_seconds']:>8.3f} {rows if rows is not None else '-':>9} "
+                f"{stage['rows_per_second'] or '-':>11} {stage['max_rss_mb']:>8.1f} {stage['rss_growth_mb']:>8.1f}"
+            )
+    return "\n".join(lines)
+
+
+parser = ArgumentParser(
+    prog="python -m profile.benchmark",
+    description="합성 데이터로 상품/이벤트 pipeline 단계 별 처리량과 메모리 측정(외부 서비스 불필요)",
+)
+parser.add_argument("--domain", choices=["events", "products"], nargs="+", default=["products", "events"])
+parser.add_argument("--size", type=parse_size, nargs="+", default=[10_000], help="document 수 ex) 10k 100k 1m")
+parser.add_argument("--workers", type=int, default=1, help="상품 처리에 사용할 process 수")
+parser.add_argument("--incremental", action="store_true", help="warm 실행에서 바뀌지 않은 상품은 이전 결과 재사용")
+parser.add_argument("--duplicate-ratio", type=float, default=0.3, help="다른 brand 에서 다시 파는 상품 비율")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--tracemalloc", action="store_true", help="단계 별 tracemalloc 증가량도 측정(느려짐)")
+parser.add_argument("--output", help="보고서(JSON) 경로")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="[%(asctime)s] (%(levelname)s) %(message)s")
+    cases = []
+    for domain in args.domain:
+        for size in args.size:
+            # case 마다 새 process(spawn) 에서 실행한다.
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                case = executor.submit(
+                    run_case,
+                    domain=domain,
+                    size=size,
+                    traced=args.tracemalloc,
+                    workers=args.workers,
+                    incremental=args.incremental,
+                    duplicate_ratio=args.duplicate_ratio,
+                    seed=args.seed,
+                ).result()
+            cases.append(case)
+            print(format_table([case]), flush=True)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "cases": cases,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
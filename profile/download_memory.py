@@ -0,0 +1,393 @@
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+from lib.aws.factory import ClientFactory
+from lib.db.factory import RepositoryFactory
+from lib.domain.product.processor import ProductProcessor
+from lib.downloader.s3_downloader import S3Downloader
+from profile.synthetic import service_products, write_backup
+
+ENVIRONMENT = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "S3_BACKUP_BUCKET": "profile-backup",
+    "MONGO_SERVICE_DB": "service",
+}
+DATE = datetime(2024, 1, 2)
+REL_NAME = "products"
+# 측정 대상
+# - download: 전체 필드 document stream
+# - download.projection: history 에 필요한 필드만 decode 한 document stream
+# - download_columns: history 컬럼만 컬럼 단위로 모으기
+# - previous: ProductProcessor 의 이전 서비스 데이터 DataFrame 만들기(__append_histories 입력)
+# - previous.incremental: incremental 실행의 이전 서비스 데이터(전체 컬럼)
+MODES = ["download", "download.projection", "download_columns", "previous", "previous.incremental"]
+
+
+class ObjectTimer:
+    """
+    S3 client 의 GetObject 호출마다 객체 별 요청 수, 받은 byte 수, 응답까지 걸린 시간을 모은다.
+    - botocore event hook 이므로 S3Downloader 코드는 그대로 둔다(body 를 읽는 시간은 포함하지 않는다).
+    """
+
+    def __init__(self, client):
+        self.__client = client
+        self.__lock = threading.Lock()
+        self.__objects: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"requests": 0, "bytes": 0, "seconds": 0.0})
+
+    def __enter__(self) -> "ObjectTimer":
+        events = self.__client.meta.events
+        events.register("before-parameter-build.s3.GetObject", self.__before, unique_id="profile-before")
+        events.register("after-call.s3.GetObject", self.__after, unique_id="profile-after")
+        return self
+
+    def __exit__(self, *args) -> bool:
+        events = self.__client.meta.events
+        events.unregister("before-parameter-build.s3.GetObject", unique_id="profile-before")
+        events.unregister("after-call.s3.GetObject", unique_id="profile-after")
+        return False
+
+    def objects(self, sizes: Mapping[str, int]) -> List[Dict[str, Any]]:
+        """
+        :param sizes: {key: 객체 byte 수}
+        :return: 객체 별 {key, size_mb, requests, seconds, mb_per_second}
+        """
+        result = []
+        for key, size in sizes.items():
+            metric = self.__objects.get(key, {"requests": 0, "bytes": 0, "seconds": 0.0})
+            result.append(
+                {
+                    "key": key,
+                    "size_mb": _mb(size),
+                    "requests": metric["requests"],
+                    "received_mb": _mb(metric["bytes"]),
+                    "seconds": round(metric["seconds"], 4),
+                    "mb_per_second": round(_mb(metric["bytes"]) / metric["seconds"], 2) if metric["seconds"] else None,
+                }
+            )
+        return result
+
+    def __before(self, params: dict, context: dict, **kwargs):
+        context["profile_key"] = params.get("Key")
+        context["profile_start"] = time.perf_counter()
+
+    def __after(self, parsed: dict, context: dict, **kwargs):
+        if "profile_start" not in context:
+            return
+        elapsed = time.perf_counter() - context["profile_start"]
+        with self.__lock:
+            metric = self.__objects[context["profile_key"]]
+            metric["requests"] += 1
+            metric["bytes"] += parsed.get("ContentLength", 0)
+            metric["seconds"] += elapsed
+
+
+class DownloadProfiler:
+    """
+    S3Downloader 와 이전 서비스 데이터(DataFrame) 만들기의 메모리/시간 측정
+    - moto(in-memory S3)에 생성한 BSON Backup 을 올린 뒤 mode 하나를 실행한다.
+    - 최대 RSS 는 Backup 을 올린 뒤 초기화(/proc/self/clear_refs)하고 측정한다(지원하지 않으면 process 전체 최대값).
+    - traced=True 면 tracemalloc 으로 python 객체 최대 사용량과 가장 많이 할당한 위치(top allocators)를 남긴다.
+    """
+
+    def __init__(
+        self,
+        documents: int,
+        histories: int = 30,
+        object_mb: float = 64,
+        traced: bool = False,
+        top: int = 15,
+        seed: int = 0,
+    ):
+        """
+        :param documents: Backup 상품 document 수
+        :param histories: 상품 별 history entry 수
+        :param object_mb: Backup 객체(.bson) 하나의 크기
+        """
+        self.logger = logging.getLogger(__name__)
+        self.__documents = documents
+        self.__histories = histories
+        self.__object_bytes = int(object_mb * 1024 * 1024)
+        self.__traced = traced
+        self.__top = top
+        self.__seed = seed
+
+    def run(self, mode: str) -> Dict[str, Any]:
+        if mode not in MODES:
+            self.logger.error(f"{mode} not in {MODES}")
+            raise RuntimeError(f"{mode} not in {MODES}")
+        # 실행 중에만 profile 설정을 쓰고, 끝나면 원래 환경 변수로 되돌린다.
+        with patch.dict(os.environ, ENVIRONMENT):
+            # snapshot 을 쓰면 Backup 을 읽지 않는다.
+            os.environ.pop("SNAPSHOT_DIR", None)
+            return self.__run(mode)
+
+    def __run(self, mode: str) -> Dict[str, Any]:
+        with mock_aws():
+            ClientFactory.clear()
+            boto3.client("s3").create_bucket(Bucket=os.getenv("S3_BACKUP_BUCKET"))
+            objects = write_backup(
+                bucket=os.getenv("S3_BACKUP_BUCKET"),
+                date=DATE,
+                db_name=os.getenv("MONGO_SERVICE_DB"),
+                rel_name=REL_NAME,
+                documents=service_products(self.__documents, histories=self.__histories, seed=self.__seed, date=DATE),
+                object_bytes=self.__object_bytes,
+            )
+            try:
+                return {
+                    "mode": mode,
+                    "traced": self.__traced,
+                    "backup": {
+                        "objects": len(objects),
+                        "documents": sum(x["documents"] for x in objects),
+                        "size_mb": _mb(sum(x["size"] for x in objects)),
+                    },
+                    **self.__measure(mode, {x["key"]: x["size"] for x in objects}),
+                }
+            finally:
+                ClientFactory.clear()
+
+    def __measure(self, mode: str, sizes: Mapping[str, int]) -> Dict[str, Any]:
+        gc.collect()
+        baseline_rss = _current_rss()
+        peak_reset = _reset_peak_rss()
+        baseline_peak = _peak_rss()
+        baseline = None
+        if self.__traced:
+            tracemalloc.start()
+            baseline = tracemalloc.take_snapshot()
+        sampler = _PeakSnapshot(self.__traced)
+        start, cpu = time.perf_counter(), time.process_time()
+        with ObjectTimer(ClientFactory.get_instance("s3")) as timer:
+            result, rows = self.__run_mode(mode, sampler)
+            seconds, cpu = time.perf_counter() - start, time.process_time() - cpu
+            sampler.sample(force=True)
+        report = {
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "cpu_seconds": round(cpu, 3),
+            "rows_per_second": round(rows / seconds, 1) if seconds else None,
+            "baseline_rss_mb": _mb(baseline_rss),
+            "peak_rss_mb": _mb(_peak_rss()),
+            # clear_refs 를 못 쓰면 Backup 생성 중 최대값보다 커진 만큼만 보인다.
+            "peak_rss_growth_mb": _mb(_peak_rss() - (baseline_rss if peak_reset else baseline_peak)),
+            "peak_rss_reset": peak_reset,
+            "objects": timer.objects(sizes),
+        }
+        if self.__traced:
+            report["traced_peak_mb"] = _mb(tracemalloc.get_traced_memory()[1])
+            report["top_allocators"] = self.__top_allocators(sampler.snapshot, baseline)
+            tracemalloc.stop()
+        del result
+        return report
+
+    def __run_mode(self, mode: str, sampler: "_PeakSnapshot"):
+        """
+        :return: (결과, row 수) 결과는 측정이 끝날 때까지 들고 있는다(DataFrame/컬럼 메모리 포함).
+        """
+        db_name = os.getenv("MONGO_SERVICE_DB")
+        match mode:
+            case "download" | "download.projection":
+                projection = ProductProcessor.HISTORY_COLUMNS if mode == "download.projection" else None
+                rows = 0
+                for _ in S3Downloader().download(db_name=db_name, rel_name=REL_NAME, date=DATE, projection=projection):
+                    rows += 1
+                    if rows % 1000 == 0:
+                        sampler.sample()
+                return None, rows
+            case "download_columns":
+                columns = S3Downloader().download_columns(
+                    db_name=db_name, rel_name=REL_NAME, date=DATE, projection=ProductProcessor.HISTORY_COLUMNS
+                )
+                return columns, len(columns["name"])
+            case _:
+                with patch.object(RepositoryFactory, "get_instance", lambda *args, **kwargs: None):
+                    processor = ProductProcessor(incremental=mode == "previous.incremental")
+                previous = processor._ProductProcessor__load_previous(DATE, names=[])
+                return (processor, previous), 0 if previous is None else len(previous)
+
+    def __top_allocators(
+        self, snapshot: Optional[tracemalloc.Snapshot], baseline: tracemalloc.Snapshot
+    ) -> List[Dict[str, Any]]:
+        if snapshot is None:
+            return []
+        # 측정 code 와 moto(S3 대신 쓰는 stand-in)의 할당은 뺀다.
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, tempfile.__file__),
+            tracemalloc.Filter(False, "*/moto/*"),
+        ]
+        stats = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "lineno")
+        return [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_mb": _mb(stat.size),
+                "size_diff_mb": _mb(stat.size_diff),
+                "count_diff": stat.count_diff,
+            }
+            for stat in sorted(stats, key=lambda x: x.size_diff, reverse=True)[: self.__top]
+        ]
+
+
+class _PeakSnapshot:
+    """
+    tracemalloc 사용량이 지금까지 본 것보다 10% 이상 커졌을 때만 snapshot 을 다시 찍어 최대 사용 시점에 가까운 snapshot 을 남긴다.
+    """
+
+    def __init__(self, traced: bool):
+        self.__traced = traced
+        self.__current = 0
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def sample(self, force: bool = False):
+        if not self.__traced:
+            return
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self.__current * 1.1 or (force and current >= self.__current):
+            self.__current = current
+            self.snapshot = tracemalloc.take_snapshot()
+
+
+def profile_mode(mode: str, **kwargs) -> Dict[str, Any]:
+    """
+    새 process(spawn) 에서 실행한다(mode 끼리 메모리가 섞이지 않게 한다).
+    """
+    return DownloadProfiler(**kwargs).run(mode)
+
+
+def compare(report: Mapping[str, Any], baseline: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """
+    :return: mode 별 baseline 대비 시간/최대 RSS/tracemalloc 최대값 변화
+    """
+    previous = {(x["mode"], x["traced"]): x for x in baseline["results"]}
+    rows = []
+    for result in report["results"]:
+        before = previous.get((result["mode"], result["traced"]))
+        if before is None:
+            continue
+        row = {"mode": result["mode"], "traced": result["traced"]}
+        for key in ["seconds", "peak_rss_growth_mb", "traced_peak_mb"]:
+            if key in result and key in before:
+                row[key] = {"before": before[key], "after": result[key], "diff": round(result[key] - before[key], 3)}
+        rows.append(row)
+    return rows
+
+
+def format_table(results: Sequence[Mapping[str, Any]]) -> str:
+    lines = [
+        f"{'mode':<22} {'traced':<6} {'rows':>9} {'seconds':>8} {'rows/s':>10} {'rss(MB)':>8} "
+        f"{'+peak rss(MB)':>13} {'traced peak(MB)':>15}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result['mode']:<22} {str(result['traced']):<6} {result['rows']:>9} {result['seconds']:>8.3f} "
+            f"{result['rows_per_second'] or '-':>10} {result['baseline_rss_mb']:>8.1f} "
+            f"{result['peak_rss_growth_mb']:>13.1f} {result.get('traced_peak_mb', '-'):>15}"
+        )
+    return "\n".join(lines)
+
+
+def _current_rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+def _peak_rss() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # linux 의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _reset_peak_rss() -> bool:
+    """
+    최대 RSS(VmHWM)를 현재 RSS 로 초기화한다(Linux 4.0+).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _mb(size: float) -> float:
+    return round(size / 1024 / 1024, 2)
+
+
+parser = ArgumentParser(
+    prog="python -m profile.download_memory",
+    description="이전 Backup(S3 BSON) 다운로드와 이전 서비스 데이터 만들기의 메모리/시간 측정(moto 사용)",
+)
+parser.add_argument("--mode", choices=MODES, nargs="+", default=MODES)
+parser.add_argument("--documents", type=int, default=50_000, help="Backup 상품 document 수")
+parser.add_argument("--histories", type=int, default=30, help="상품 별 history entry 수")
+parser.add_argument("--object-mb", type=float, default=64, help="Backup 객체 하나의 크기(MB)")
+parser.add_argument("--top", type=int, default=15, help="남길 top allocator 수")
+parser.add_argument("--no-tracemalloc", action="store_true", help="tracemalloc 측정(mode 별 한 번 더 실행)을 건너뜀")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--output", help="보고서(JSON) 경로")
+parser.add_argument("--baseline", help="비교할 이전 보고서(JSON) 경로")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="[%(asctime)s] (%(levelname)s) %(message)s")
+    config = {
+        "documents": args.documents,
+        "histories": args.histories,
+        "object_mb": args.object_mb,
+        "top": args.top,
+        "seed": args.seed,
+    }
+    results = []
+    for mode in args.mode:
+        # 시간/RSS 는 tracemalloc 없이 재고, tracemalloc 은 따로 한 번 더 실행해 잰다.
+        for traced in [False] if args.no_tracemalloc else [False, True]:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                results.append(executor.submit(profile_mode, mode, traced=traced, **config).result())
+            print(format_table(results[-1:]), flush=True)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        "environment": {
+            key: os.getenv(key) for key in ["S3_DOWNLOAD_WORKERS", "S3_DOWNLOAD_CHUNK_SIZE", "S3_DOWNLOAD_WINDOW"]
+        },
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+        print(json.dumps(report["comparison"], ensure_ascii=False, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,236 @@
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence
+
+from bson import encode
+
+from lib.aws.factory import ClientFactory
+from lib.interface.repository_ifs import RepositoryIfs
+
+# 편의점 brand id 와 spider 이름
+BRANDS = {1: "cu", 2: "gs25", 3: "seven_eleven", 4: "emart24", 5: "cspace"}
+MAKERS = ["롯데", "cj", "농심", "오리온", "빙그레", "해태", "동원", "오뚜기", "dm", "매일", "풀무원", "코카콜라"]
+ITEMS = [
+    "콜라",
+    "사이다",
+    "바나나우유",
+    "아메리카노",
+    "카페라떼",
+    "생수",
+    "맥주",
+    "소주",
+    "감자칩",
+    "초코쿠키",
+    "젤리",
+    "삼각김밥참치마요",
+    "도시락",
+    "컵라면",
+    "아이스크림콘",
+    "바디워시",
+    "물티슈",
+    "햇반",
+]
+FLAVORS = ["", "제로", "오리지널", "딸기", "초코", "매운맛", "순한맛", "라이트", "더블", "스페셜"]
+UNITS = [(1, 500, "ml"), (1, 2, "l"), (10, 500, "g"), (1, 3, "kg"), (1, 12, "입"), (1, 30, "p")]
+TAGS = ["음료", "커피음료", "가공유", "스낵", "과자류", "디저트", "아이스크림", "간편식사", "생활용품", "주류", "신상품"]
+# event id: 1+1(1), 2+1(2), 3+1(8), 할인(7), 기타
+EVENT_IDS = [1, 2, 7, 8, 3, 4]
+
+
+def product_name(idx: int, variant: int = 0) -> str:
+    """
+    :param idx: 상품 번호(같은 번호면 같은 상품)
+    :param variant: 같은 상품을 brand 마다 다르게 표기한 형식(0 이면 기본 형식)
+    :return: "제조사)이름맛 용량단위" 형식의 상품 이름(정제하면 variant 와 관계없이 같은 이름)
+    """
+    rng = random.Random(idx)
+    maker = MAKERS[idx % len(MAKERS)]
+    item = ITEMS[(idx // len(MAKERS)) % len(ITEMS)]
+    flavor = FLAVORS[(idx // (len(MAKERS) * len(ITEMS))) % len(FLAVORS)]
+    series = idx // (len(MAKERS) * len(ITEMS) * len(FLAVORS))
+    low, high, unit = UNITS[rng.randrange(len(UNITS))]
+    amount = rng.randint(low, high) * (10 if unit in {"ml", "g"} else 1)
+    name = f"{item}{flavor}{series or ''}"
+    match variant % 3:
+        case 1:
+            return f" {maker.upper()}){name} {amount}{unit.upper()} "
+        case 2:
+            return f"{maker}){name}  {amount} {unit}"
+        case _:
+            return f"{maker}){name} {amount}{unit}"
+
+
+def crawled_products(
+    size: int, seed: int = 0, duplicate_ratio: float = 0.3, day: int = 0, change_ratio: float = 0.1
+) -> Iterator[dict]:
+    """
+    CrawledProductSchema 형식의 상품
+    :param duplicate_ratio: 다른 brand 에서 이미 나온 상품을 다시 파는 document 비율
+    :param day: 0 이 아니면 change_ratio 만큼의 상품 가격/이벤트를 바꾼다(다음 날 crawling 결과)
+    """
+    rng = random.Random(seed)
+    products = 0
+    for idx in range(size):
+        if products and rng.random() < duplicate_ratio:
+            product, variant = rng.randrange(products), rng.randrange(1, 3)
+        else:
+            product, variant, products = products, 0, products + 1
+        brand = (product + variant) % len(BRANDS) + 1
+        changed = day and rng.random() < change_ratio
+        value = float(rng.randrange(5, 100) * 100 + (day * 100 if changed else 0))
+        discounted = value * 0.8 if rng.random() < 0.1 else None
+        events = [{"brand": brand, "id": rng.choice(EVENT_IDS)} for _ in range(rng.choice([0, 1, 1, 2]))]
+        if changed:
+            events = [{"brand": brand, "id": rng.choice(EVENT_IDS)}]
+        width = rng.randrange(100, 1000)
+        yield {
+            "crawled_info": {
+                "spider": BRANDS[brand],
+                "id": str(idx),
+                "url": f"https://{BRANDS[brand]}.test/products/{idx}",
+                "brand": brand,
+            },
+            "name": product_name(product, variant),
+            "description": None if rng.random() < 0.5 else f"{product_name(product)} 상품 설명",
+            "events": events,
+            "image": {
+                "thumb": f"s3://pyoniverse-image/images/products/{idx}.webp",
+                "others": [f"s3://pyoniverse-image/images/products/{idx}_1.webp"] if rng.random() < 0.3 else [],
+                "size": {"thumb": {"width": width, "height": width}, "others": [{"width": 1000, "height": 1000}]},
+            },
+            "price": {"value": value, "currency": 1, "discounted_value": discounted},
+            "discounted_price": discounted,
+            "category": rng.choice([None, None, 1, 2, 3, 4]),
+            "tags": rng.sample(TAGS, rng.randrange(0, 3)),
+        }
+
+
+def crawled_events(size: int, seed: int = 0, date: datetime = None) -> Iterator[dict]:
+    """
+    CrawledBrandEventSchema 형식의 brand 이벤트
+    """
+    rng = random.Random(seed)
+    start = int((date or datetime(2024, 1, 1)).timestamp())
+    for idx in range(size):
+        brand = rng.randrange(1, len(BRANDS) + 1)
+        yield {
+            "crawled_info": {
+                "spider": BRANDS[brand],
+                "id": str(idx),
+                "url": f"https://{BRANDS[brand]}.test/events/{idx}",
+                "brand": brand,
+            },
+            "start_at": start - rng.randrange(30) * 86400,
+            "end_at": start + rng.randrange(1, 60) * 86400,
+            "name": f"{rng.choice(ITEMS)} {rng.choice(['1+1', '2+1', '할인', '증정'])} 행사 {idx}",
+            "image": {
+                "thumb": f"s3://pyoniverse-image/images/events/{idx}.webp" if rng.random() < 0.95 else None,
+                "others": [f"s3://pyoniverse-image/images/events/{idx}_{x}.webp" for x in range(rng.randrange(3))],
+                "size": {},
+            },
+            "description": None if rng.random() < 0.3 else "행사 상품 구매 시 적용",
+        }
+
+
+def service_products(size: int, histories: int = 30, seed: int = 0, date: datetime = None) -> Iterator[dict]:
+    """
+    서비스 DB Backup 의 상품 document(ServiceProductSchema 형식)
+    :param histories: 상품 별 history entry 수(Backup 크기의 대부분을 차지한다)
+    :param date: 마지막 history 날짜
+    """
+    rng = random.Random(seed)
+    date = date or datetime(2024, 1, 2)
+    dates = [(date - timedelta(days=days)).strftime("%Y-%m-%d") for days in range(histories)][::-1]
+    for idx in range(size):
+        brands = [
+            {
+                "id": brand,
+                "price": {"value": float(rng.randrange(5, 100) * 100), "currency": 1, "discounted_value": None},
+                "events": [rng.choice(EVENT_IDS)] if rng.random() < 0.7 else [],
+            }
+            for brand in rng.sample(list(BRANDS), rng.randrange(1, 4))
+        ]
+        yield {
+            "status": 2,
+            "name": f"{product_name(idx)} #{idx}",
+            "category": rng.choice([None, 1, 2, 3, 4]),
+            "description": None if rng.random() < 0.5 else f"{product_name(idx)} 상품 설명",
+            "brands": brands,
+            "recommendation": {"products": [], "events": []},
+            "image": f"https://image.test/products/{idx}.webp",
+            "crawled_infos": [
+                {"spider": BRANDS[brand["id"]], "id": f"{idx}-{brand['id']}", "url": f"https://test/{idx}"}
+                for brand in brands
+            ],
+            "price": max(brand["price"]["value"] for brand in brands),
+            "best": {"brand": brands[0]["id"], "price": brands[0]["price"]["value"], "events": brands[0]["events"]},
+            "histories": [{"date": x, "brands": brands} for x in dates],
+            "fingerprint": f"{idx:032x}",
+        }
+
+
+class MemoryRepository(RepositoryIfs):
+    """
+    find_batches 를 호출할 때마다 generator 로 document 를 새로 만드는 in-memory repository
+    - 생성한 document 를 들고 있지 않으므로 측정한 메모리는 Processor 가 쓴 것만 남는다.
+    """
+
+    def __init__(self, documents: Mapping[str, Callable[[], Iterator[dict]]]):
+        """
+        :param documents: {rel_name: document generator 를 만드는 함수}
+        """
+        super().__init__(client=None, db_name="memory")
+        self.__documents = documents
+
+    def find_one(self, rel_name: str, *args, **kwargs) -> Optional[Mapping[str, Any]]:
+        return next(iter(self.__documents[rel_name]()), None)
+
+    def find(self, rel_name: str, *args, limit: int = None, **kwargs) -> List[Mapping[str, Any]]:
+        return list(islice(self.__documents[rel_name](), limit))
+
+    def find_batches(self, rel_name: str, *args, batch_size: int = 1000, **kwargs) -> Iterator[List[Mapping[str, Any]]]:
+        batch = []
+        for doc in self.__documents[rel_name]():
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def distinct(self, rel_name: str, attr_name: str, *args, **kwargs) -> List[Any]:
+        return list(dict.fromkeys(doc[attr_name] for doc in self.__documents[rel_name]()))
+
+
+def write_backup(
+    bucket: str,
+    date: datetime,
+    db_name: str,
+    rel_name: str,
+    documents: Iterator[Mapping[str, Any]],
+    object_bytes: int = 64 * 1024 * 1024,
+) -> Sequence[Dict[str, Any]]:
+    """
+    S3Downloader 가 읽는 {date}/{db_name}/{rel_name}*.bson Backup 을 object_bytes 크기 객체로 나눠 올린다.
+    :param date: Backup 날짜(실행 날짜)
+    :return: 올린 객체 [{key, size, documents}]
+    """
+    client = ClientFactory.get_instance("s3")
+    prefix = f"{date.strftime('%Y-%m-%d')}/{db_name}/{rel_name}"
+    objects, buffer, size, count = [], [], 0, 0
+
+    def flush():
+        key = f"{prefix}_{len(objects)}.bson" if objects else f"{prefix}.bson"
+        ClientFactory.get_requester().call(client, "put_object", Bucket=bucket, Key=key, Body=b"".join(buffer))
+        objects.append({"key": key, "size": size, "documents": count})
+
+    for doc in documents:
+        buffer.append(encode(doc))
+        size, count = size + len(buffer[-1]), count + 1
+        if size >= object_bytes:
+            flush()
+            buffer, size, count = [], 0, 0
+    if buffer or not objects:
+        flush()
+    return objects
@@ -0,0 +1,116 @@
+import threading
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+@pytest.fixture
+def factory(monkeypatch):
+    from lib.aws.factory import ClientFactory
+
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    ClientFactory.clear()
+    with mock_aws():
+        yield ClientFactory
+    ClientFactory.clear()
+
+
+def test_client_factory(factory, monkeypatch):
+    # given
+    monkeypatch.setenv("S3_UPLOAD_WORKERS", "24")
+    clients = []
+    # when
+    threads = [threading.Thread(target=lambda: clients.append(factory.get_instance("s3"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # then
+    assert len({id(client) for client in clients}) == 1
+    assert clients[0].meta.config.max_pool_connections == 24
+    assert factory.get_instance("s3", region="ap-northeast-2") is not clients[0]
+    assert factory.get_instance("s3", region="ap-northeast-2").meta.region_name == "ap-northeast-2"
+    monkeypatch.setenv("AWS_MAX_POOL_CONNECTIONS", "50")
+    assert factory.get_instance("sqs").meta.config.max_pool_connections == 50
+
+
+def test_queue_url(factory, monkeypatch):
+    # given
+    queue_url = boto3.client("sqs").create_queue(QueueName="db")["QueueUrl"]
+    client = factory.get_instance("sqs")
+    calls = []
+    get_queue_url = client.get_queue_url
+    monkeypatch.setattr(client, "get_queue_url", lambda **kwargs: calls.append(kwargs) or get_queue_url(**kwargs))
+    # when
+    urls = [factory.get_queue_url("db") for _ in range(3)]
+    # then
+    assert urls == [queue_url] * 3
+    assert calls == [{"QueueName": "db"}]
+
+
+def test_rate_limiter(monkeypatch):
+    from lib.aws.limiter import RateLimiter
+
+    # given
+    limiter = RateLimiter(max_rate=0)
+    # when & then: throttle 전에는 제한하지 않고, throttle 이면 관측 rate 의 절반부터 다시 늘린다.
+    assert limiter.rate == 0
+    limiter.on_throttle(observed_rate=40)
+    assert limiter.rate == 20
+    for _ in range(10):
+        limiter.on_success()
+    assert 20 < limiter.rate < 23
+    limiter.on_throttle(observed_rate=100)
+    assert 10 < limiter.rate < 11.5
+    # rate 만큼만 token 을 내준다.
+    sleeps = []
+    monkeypatch.setattr("lib.aws.limiter.time.sleep", lambda x: sleeps.append(x))
+    for _ in range(3):
+        limiter.acquire()
+    assert sleeps and all(0 < x <= 1 / 10 for x in sleeps)
+
+
+def test_requester():
+    from types import SimpleNamespace
+
+    from botocore.exceptions import ClientError
+
+    from lib.aws.requester import Requester
+
+    # given
+    def error(code: str, status: int) -> ClientError:
+        return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "PutObject")
+
+    class FakeClient:
+        meta = SimpleNamespace(service_model=SimpleNamespace(service_name="s3"))
+
+        def __init__(self, errors):
+            self.errors = list(errors)
+
+        def put_object(self, **kwargs):
+            if self.errors:
+                raise self.errors.pop(0)
+            return kwargs
+
+    requester = Requester(max_attempts=4, retry_budget=3, base_delay=0)
+    # when & then: throttle/일시적 오류는 다시 시도한다.
+    client = FakeClient([error("SlowDown", 503), error("InternalError", 500)])
+    assert requester.call(client, "put_object", Key="a") == {"Key": "a"}
+    # 다시 시도할 수 없는 오류는 바로 실패
+    with pytest.raises(ClientError):
+        requester.call(FakeClient([error("AccessDenied", 403)]), "put_object", Key="b")
+    # 재시도 예산을 다 쓰면 실패
+    with pytest.raises(ClientError):
+        requester.call(FakeClient([error("SlowDown", 503)] * 3), "put_object", Key="c")
+    metrics = requester.metrics()["s3.put_object"]
+    assert {key: metrics[key] for key in ["requests", "throttles", "retries", "errors"]} == {
+        "requests": 6,
+        "throttles": 3,
+        "retries": 3,
+        "errors": 2,
+    }
+    assert metrics["rps"] > 0 and metrics["rate_limit"] >= 1
+    # 한 번도 호출하지 않는 설정은 받지 않는다.
+    with pytest.raises(AttributeError):
+        Requester(max_attempts=0)
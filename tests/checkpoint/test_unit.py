@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+from pandas import DataFrame
+
+
+def test_checkpoint_resume(tmp_path):
+    from lib.checkpoint.checkpoint_store import CheckpointStore
+
+    # given
+    date = datetime(2024, 1, 2)
+    calls = []
+
+    def stage(name: str, value):
+        def fn():
+            calls.append(name)
+            return value
+
+        return fn
+
+    first = CheckpointStore(directory=str(tmp_path)).checkpoint(date, "products", options={"workers": 1})
+    first.stage("preprocess", stage("preprocess", DataFrame({"name": ["a", "b"]})))
+    first.stage("process", stage("process", [1, 2]))
+    # when: 모두 저장된 단계는 실행하지 않는다.
+    calls.clear()
+    resumed = CheckpointStore(directory=str(tmp_path), resume=True).checkpoint(date, "products", options={"workers": 1})
+    preprocessed = resumed.stage("preprocess", stage("preprocess", None))
+    processed = resumed.stage("process", stage("process", None))
+    # then
+    assert calls == []
+    assert preprocessed.equals(DataFrame({"name": ["a", "b"]})) and processed == [1, 2]
+    assert resumed.restored == ["preprocess", "process"]
+    # 옵션이 바뀌면 처음부터 다시 실행하고, 앞 단계 결과가 바뀌면 뒤 단계도 다시 실행한다.
+    changed = CheckpointStore(directory=str(tmp_path), resume=True).checkpoint(date, "products", options={"workers": 2})
+    changed.stage("preprocess", stage("preprocess", DataFrame({"name": ["c"]})))
+    changed.stage("process", stage("process", [3]))
+    assert calls == ["preprocess", "process"] and changed.restored == []
+    # resume 이 아니면 저장만 하고 다시 실행한다.
+    calls.clear()
+    CheckpointStore(directory=str(tmp_path)).checkpoint(date, "products", options={"workers": 2}).stage(
+        "preprocess", stage("preprocess", DataFrame({"name": ["c"]}))
+    )
+    assert calls == ["preprocess"]
+
+
+def test_checkpoint_store_run_id(tmp_path):
+    from lib.checkpoint.checkpoint_store import CheckpointStore
+
+    # given
+    date = datetime(2024, 1, 2)
+    # when
+    run_id = CheckpointStore(directory=str(tmp_path)).run_id(date)
+    resumed = CheckpointStore(directory=str(tmp_path), resume=True).run_id(date)
+    CheckpointStore(directory=str(tmp_path)).clear(date)
+    # then
+    assert run_id.startswith("2024-01-02-") and resumed == run_id
+    assert CheckpointStore(directory=str(tmp_path), resume=True).run_id(date) != run_id
+    assert CheckpointStore(directory="").checkpoint(date, "products") is None
+    with pytest.raises(RuntimeError):
+        CheckpointStore(directory="", resume=True)
+
+
+def test_processor_checkpoint(tmp_path):
+    from lib.checkpoint.checkpoint_store import CheckpointStore
+    from lib.interface.processor_ifs import ProcessorIfs
+
+    # given
+    calls, failures = [], [RuntimeError("fail")]
+
+    class FakeProcessor(ProcessorIfs):
+        def _preprocess(self, date, *args, **kwargs):
+            calls.append("preprocess")
+            return DataFrame({"name": ["a", "b"]})
+
+        def _process(self, data, date, *args, **kwargs):
+            calls.append("process")
+            data["length"] = self._stage("process.length", lambda: data["name"].str.len())
+            return data
+
+        def _postprocess(self, data, date, *args, **kwargs):
+            calls.append("postprocess")
+            if failures:
+                raise failures.pop()
+            return data.to_dict("records")
+
+    date = datetime(2024, 1, 2)
+    with pytest.raises(RuntimeError):
+        FakeProcessor("fake").run(date, checkpoint=CheckpointStore(str(tmp_path)).checkpoint(date, "fake"))
+    # when
+    calls.clear()
+    result = FakeProcessor("fake").run(
+        date, checkpoint=CheckpointStore(str(tmp_path), resume=True).checkpoint(date, "fake")
+    )
+    # then
+    assert calls == ["postprocess"]
+    assert result == {"data": [{"name": "a", "length": 1}, {"name": "b", "length": 1}]}
@@ -22,3 +22,18 @@ def test_mongo_repository(env):
     )
     # then
     assert cu_data is not None
+
+
+def test_mongo_repository_find_batches(env):
+    from lib.db.mongo_repository import MongoRepository
+
+    # given
+    db_name = "constant"
+    rel_name = "brands"
+    client = MongoClient(os.getenv("MONGO_URI"))
+    repository = MongoRepository(client=client, db_name=db_name)
+    # when
+    batches = list(repository.find_batches(rel_name=rel_name, project={"slug": True}, batch_size=2))
+    # then
+    assert batches and all(0 < len(batch) <= 2 for batch in batches)
+    assert sum(batches, []) == repository.find(rel_name=rel_name, project={"slug": True})
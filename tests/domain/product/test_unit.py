@@ -1,3 +1,4 @@
+import copy
 from datetime import datetime
 
 import pytest
@@ -55,3 +56,313 @@ def test_erase_default_image(env, date):
     images = DataFrame(data)["image"]
     # then
     assert images.map(lambda x: "/".join(x.split("/")[-2:]) not in default_images).all(bool_only=True)
+
+
+def test_category_classifier():
+    from lib.domain.product.classifier import CATEGORY_NAME_MAP, CategoryClassifier, KeywordAutomaton
+
+    # given
+    keywords = [keyword for keywords in CATEGORY_NAME_MAP.values() for keyword in keywords]
+    automaton = KeywordAutomaton(keywords)
+    classifier = CategoryClassifier()
+    names = ["삼각김밥참치마요", "바나나우유 240ml", "돼지바", "스타킹 바디워시", "이름없음"]
+    # when & then
+    for name in names:
+        assert automaton.search(name) == {idx for idx, keyword in enumerate(keywords) if keyword in name}
+    assert classifier.classify([None] * 5, [[]] * 5, names) == [8, 1, 4, 12, None]
+    # tag 와 기존 카테고리도 투표에 참여한다.
+    assert classifier.classify_one(3, ["음료"], "삼각김밥") == 8
+    assert classifier.classify_one(3, ["스낵"], "이름없음") == 3
+
+
+def test_name_normalizer():
+    from lib.domain.product.normalizer import NameNormalizer
+
+    # given
+    normalizer = NameNormalizer(maxsize=4)
+    names = Series([" [CU]바나나우유 240ML ", "{농심}신라면컵 65 g", "콜라 1.5l (dm)", "물티슈 10입 2p", "이름만", "콜라 1.5l (dm)"])
+    expected = ["(cu)바나나우유 (240.0ml)", "(농심)신라면컵 (65.0g)", "콜라 (덴마크)(1.5l)", "물티슈 (10.0입)", "이름만", "콜라 (덴마크)(1.5l)"]
+    # when & then
+    assert normalizer.normalize(names).tolist() == expected
+    # 최근에 쓴 이름 maxsize 개만 남는다.
+    assert list(normalizer.memo()) == ["{농심}신라면컵 65 g", "콜라 1.5l (dm)", "물티슈 10입 2p", "이름만"]
+    result = normalizer.normalize(names[::-1])
+    assert result.tolist() == expected[::-1] and result.index.tolist() == names.index[::-1].tolist()
+    # 저장한 memo 로 만든 정제기도 같은 결과
+    restored = NameNormalizer(maxsize=4)
+    restored.update(normalizer.memo())
+    assert restored.memo() == normalizer.memo()
+    assert restored.normalize(names).tolist() == expected
+
+
+@pytest.fixture
+def offline_processor(monkeypatch):
+    from lib.db.factory import RepositoryFactory
+
+    monkeypatch.setattr(RepositoryFactory, "get_instance", lambda *args, **kwargs: None)
+    return ProductProcessor()
+
+
+def test_merge(offline_processor):
+    # given
+    nan = float("nan")
+    data = DataFrame(
+        {
+            "name": ["b", "a", "b", "c"],
+            "crawled_info": [{"id": "1"}, {"id": "2"}, {"id": "3"}, {"id": "4"}],
+            "description": [None, "x", nan, "y"],
+            "events": [[{"id": 1}], [{"id": 2}], [{"id": 3}], []],
+            "image": [{}, {}, {}, {}],
+            "price": [{}, {}, {}, {}],
+            "category": [1.0, nan, 2.0, nan],
+        }
+    )
+    # when
+    data = offline_processor._ProductProcessor__merge(data)
+    # then
+    assert data["name"].tolist() == ["a", "b", "c"]
+    assert data["crawled_info"].tolist() == [[{"id": "2"}], [{"id": "1"}, {"id": "3"}], [{"id": "4"}]]
+    assert data["description"].tolist() == [["x"], [], ["y"]]
+    assert data["events"].tolist() == [[{"id": 2}], [{"id": 1}, {"id": 3}], []]
+    assert data["category"].tolist() == [[], [1.0, 2.0], []]
+
+
+def test_get_largest_images(offline_processor, monkeypatch):
+    # given
+    offline_processor._ProductProcessor__image_domain = "https://image.test"
+    default_image = "s3://bucket/images/products/be780835fd93417525fe2304be3b8c917902348d.webp"
+    images = Series(
+        [
+            [
+                {
+                    "thumb": "s3://bucket/images/products/small.webp",
+                    "others": ["s3://bucket/images/products/large.webp"],
+                    "size": {"thumb": {"width": 10, "height": 10}, "others": [{"width": 20, "height": 20}]},
+                },
+                {"thumb": default_image, "others": [], "size": {"thumb": {"width": 50, "height": 50}}},
+            ],
+            [{"thumb": default_image, "others": [], "size": {"thumb": {"width": 50, "height": 50}}}],
+            [{"thumb": None, "others": [], "size": {}}],
+        ]
+    )
+    # when
+    result = offline_processor._ProductProcessor__get_largest_images(images)
+    # then
+    assert result.tolist() == ["https://image.test/products/large.webp", None, None]
+
+
+def crawled_product(_id: str, name: str, brand: int, value: float) -> dict:
+    return {
+        "crawled_info": {"spider": f"spider{brand}", "id": _id, "url": f"https://test/{_id}", "brand": brand},
+        "name": name,
+        "description": None,
+        "events": [{"brand": brand, "id": 1}],
+        "image": {
+            "thumb": f"s3://bucket/images/products/{_id}.webp",
+            "others": [],
+            "size": {"thumb": {"width": 10, "height": 10}},
+        },
+        "price": {"value": value, "currency": 1, "discounted_value": None},
+        "discounted_price": None,
+        "category": 1,
+        "tags": [],
+    }
+
+
+def download_columns(backup: list):
+    def download(self, *args, projection: list, **kwargs) -> dict:
+        return {key: [copy.deepcopy(x.get(key)) for x in backup] for key in projection}
+
+    return download
+
+
+def test_incremental_process(offline_processor, monkeypatch, date):
+    from lib.domain.product import processor
+
+    # given
+    backup = []
+    monkeypatch.setenv("IMAGE_DOMAIN", "https://image.test")
+    monkeypatch.setattr(processor.Downloader, "download_columns", download_columns(backup))
+    crawled = [
+        crawled_product("1", "콜라 500ml", 1, 1000.0),
+        crawled_product("2", "콜라 500ml", 2, 1200.0),
+        crawled_product("3", "사이다 500ml", 1, 1100.0),
+        crawled_product("4", "사이다 500ml", 2, 1150.0),
+    ]
+
+    def run(incremental: bool, data: list, workers: int = 1) -> list:
+        product_processor = ProductProcessor(incremental=incremental, workers=workers)
+        data = DataFrame(copy.deepcopy(data))
+        return product_processor._postprocess(product_processor._process(data, date), date)
+
+    backup.extend(run(False, crawled))
+    crawled[2]["price"]["value"] = 900.0
+    # when
+    full = run(False, crawled)
+    incremental = run(True, crawled)
+    parallel = run(True, crawled, workers=2)
+    # then
+    # 사이다(변경) -> 다시 처리, 콜라(유지) -> 이전 결과 재사용
+    assert [x["name"] for x in full] == ["사이다 (500.0ml)", "콜라 (500.0ml)"]
+    assert full[0]["fingerprint"] != backup[0]["fingerprint"]
+    assert full[1]["fingerprint"] == backup[1]["fingerprint"]
+    assert full == incremental == parallel
+
+
+def test_preprocess_batches(offline_processor, date):
+    # given
+    crawled = [crawled_product(str(idx), f"상품{idx}", 1, 1000.0) for idx in range(5)]
+    crawled[0]["category"] = None
+
+    class Repository:
+        def find_batches(self, batch_size: int, *args, **kwargs):
+            for idx in range(0, len(crawled), batch_size):
+                yield copy.deepcopy(crawled[idx : idx + batch_size])
+
+    offline_processor._ProductProcessor__repository = Repository()
+    offline_processor._ProductProcessor__batch_size = 2
+    # when
+    data = offline_processor._preprocess(date=date)
+    # then
+    expected = DataFrame(copy.deepcopy(crawled))
+    assert data.equals(expected)
+
+
+def test_parallel_process(offline_processor, monkeypatch, date):
+    from lib.domain.product import processor
+
+    # given
+    monkeypatch.setenv("IMAGE_DOMAIN", "https://image.test")
+    monkeypatch.setattr(processor.Downloader, "download_columns", download_columns([]))
+    crawled = [crawled_product(str(idx), f"상품{idx % 5} 500ml", idx % 3 + 1, 1000.0 + idx) for idx in range(12)]
+
+    def run(workers: int, isolated: bool = False) -> DataFrame:
+        product_processor = ProductProcessor(workers=workers, isolated=isolated)
+        return product_processor._process(DataFrame(copy.deepcopy(crawled)), date)
+
+    # when
+    serial = run(1)
+    parallel = run(3)
+    isolated = run(1, isolated=True)
+    # then
+    assert serial["name"].tolist() == [f"상품{idx} (500.0ml)" for idx in range(5)]
+    assert parallel.equals(serial)
+    assert isolated.equals(serial)
+
+
+@pytest.mark.parametrize("workers, isolated", [(1, True), (2, False)])
+def test_parallel_instrumentation(offline_processor, monkeypatch, date, workers, isolated):
+    from lib.domain.product import processor
+    from lib.instrumentation.recorder import Recorder
+
+    # given
+    monkeypatch.setenv("IMAGE_DOMAIN", "https://image.test")
+    monkeypatch.setattr(processor.Downloader, "download_columns", download_columns([]))
+    crawled = [crawled_product(str(idx), f"상품{idx % 5} 500ml", idx % 3 + 1, 1000.0 + idx) for idx in range(12)]
+    Recorder.reset(enabled=True)
+    # when
+    try:
+        ProductProcessor(workers=workers, isolated=isolated)._process(DataFrame(crawled), date)
+        records = Recorder.records()
+    finally:
+        Recorder.reset()
+    # then
+    stages = ["filter", "fill", "normalize", "merge", "post_merge"]
+    spans = [x for x in records if x["name"] in {f"products.process.{stage}" for stage in stages}]
+    assert {x["name"] for x in spans} == {f"products.process.{stage}" for stage in stages}
+    assert {x["parent"] for x in spans} == {"products.process.transform"}
+    assert sum(x["rows_out"] for x in spans if x["name"] == "products.process.merge") == 5
+    assert {x["partition"] for x in spans} == set(range(workers))
+
+
+def test_history_store():
+    from lib.domain.product.history import HistoryStore
+
+    # given
+    def brands(value: float, events: list) -> list:
+        return [{"id": 1, "price": {"value": value, "currency": 1, "discounted_value": None}, "events": events}]
+
+    daily = [
+        {"date": "2024-01-01", "brands": brands(1000.0, [1])},
+        {"date": "2024-01-02", "brands": brands(1000.0, [1])},
+        {"date": "2024-01-03", "brands": brands(900.0, [1])},
+        {"date": "2024-01-04", "brands": brands(900.0, [])},
+    ]
+    histories = Series([daily, float("nan"), []], index=[3, 4, 5])
+    previous_brands = Series([brands(900.0, []), float("nan"), brands(800.0, [])], index=[3, 4, 5])
+    date = datetime(2024, 1, 5)
+    # when
+    result = HistoryStore().append(histories, previous_brands, date)
+    compacted = HistoryStore(retention_days=2).append(histories, previous_brands, date)
+    # then
+    assert result.index.tolist() == [3, 4, 5]
+    assert [x["date"] for x in result[3]] == ["2024-01-01", "2024-01-03", "2024-01-04"]
+    assert result[4] == [] and result[5] == [{"date": "2024-01-05", "brands": brands(800.0, [])}]
+    assert HistoryStore.expand(result[3], until=date) == daily + [{"date": "2024-01-05", "brands": brands(900.0, [])}]
+    assert compacted[3] == [{"date": "2024-01-03", "brands": brands(900.0, [1])}, result[3][-1]]
+    assert HistoryStore.expand(compacted[3], until=date) == HistoryStore.expand(result[3], until=date)[2:]
+
+
+def test_snapshot_process(offline_processor, monkeypatch, tmp_path):
+    from lib.domain.product import processor
+
+    # given
+    backup = []
+    monkeypatch.setenv("IMAGE_DOMAIN", "https://image.test")
+    monkeypatch.setattr(processor.Downloader, "download_columns", download_columns(backup))
+    crawled = [
+        crawled_product("1", "콜라 500ml", 1, 1000.0),
+        crawled_product("2", "사이다 500ml", 2, 1200.0),
+    ]
+
+    def run(date: datetime) -> list:
+        product_processor = ProductProcessor()
+        data = product_processor._process(DataFrame(copy.deepcopy(crawled)), date)
+        data = product_processor._postprocess(data, date)
+        product_processor.save_snapshot(date)
+        return data
+
+    backup.extend(run(datetime(2024, 1, 1)))
+    crawled[1]["price"]["value"] = 1100.0
+    expected = run(datetime(2024, 1, 2))
+    # when
+    backup.clear()
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path))
+    crawled[1]["price"]["value"] = 1200.0
+    run(datetime(2024, 1, 1))
+    crawled[1]["price"]["value"] = 1100.0
+    result = run(datetime(2024, 1, 2))
+    # then
+    assert (tmp_path / "products.arrow").exists()
+    assert result == expected
+    # 이름 정제 memo 도 저장해 다음 실행에서 다시 쓴다.
+    memo = ProductProcessor()._ProductProcessor__normalizer.memo()
+    assert memo == {"콜라 500ml": "콜라 (500.0ml)", "사이다 500ml": "사이다 (500.0ml)"}
+
+
+def test_snapshot_references(offline_processor, monkeypatch, tmp_path, date):
+    from lib.domain.product import processor
+
+    # given
+    backup = [{"name": "콜라 (500.0ml)", "crawled_infos": [], "brands": [], "histories": [], "image": None}]
+    monkeypatch.setenv("IMAGE_DOMAIN", "https://image.test")
+    monkeypatch.setattr(processor.Downloader, "download_columns", download_columns(backup))
+    crawled = [crawled_product("1", "콜라 500ml", 1, 1000.0)]
+
+    def run() -> ProductProcessor:
+        product_processor = ProductProcessor()
+        product_processor._postprocess(product_processor._process(DataFrame(copy.deepcopy(crawled)), date), date)
+        return product_processor
+
+    # when & then: snapshot 을 쓰지 않으면 이전 데이터/결과를 들고 있지 않는다.
+    product_processor = run()
+    assert product_processor._ProductProcessor__previous is None
+    assert product_processor._ProductProcessor__result is None
+    # snapshot 을 쓰면 save_snapshot 까지만 들고 있는다.
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path))
+    product_processor = run()
+    assert product_processor._ProductProcessor__previous is not None
+    assert product_processor._ProductProcessor__result is not None
+    product_processor.save_snapshot(date)
+    assert product_processor._ProductProcessor__previous is None
+    assert product_processor._ProductProcessor__result is None
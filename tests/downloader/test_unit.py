@@ -0,0 +1,116 @@
+import json
+from datetime import datetime
+
+from pandas import DataFrame
+
+from lib.downloader.snapshot_store import SnapshotStore
+
+
+def test_snapshot_store(tmp_path):
+    # given
+    store = SnapshotStore(directory=str(tmp_path))
+    data = DataFrame(
+        {
+            "name": ["콜라", "사이다"],
+            "brands": [[{"id": 1, "events": [1]}], [{"id": 2, "events": []}]],
+            "category": [1, None],
+        }
+    )
+    store.write(rel_name="products", date=datetime(2024, 1, 1), data=data)
+    # when
+    table = store.read(rel_name="products", date=datetime(2024, 1, 2))
+    # then
+    assert table.to_pylist() == [
+        {"name": "사이다", "brands": [{"id": 2, "events": []}], "category": None},
+        {"name": "콜라", "brands": [{"id": 1, "events": [1]}], "category": 1},
+    ]
+    # 전날 snapshot 이 아니면 사용하지 않는다.
+    assert store.read(rel_name="products", date=datetime(2024, 1, 3)) is None
+    assert SnapshotStore(directory="").read(rel_name="products", date=datetime(2024, 1, 2)) is None
+    # 내용이 바뀌면 사용하지 않는다.
+    meta = json.loads((tmp_path / "products.json").read_text())
+    (tmp_path / "products.json").write_text(json.dumps({**meta, "sha256": "0" * 64}))
+    assert store.read(rel_name="products", date=datetime(2024, 1, 2)) is None
+
+
+def test_s3_downloader_ranged(monkeypatch):
+    import boto3
+    from bson import encode
+    from moto import mock_aws
+
+    from lib.aws.factory import ClientFactory
+    from lib.downloader.s3_downloader import S3Downloader
+
+    # given
+    ClientFactory.clear()
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("S3_BACKUP_BUCKET", "backup")
+    monkeypatch.setenv("S3_DOWNLOAD_CHUNK_SIZE", "64")
+    monkeypatch.setenv("S3_DOWNLOAD_WORKERS", "3")
+    documents = [{"name": f"상품{idx}", "brands": [{"id": idx % 3, "events": [1] * (idx % 5)}]} for idx in range(50)]
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="backup")
+        prefix = "2024-01-01/service/products"
+        s3.put_object(Bucket="backup", Key=f"{prefix}/products.bson", Body=b"".join(map(encode, documents[:30])))
+        s3.put_object(Bucket="backup", Key=f"{prefix}/products.metadata.json", Body=b"{}")
+        s3.put_object(Bucket="backup", Key=f"{prefix}/products_1.bson", Body=b"".join(map(encode, documents[30:])))
+        s3.put_object(Bucket="backup", Key=f"{prefix}/products_2.bson", Body=b"")
+        downloader = S3Downloader()
+        date = datetime(2024, 1, 1)
+        # when
+        data = downloader.download(db_name="service", rel_name="products", date=date)
+        projected = downloader.download(db_name="service", rel_name="products", date=date, projection=["brands"])
+        columns = downloader.download_columns(
+            db_name="service", rel_name="products", date=date, projection=["name", "brands", "histories"]
+        )
+        # then
+        assert list(data) == documents
+        assert list(projected) == [{"brands": x["brands"]} for x in documents]
+        assert columns == {
+            "name": [x["name"] for x in documents],
+            "brands": [x["brands"] for x in documents],
+            "histories": [None] * len(documents),
+        }
+
+
+def test_project_bson():
+    import re
+
+    from bson import Binary, Decimal128, Int64, ObjectId, Regex, decode, encode
+
+    from lib.downloader.s3_downloader import _project
+
+    # given
+    document = {
+        "_id": ObjectId(),
+        "created_at": datetime(2024, 1, 1),
+        "description": None,
+        "best": {"price": 1000.0, "events": [1, 2]},
+        "flag": True,
+        "count": Int64(2**40),
+        "raw": Binary(b"\x00\x01"),
+        "pattern": Regex("^a", re.IGNORECASE),
+        "decimal": Decimal128("1.5"),
+        "name": "콜라",
+        "brands": [{"id": 1}],
+    }
+    data = b"\x00" + encode(document)
+    # when
+    projected = decode(_project(data, 1, len(data), {b"name", b"brands", b"count", b"unknown"}))
+    # then
+    assert projected == {"count": 2**40, "name": "콜라", "brands": [{"id": 1}]}
+
+
+def test_snapshot_memo(tmp_path):
+    # given
+    store = SnapshotStore(directory=str(tmp_path))
+    memo = {"콜라 500ml": "콜라 (500.0ml)", " [CU]바나나우유 240ML ": "(cu)바나나우유 (240.0ml)"}
+    # when
+    store.write_memo(rel_name="products", version="1", memo=memo)
+    # then
+    assert list(store.read_memo(rel_name="products", version="1").items()) == list(memo.items())
+    # 정제 규칙 version 이 다르거나 저장소가 없으면 쓰지 않는다.
+    assert store.read_memo(rel_name="products", version="2") == {}
+    assert store.read_memo(rel_name="events", version="1") == {}
+    assert SnapshotStore(directory="").read_memo(rel_name="products", version="1") == {}
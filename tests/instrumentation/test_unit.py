@@ -0,0 +1,84 @@
+import json
+from datetime import datetime
+
+import pytest
+from pandas import DataFrame
+
+
+@pytest.fixture
+def recorder():
+    from lib.instrumentation.recorder import Recorder
+
+    Recorder.reset(enabled=True)
+    yield Recorder
+    Recorder.reset()
+
+
+def test_recorder_span(recorder, tmp_path):
+    # given
+    hooked = []
+    recorder.add_hook(hooked.append)
+    # when
+    with recorder.span("products.run") as outer:
+        with recorder.span("products.process", rows_in=[1, 2, 3]) as inner:
+            inner.rows_out = 2
+        outer.rows_out = 2
+    with pytest.raises(ValueError):
+        with recorder.span("products.postprocess"):
+            raise ValueError("fail")
+    path = recorder.write_report(str(tmp_path / "report.json"), date="2024-01-02")
+    # then
+    inner, outer, failed = recorder.records()
+    assert [x["name"] for x in hooked] == ["products.process", "products.run", "products.postprocess"]
+    assert inner["parent"] == "products.run" and outer["parent"] is None
+    assert (inner["rows_in"], inner["rows_out"]) == (3, 2)
+    assert inner["wall_seconds"] >= 0 and inner["cpu_seconds"] >= 0 and inner["max_rss_mb"] > 0
+    assert failed["status"] == "error" and failed["error"] == "ValueError: fail"
+    with open(path) as f:
+        report = json.load(f)
+    assert report["date"] == "2024-01-02" and len(report["spans"]) == 3
+
+
+def test_recorder_disabled(tmp_path):
+    from lib.instrumentation.recorder import Recorder
+
+    # given
+    Recorder.reset(enabled=False)
+    # when
+    with Recorder.span("products.run", rows_in=[1]) as span:
+        span.rows_out = 1
+    # then
+    assert Recorder.records() == []
+    assert Recorder.write_report(str(tmp_path / "report.json")) is None
+    Recorder.reset()
+
+
+def test_processor_instrumentation(recorder):
+    from lib.interface.processor_ifs import ProcessorIfs
+
+    # given
+    class Processor(ProcessorIfs):
+        def _preprocess(self, date, *args, **kwargs):
+            return DataFrame({"name": ["a", "b", "c"]})
+
+        def _process(self, data, date, *args, **kwargs):
+            return self._measure("process.filter", lambda: data[data["name"] != "c"], rows_in=data)
+
+        def _postprocess(self, data, date, *args, **kwargs):
+            return data.to_dict("records")
+
+    # when
+    result = Processor("products").run(datetime(2024, 1, 2))
+    # then
+    records = {x["name"]: x for x in recorder.records()}
+    assert len(result["data"]) == 2
+    assert list(records) == [
+        "products.preprocess",
+        "products.process.filter",
+        "products.process",
+        "products.postprocess",
+        "products.run",
+    ]
+    assert (records["products.process.filter"]["rows_in"], records["products.process.filter"]["rows_out"]) == (3, 2)
+    assert records["products.process.filter"]["parent"] == "products.process"
+    assert records["products.postprocess"]["rows_out"] == 2 and records["products.run"]["rows_out"] == 2
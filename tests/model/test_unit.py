@@ -0,0 +1,102 @@
+import copy
+
+from pandas import DataFrame
+
+from lib.domain.event.model.service_event_schema import ServiceBrandEventSchema
+from lib.domain.product.model.crawled_product_schema import CrawledProductSchema
+from lib.model.validator import ValidatorFactory
+
+
+def crawled_product() -> dict:
+    return {
+        "crawled_info": {"spider": "cu", "id": "1", "url": "https://cu.test/1", "brand": 2},
+        "name": "콜라 500ml",
+        "description": None,
+        "events": [{"brand": 2, "id": 1}],
+        "image": {
+            "thumb": "s3://bucket/images/products/1.webp",
+            "others": ["s3://bucket/images/products/2.webp"],
+            "size": {"thumb": {"width": 10, "height": 10}, "others": [{"width": 20, "height": 20}]},
+        },
+        "price": {"value": 1000.0, "currency": 1, "discounted_value": None},
+        "discounted_price": None,
+        "category": None,
+        "tags": ["음료"],
+    }
+
+
+def service_event() -> dict:
+    return {
+        "status": 2,
+        "name": "이벤트",
+        "brand": 2,
+        "image": {"thumb": "https://image.test/events/1.webp", "others": []},
+        "description": None,
+        "crawled_infos": [{"spider": "cu", "id": "1", "url": "https://cu.test/1"}],
+        "start_at": 1,
+        "end_at": 2,
+    }
+
+
+def invalidate(record: dict, path: list, value=None, delete: bool = False) -> dict:
+    record = copy.deepcopy(record)
+    target = record
+    for key in path[:-1]:
+        target = target[key]
+    if delete:
+        del target[path[-1]]
+    else:
+        target[path[-1]] = value
+    return record
+
+
+def test_validator_same_as_marshmallow():
+    # given
+    validator = ValidatorFactory.get_instance(CrawledProductSchema)
+    record = crawled_product()
+    data = [
+        record,
+        invalidate(record, ["name"], delete=True),
+        invalidate(record, ["name"], None),
+        invalidate(record, ["category"], "x"),
+        invalidate(record, ["category"], True),
+        invalidate(record, ["price", "value"], float("nan")),
+        invalidate(record, ["price", "value"], "1000"),
+        invalidate(record, ["image", "thumb"], None),
+        invalidate(record, ["image", "thumb"], "https://bucket/images/products/1.webp"),
+        invalidate(record, ["image", "others", 0], "s3://"),
+        invalidate(record, ["image", "size", "thumb"], delete=True),
+        invalidate(record, ["image", "size", "unknown"], 1),
+        invalidate(record, ["image", "unknown"], 1),
+        invalidate(record, ["events", 0, "id"], None),
+        invalidate(record, ["tags"], "음료"),
+        invalidate(record, ["unknown"], 1),
+    ]
+    # when
+    errors = validator.validate(data)
+    expected = CrawledProductSchema().validate(data, many=True)
+    # then
+    assert {idx: set(keys) for idx, keys in errors.items()} == {idx: set(keys) for idx, keys in expected.items()}
+    assert ValidatorFactory.get_instance(CrawledProductSchema) is validator
+
+
+def test_validate_frame():
+    # given
+    validator = ValidatorFactory.get_instance(ServiceBrandEventSchema)
+    record = service_event()
+    data = DataFrame(
+        [
+            record,
+            invalidate(record, ["image", "thumb"], "not url"),
+            invalidate(record, ["crawled_infos"], []),
+            invalidate(record, ["start_at"], None),
+        ]
+    )
+    # when & then
+    expected = ServiceBrandEventSchema().validate(data.to_dict("records"), many=True)
+    assert validator.validate_frame(data) == {1: ["image"], 3: ["start_at"]}
+    assert {idx: list(keys) for idx, keys in expected.items()} == {1: ["image"], 3: ["start_at"]}
+    data["unknown"] = 1
+    assert set(validator.validate_frame(data)) == set(
+        ServiceBrandEventSchema().validate(data.to_dict("records"), many=True)
+    )
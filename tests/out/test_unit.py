@@ -0,0 +1,210 @@
+import hashlib
+import json
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("S3_BUCKET", "tmp")
+    monkeypatch.setenv("S3_KEY", "transform")
+    from lib.aws.factory import ClientFactory
+
+    ClientFactory.clear()
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket="tmp")
+        yield client
+    ClientFactory.clear()
+
+
+def test_s3_sender(s3, monkeypatch):
+    from lib.out.sender.s3.s3 import S3Sender
+
+    # given
+    monkeypatch.setenv("S3_UPLOAD_WORKERS", "4")
+    monkeypatch.setenv("S3_CHUNK_BYTES", "4096")
+    data = [
+        {"name": f"상품{idx}", "price": idx * 100.0, "histories": [{"date": "2024-01-01"}] * (idx % 7)}
+        for idx in range(1050)
+    ]
+    # when
+    chunks = S3Sender().send(rel_name="products", result={"data": data})
+    # then
+    keys = [chunk.key for chunk in chunks]
+    assert keys == [f"transform/products_{idx}.json" for idx in range(len(keys))]
+    bodies = [s3.get_object(Bucket="tmp", Key=key)["Body"].read() for key in keys]
+    assert all(len(body) <= 4096 for body in bodies)
+    assert [(chunk.records, chunk.size, chunk.checksum) for chunk in chunks] == [
+        (len(json.loads(body)), len(body), hashlib.sha256(body).hexdigest()) for body in bodies
+    ]
+    assert [x for body in bodies for x in json.loads(body)] == data
+    assert bodies[0] == json.dumps(json.loads(bodies[0]), ensure_ascii=False).encode()
+
+
+def test_s3_sender_ndjson_gzip(s3, monkeypatch):
+    import gzip
+
+    from lib.out.sender.s3.s3 import S3Sender
+
+    # given
+    monkeypatch.setenv("S3_OUTPUT_FORMAT", "ndjson")
+    monkeypatch.setenv("S3_COMPRESSION", "gzip")
+    monkeypatch.setenv("S3_CHUNK_BYTES", "1024")
+    data = [{"name": f"이벤트{idx}", "brand": idx % 4} for idx in range(100)]
+    # when
+    keys = [chunk.key for chunk in S3Sender().send(rel_name="events", result={"data": data})]
+    # then
+    assert keys == [f"transform/events_{idx}.ndjson.gz" for idx in range(len(keys))] and len(keys) > 1
+    objects = [s3.get_object(Bucket="tmp", Key=key) for key in keys]
+    assert {(x["ContentEncoding"], x["ContentType"]) for x in objects} == {("gzip", "application/x-ndjson")}
+    lines = [line for x in objects for line in gzip.decompress(x["Body"].read()).decode().splitlines()]
+    assert [json.loads(line) for line in lines] == data
+
+
+def test_s3_uploader_retry(s3):
+    from lib.out.sender.s3.uploader import S3Uploader
+
+    # given
+    uploader = S3Uploader(bucket="tmp", workers=2, retries=1)
+    client = uploader._S3Uploader__client
+    failed = set()
+
+    class FlakyClient:
+        meta = client.meta
+
+        def put_object(self, Key: str, **kwargs):
+            if Key.endswith("1") and Key not in failed:
+                failed.add(Key)
+                raise ConnectionError(Key)
+            return client.put_object(Key=Key, **kwargs)
+
+    uploader._S3Uploader__client = FlakyClient()
+    chunks = [(f"chunk/{idx}", lambda idx=idx: str(idx).encode()) for idx in range(12)]
+    # when
+    keys = uploader.upload(chunks)
+    # then
+    assert keys == [key for key, _ in chunks]
+    assert failed == {"chunk/1", "chunk/11"}
+    assert [s3.get_object(Bucket="tmp", Key=key)["Body"].read() for key in keys] == [body() for _, body in chunks]
+    # 재시도 횟수를 넘기면 실패
+    failed.clear()
+    uploader = S3Uploader(bucket="tmp", workers=2, retries=0)
+    uploader._S3Uploader__client = FlakyClient()
+    with pytest.raises(ConnectionError):
+        uploader.upload(chunks)
+
+
+def test_s3_sender_run_prefix(s3):
+    from datetime import datetime
+
+    from lib.out.sender.s3.s3 import S3Sender
+
+    # given
+    sender = S3Sender(run_id="2024-01-02-abcd")
+    data = [{"name": "상품", "price": 100.0}]
+    # when
+    keys = [chunk.key for chunk in sender.send(rel_name="products", result={"data": data})]
+    pointer = sender.publish(date=datetime(2024, 1, 2), results={"products": keys})
+    # then
+    assert keys == ["transform/runs/2024-01-02-abcd/products_0.json"]
+    assert pointer == "transform/latest.json"
+    assert json.loads(s3.get_object(Bucket="tmp", Key=pointer)["Body"].read()) == {
+        "run_id": "2024-01-02-abcd",
+        "date": "2024-01-02",
+        "prefix": "transform/runs/2024-01-02-abcd",
+        "keys": {"products": keys},
+    }
+
+
+def test_s3_eraser(s3, monkeypatch):
+    from lib.out.eraser.s3_eraser import S3Eraser
+
+    # given
+    monkeypatch.setattr(S3Eraser, "DELETE_BATCH_SIZE", 7)
+    old = [f"transform/runs/old/products_{idx}.json" for idx in range(20)] + ["transform/products_0.json"]
+    new = ["transform/runs/new/products_0.json", "transform/latest.json"]
+    for key in old + new + ["other/products_0.json"]:
+        s3.put_object(Bucket="tmp", Key=key, Body=b"[]")
+    # when
+    erased = S3Eraser(bucket="tmp", key="transform").erase_async(exclude=["transform/runs/new/", new[1]]).result()
+    # then
+    assert erased == len(old)
+    remains = {x["Key"] for x in s3.list_objects_v2(Bucket="tmp")["Contents"]}
+    assert remains == set(new) | {"other/products_0.json"}
+
+
+def test_db_sender(s3, monkeypatch):
+    from datetime import datetime
+
+    from lib.out.sender.db.db import DBSender
+    from lib.out.sender.s3.model.chunk import Chunk
+
+    # given
+    monkeypatch.setenv("DB_QUEUE_NAME", "db")
+    monkeypatch.setenv("DB_MESSAGE_CHUNKS", "2")
+    sqs = boto3.client("sqs")
+    queue_url = sqs.create_queue(QueueName="db")["QueueUrl"]
+    chunks = [
+        Chunk(key=f"transform/products_{idx}.json", records=idx, size=10 * idx, checksum=str(idx)) for idx in range(23)
+    ]
+    # when
+    DBSender().send(
+        date=datetime(2024, 1, 2), db_name="service", rel_name="products", data=chunks, manifest="transform/m.json"
+    )
+    # then
+    manifest = json.loads(s3.get_object(Bucket="tmp", Key="transform/m.json")["Body"].read())
+    assert manifest["keys"] == [chunk.key for chunk in chunks]
+    assert manifest["counts"] == list(range(23)) and manifest["records"] == sum(range(23))
+    assert manifest["sizes"] == [10 * idx for idx in range(23)] and manifest["checksums"] == [str(x) for x in range(23)]
+    messages = []
+    while response := sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get("Messages"):
+        messages += [json.loads(x["Body"]) for x in response]
+        sqs.delete_message_batch(
+            QueueUrl=queue_url, Entries=[{"Id": x["MessageId"], "ReceiptHandle": x["ReceiptHandle"]} for x in response]
+        )
+    messages = sorted(messages, key=lambda x: x["part"])
+    assert [x["part"] for x in messages] == list(range(12)) and {x["parts"] for x in messages} == {12}
+    ranges = [(data["start"], data["stop"]) for x in messages for data in x["data"] if data["column"] == "manifest"]
+    assert ranges == [(p, min(p + 2, 23)) for p in range(0, 23, 2)]
+    assert messages[0]["data"][0] == {"column": "bucket", "value": "tmp", "start": None, "stop": None}
+
+
+def test_db_sender_stream(s3, monkeypatch):
+    from datetime import datetime
+
+    from lib.out.sender.db.db import DBSender
+    from lib.out.sender.s3.s3 import S3Sender
+
+    # given
+    monkeypatch.setenv("DB_QUEUE_NAME", "db")
+    monkeypatch.setenv("S3_CHUNK_BYTES", "512")
+    sqs = boto3.client("sqs")
+    queue_url = sqs.create_queue(QueueName="db")["QueueUrl"]
+    data = [{"name": f"상품{idx}", "price": idx} for idx in range(300)]
+    stream = DBSender().stream(
+        date=datetime(2024, 1, 2), db_name="service", rel_name="products", manifest="transform/m.json"
+    )
+    streamed = []
+    # when
+    chunks = S3Sender().send(
+        rel_name="products", result={"data": data}, on_chunk=lambda x: streamed.append(x) or stream.send(x)
+    )
+    stream.close()
+    # then
+    assert streamed == chunks and len(chunks) > 10
+    messages = []
+    while response := sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get("Messages"):
+        messages += [json.loads(x["Body"]) for x in response]
+        sqs.delete_message_batch(
+            QueueUrl=queue_url, Entries=[{"Id": x["MessageId"], "ReceiptHandle": x["ReceiptHandle"]} for x in response]
+        )
+    messages = sorted(messages, key=lambda x: x["part"])
+    assert [x["action"] for x in messages] == ["UPSERT"] * len(chunks) + ["COMPLETE"]
+    assert [x["data"][1]["value"] for x in messages[:-1]] == [[chunk.key] for chunk in chunks]
+    assert messages[-1]["parts"] == len(chunks) and messages[-1]["data"][1]["stop"] == len(chunks)
+    manifest = json.loads(s3.get_object(Bucket="tmp", Key="transform/m.json")["Body"].read())
+    assert manifest["keys"] == [chunk.key for chunk in chunks] and manifest["records"] == len(data)
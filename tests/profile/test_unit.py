@@ -0,0 +1,66 @@
+import os
+
+
+def test_synthetic_data():
+    from lib.domain.event.model.crawled_event_schema import CrawledBrandEventSchema
+    from lib.domain.product.model.crawled_product_schema import CrawledProductSchema
+    from lib.domain.product.normalizer import NameNormalizer
+    from lib.model.validator import ValidatorFactory
+    from pandas import Series
+    from profile.synthetic import crawled_events, crawled_products, product_name
+
+    # given
+    products = list(crawled_products(500, duplicate_ratio=0.3))
+    events = list(crawled_events(100))
+    # then
+    assert ValidatorFactory.get_instance(CrawledProductSchema).validate(products) == {}
+    assert ValidatorFactory.get_instance(CrawledBrandEventSchema).validate(events) == {}
+    # 같은 상품은 표기가 달라도 정제하면 같은 이름이고, 일부는 여러 brand 에서 판다.
+    assert NameNormalizer().normalize(Series([product_name(7, variant) for variant in range(3)])).nunique() == 1
+    names = NameNormalizer().normalize(Series([x["name"] for x in products]))
+    assert 0.2 < 1 - names.nunique() / len(products) < 0.4
+    assert products == list(crawled_products(500, duplicate_ratio=0.3))
+
+
+def test_benchmark():
+    from lib.instrumentation.recorder import Recorder
+    from profile.benchmark import ENVIRONMENT, Benchmark, parse_size
+
+    # given
+    Recorder.reset(enabled=True)
+    # when
+    try:
+        report = Benchmark(domain="products", size=200).run()
+    finally:
+        Recorder.reset()
+    # then
+    stages = {(x["phase"], x["name"]): x for x in report["stages"]}
+    download = f"download.{ENVIRONMENT['MONGO_SERVICE_DB']}.products"
+    assert stages[("cold", "products.preprocess")]["rows_out"] == 200
+    assert stages[("warm", download)]["rows_out"] == stages[("cold", "products.run")]["rows_out"]
+    assert ("warm", "products.process.histories") in stages and ("warm", "send.s3.products") in stages
+    assert [parse_size(x) for x in ["10k", "1m", "500"]] == [10_000, 1_000_000, 500]
+    # benchmark 설정은 실행이 끝나면 남지 않는다.
+    assert os.getenv("S3_BACKUP_BUCKET") != ENVIRONMENT["S3_BACKUP_BUCKET"]
+
+
+def test_download_profiler(monkeypatch):
+    from profile.download_memory import DownloadProfiler, compare
+
+    # given: 이미 있는 환경 변수와 관계없이 profile 설정으로 측정하고, 끝나면 되돌린다.
+    monkeypatch.setenv("S3_BACKUP_BUCKET", "other-backup")
+    monkeypatch.delenv("AWS_ACCESS_KEY_ID", raising=False)
+    profiler = DownloadProfiler(documents=300, histories=5, object_mb=0.1, traced=True, top=5)
+    # when
+    streamed = profiler.run("download.projection")
+    previous = profiler.run("previous")
+    # then
+    assert streamed["rows"] == previous["rows"] == streamed["backup"]["documents"] == 300
+    assert streamed["backup"]["objects"] > 1
+    assert sum(x["requests"] for x in streamed["objects"]) >= streamed["backup"]["objects"]
+    assert all(x["received_mb"] == x["size_mb"] for x in streamed["objects"])
+    assert streamed["traced_peak_mb"] > 0 and len(previous["top_allocators"]) <= 5
+    assert previous["peak_rss_mb"] >= previous["baseline_rss_mb"]
+    assert os.getenv("S3_BACKUP_BUCKET") == "other-backup" and os.getenv("AWS_ACCESS_KEY_ID") is None
+    report = {"results": [previous]}
+    assert compare(report, report)[0]["seconds"]["diff"] == 0
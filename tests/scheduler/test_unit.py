@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+
+import pytest
+
+
+def test_dag_scheduler():
+    from lib.scheduler.dag import DAGScheduler, Task
+
+    # given
+    barrier = threading.Barrier(2, timeout=5)
+
+    def process(value: int):
+        def fn(results):
+            # 독립적인 두 pipeline 의 process 가 동시에 실행되어야 통과한다.
+            barrier.wait()
+            return value
+
+        return fn
+
+    tasks = [
+        Task(name="events.process", fn=process(1)),
+        Task(name="events.upload", fn=lambda results: results["events.process"] * 10, deps=["events.process"]),
+        Task(name="products.process", fn=process(2)),
+        Task(name="products.upload", fn=lambda results: results["products.process"] * 10, deps=["products.process"]),
+        Task(
+            name="publish",
+            fn=lambda results: results["events.upload"] + results["products.upload"],
+            deps=["events.upload", "products.upload"],
+        ),
+    ]
+    # when
+    results = DAGScheduler().run(tasks)
+    # then
+    assert results == {
+        "events.process": 1,
+        "events.upload": 10,
+        "products.process": 2,
+        "products.upload": 20,
+        "publish": 30,
+    }
+
+
+def test_dag_scheduler_failure():
+    from lib.scheduler.dag import DAGScheduler, Task
+
+    # given
+    called = []
+
+    def fail(results):
+        raise ValueError("fail")
+
+    def slow(results):
+        time.sleep(0.1)
+        called.append("events.upload")
+
+    tasks = [
+        Task(name="products.process", fn=fail),
+        Task(name="products.upload", fn=lambda results: called.append("products.upload"), deps=["products.process"]),
+        Task(name="products.notify", fn=lambda results: called.append("products.notify"), deps=["products.upload"]),
+        Task(name="events.process", fn=lambda results: called.append("events.process")),
+        Task(name="events.upload", fn=slow, deps=["events.process"]),
+    ]
+    # when & then: 실패한 task 의 하위 task 만 건너뛰고 독립적인 task 는 끝까지 실행한다.
+    with pytest.raises(RuntimeError, match="products.process") as e:
+        DAGScheduler().run(tasks)
+    assert isinstance(e.value.__cause__, ValueError)
+    assert "['products.upload', 'products.notify']" in str(e.value)
+    assert called == ["events.process", "events.upload"]
+    # 순환 의존
+    with pytest.raises(RuntimeError, match="cycle"):
+        DAGScheduler().run([Task(name="a", fn=print, deps=["b"]), Task(name="b", fn=print, deps=["a"])])
+
+
+@pytest.fixture
+def pipeline_env(monkeypatch):
+    import boto3
+    from moto import mock_aws
+
+    from lib.aws.factory import ClientFactory
+    from lib.db.factory import RepositoryFactory
+    from profile.synthetic import MemoryRepository, crawled_events, crawled_products
+
+    # given: 외부 서비스 대신 moto(S3, SQS, EventBridge) 와 in-memory crawling DB
+    for key, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "S3_BUCKET": "result",
+        "S3_KEY": "transform",
+        "S3_BACKUP_BUCKET": "backup",
+        "S3_CHUNK_BYTES": "16384",
+        "DB_QUEUE_NAME": "db",
+        "MONGO_SERVICE_DB": "service",
+        "MONGO_CRAWLING_DB": "crawling",
+        "IMAGE_DOMAIN": "https://image.test",
+        "EVENT_SOURCE": "transform",
+        "EVENT_DETAIL_TYPE": "finished",
+        "EVENT_BUS_NAME": "default",
+    }.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.delenv("SNAPSHOT_DIR", raising=False)
+    monkeypatch.delenv("CHECKPOINT_DIR", raising=False)
+    reads = []
+
+    def documents(rel_name, generate):
+        def read():
+            reads.append(rel_name)
+            return generate()
+
+        return read
+
+    repository = MemoryRepository(
+        {
+            "products": documents("products", lambda: crawled_products(300)),
+            "events": documents("events", lambda: crawled_events(50)),
+        }
+    )
+    monkeypatch.setattr(RepositoryFactory, "get_instance", lambda *args, **kwargs: repository)
+    ClientFactory.clear()
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="result")
+        s3.create_bucket(Bucket="backup")
+        sqs = boto3.client("sqs")
+        queue_url = sqs.create_queue(QueueName="db")["QueueUrl"]
+
+        def receive():
+            messages = []
+            while response := sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get("Messages"):
+                messages += [json.loads(x["Body"]) for x in response]
+                sqs.delete_message_batch(
+                    QueueUrl=queue_url,
+                    Entries=[{"Id": x["MessageId"], "ReceiptHandle": x["ReceiptHandle"]} for x in response],
+                )
+            return messages
+
+        def objects():
+            pages = s3.get_paginator("list_objects_v2").paginate(Bucket="result", Prefix="transform/")
+            return [x["Key"] for page in pages for x in page.get("Contents", [])]
+
+        def pointer():
+            return json.loads(s3.get_object(Bucket="result", Key="transform/latest.json")["Body"].read())
+
+        yield {"receive": receive, "objects": objects, "pointer": pointer, "reads": reads}
+    ClientFactory.clear()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_engine_pipelines(pipeline_env, stream):
+    from lib.engine import Engine
+
+    # when: 같은 날짜를 두 번 실행
+    pointers, messages = [], []
+    for _ in range(2):
+        Engine(stage="dev", date="2024-01-02", domain="all", stream=stream).run()
+        pointers.append(pipeline_env["pointer"]())
+        messages.append(pipeline_env["receive"]())
+    # then: pointer 는 마지막 실행 prefix 를 가리키고, 이전 실행 결과는 지워진다.
+    first, second = pointers
+    assert first["prefix"] != second["prefix"] and second["prefix"] == f"transform/runs/{second['run_id']}"
+    keys = pipeline_env["objects"]()
+    assert set(keys) == {"transform/latest.json"} | {key for x in second["keys"].values() for key in x} | {
+        f"{second['prefix']}/{rel_name}.manifest.json" for rel_name in ["events", "products"]
+    }
+    assert all(key.startswith(f"{second['prefix']}/") for x in second["keys"].values() for key in x)
+    assert len(second["keys"]["products"]) > 1
+    # 두 번째 실행의 DB 반영 메시지는 두 번째 실행 결과만 가리킨다.
+    for rel_name in ["events", "products"]:
+        manifest = f"{second['prefix']}/{rel_name}.manifest.json"
+        sent = [x for x in messages[1] if x["rel_name"] == rel_name]
+        values = [data["value"] for x in sent for data in x["data"][1:]]
+        if stream:
+            assert [x["action"] for x in sent] == ["UPSERT"] * len(second["keys"][rel_name]) + ["COMPLETE"]
+            assert values == [[key] for key in second["keys"][rel_name]] + [manifest]
+        else:
+            assert {x["action"] for x in sent} == {"UPSERT"} and set(values) == {manifest}
+            assert sent[-1]["data"][1]["stop"] == len(second["keys"][rel_name])
+
+
+def test_engine_resume(pipeline_env, monkeypatch, tmp_path):
+    from lib.engine import Engine
+    from lib.out.sender.db.db import DBSender
+
+    # given: products 의 DB 반영 메시지 단계에서 실패
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path))
+    send = DBSender.send
+
+    def fail(self, rel_name: str, **kwargs):
+        if rel_name == "products":
+            raise ConnectionError("sqs")
+        return send(self, rel_name=rel_name, **kwargs)
+
+    monkeypatch.setattr(DBSender, "send", fail)
+    with pytest.raises(RuntimeError, match="products.notify"):
+        Engine(stage="dev", date="2024-01-02", domain="all").run()
+    with open(tmp_path / "2024-01-02" / "run.json") as f:
+        run_id = json.load(f)["run_id"]
+    uploaded = set(pipeline_env["objects"]())
+    pipeline_env["reads"].clear()
+    monkeypatch.setattr(DBSender, "send", send)
+    # when
+    Engine(stage="dev", date="2024-01-02", domain="all", resume=True).run()
+    # then: 같은 실행 id(prefix)에 이어 쓰고, 끝난 단계(crawling DB 읽기, 업로드)는 다시 하지 않는다.
+    pointer = pipeline_env["pointer"]()
+    assert pointer["run_id"] == run_id and pointer["prefix"] == f"transform/runs/{run_id}"
+    assert pipeline_env["reads"] == []
+    assert set(pipeline_env["objects"]()) == uploaded | {
+        "transform/latest.json",
+        f"{pointer['prefix']}/products.manifest.json",
+    }
+    assert {x["rel_name"] for x in pipeline_env["receive"]()} == {"events", "products"}
+    assert not (tmp_path / "2024-01-02").exists()
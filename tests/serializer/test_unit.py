@@ -0,0 +1,84 @@
+import importlib.util
+import json
+
+import numpy as np
+import pytest
+from pandas import DataFrame
+
+from lib.model.records import FrameRecords
+from lib.serializer.factory import SerializerFactory
+from lib.serializer.stdlib_serializer import to_builtin
+
+BACKENDS = [
+    name for name in ["stdlib", "orjson", "msgspec"] if importlib.util.find_spec(name.replace("stdlib", "json"))
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_serializer(backend):
+    # given
+    serializer = SerializerFactory.get_instance(backend)
+    data = {
+        "name": '콜라 "500ml"\n',
+        "price": 1200.5,
+        "discounted_value": float("nan"),
+        "category": np.int64(3),
+        "best": {"price": np.float64("inf"), "events": np.array([1, 2])},
+        "recommendation": {"products": [], "events": ()},
+        "status": np.bool_(True),
+        "description": None,
+    }
+    # when
+    result = serializer.dumps(data)
+    # then
+    expected = {**data, "discounted_value": None, "category": 3, "status": True}
+    expected["best"] = {"price": None, "events": [1, 2]}
+    expected["recommendation"] = {"products": [], "events": []}
+    assert result == json.dumps(expected, ensure_ascii=False).encode()
+    assert SerializerFactory.get_instance(backend) is serializer
+
+
+def test_serializer_bytes():
+    # given
+    serializers = {backend: SerializerFactory.get_instance(backend) for backend in BACKENDS}
+    data = [
+        {
+            'name": ,': '제로콜라, "1+1": 500ml\\',
+            "prices": [1e16, -1.5e-7, 0.00001, 10.00001, 0.0001, 1200.5, -0.0, 12345678.9, 1e300, 5e-324],
+            "events": [{"brand": 1, "id": np.int64(2)}, {}],
+            "tags": ["e", "1e16", "\u2028\x7f\x1f", ""],
+            "image": {"size": {"thumb": {"width": 100, "height": np.float64(1e-5)}}, "others": []},
+            "status": None,
+        },
+        {"url": "https://cu.test/products/1", "name": "1,000원: 할인", "price": 1e-7, "best": True},
+        [],
+        {},
+        "콜라",
+        3,
+    ]
+    for obj in data:
+        # when
+        results = {backend: serializer.dumps(obj) for backend, serializer in serializers.items()}
+        # then
+        assert set(results.values()) == {json.dumps(obj, ensure_ascii=False, default=to_builtin).encode()}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_frame_records(backend):
+    # given
+    serializer = SerializerFactory.get_instance(backend)
+    data = DataFrame(
+        {
+            "name": ["콜라", "사이다", "우유"],
+            "price": [1000.0, float("nan"), 800.0],
+            "category": [1, 2, 3],
+            "brands": [[{"id": 1}], [], [{"id": 2, "events": [1]}]],
+        }
+    )
+    # when
+    records = FrameRecords(data)
+    # then
+    expected = data.to_dict("records")
+    assert records[0] == expected[0] and records[-1] == expected[2] and len(records) == 3
+    assert records[:1] == expected[:1] and records != expected[:2]
+    assert list(records.dumps(serializer)) == [serializer.dumps(x) for x in data.to_dict("records")]